@@ -0,0 +1,170 @@
+# src/backtester.py
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import champion_models
+from config import config
+from data_store import CandleStore, csv_time_range
+from features import FEATURE_COLUMNS, FrozenScaler, compute_features
+from strategy import StrategyParams
+from trade_store import TradeStore
+
+DATA_FILE, REPORT_DIR = config['PATHS']['DATA_FILE'], config['PATHS']['REPORT_DIR']
+SYMBOL, STRATEGY_TIMEFRAME = config['TRADING']['SYMBOL'], config['TRADING']['STRATEGY_TIMEFRAME']
+INITIAL_BALANCE = 100.0
+RESAMPLE_AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum', 'number_of_trades': 'sum', 'taker_buy_base_asset_volume': 'sum'}
+SIMULATION_INPUTS = ['close', 'atr', 'volatility', 'volatility_filter', 'pred_long', 'pred_short']
+TRADE_COLUMNS = ['timestamp', 'type', 'entry_price', 'exit_price', 'size_usd', 'pnl_usd', 'exit_reason']
+
+
+def load_history(file_path=DATA_FILE):
+    """Reads the 1m history CSV into a DataFrame indexed by UTC timestamp."""
+    df = pd.read_csv(file_path)
+    ts = df.pop('timestamp')
+    df.index = pd.to_datetime(ts, unit='ms') if np.issubdtype(ts.dtype, np.number) else pd.to_datetime(ts)
+    for col in ('number_of_trades', 'taker_buy_base_asset_volume'):
+        if col not in df: df[col] = 0
+    return df[list(RESAMPLE_AGG)]
+
+
+def resample_history(df_1m, timeframe=STRATEGY_TIMEFRAME):
+    return df_1m.resample(timeframe).agg(RESAMPLE_AGG).dropna()
+
+
+def load_resampled(data_file=DATA_FILE):
+    """The strategy-timeframe history: read straight from the pre-aggregated store view when all of DATA_FILE has been imported, else resampled from the CSV."""
+    store = CandleStore(SYMBOL)
+    if data_file == DATA_FILE and store.view.exists():
+        if not os.path.exists(data_file) or store.covers(*csv_time_range(data_file)):
+            print(f"📂 Reading {len(store.view):,} pre-aggregated {STRATEGY_TIMEFRAME} candles from {store.view.path}...")
+            return store.view.to_frame()[list(RESAMPLE_AGG)]
+        print(f"⚠️ {store.base.path} does not cover all of {data_file}; resampling the CSV instead (delete the store and re-run `python3 src/data_store.py import`).")
+    print(f"📂 Loading {data_file}..."); df_1m = load_history(data_file)
+    print(f"   Resampling {len(df_1m):,} candles to {STRATEGY_TIMEFRAME}..."); return resample_history(df_1m)
+
+
+def prepare_history(df_3m, scaler=None):
+    """Features, scaling and ATR for the whole history in one pass."""
+    df = compute_features(df_3m.copy())
+    if scaler is None:
+        print("   ⚠️ No frozen scaler found next to the models. Fitting one on the full history.")
+        scaler = FrozenScaler.fit(df[FEATURE_COLUMNS].values)
+    df[FEATURE_COLUMNS] = scaler.transform(df[FEATURE_COLUMNS].values)
+    return df
+
+
+def predict_history(df, long_model, short_model):
+    matrix = df[FEATURE_COLUMNS].values
+    return long_model.predict(matrix), short_model.predict(matrix)
+
+
+def simulate(close, atr, volatility, volatility_filter, pred_long, pred_short, params, initial_balance=INITIAL_BALANCE):
+    """
+    Runs the live position state machine (strategy.step) over whole arrays.
+    Entry candidates are found vectorized; the loop only visits candles where a decision
+    can change: candidate entries while flat, and every candle while a position is open.
+
+    Returns (trades, final balance, open position or None). Each trade is a tuple of
+    (exit index, type, entry price, exit price, size usd, pnl usd).
+    """
+    return simulate_prepared(np.asarray(close, dtype=float).tolist(), np.asarray(atr, dtype=float).tolist(), volatility, volatility_filter, pred_long, pred_short, params, initial_balance)
+
+
+def simulate_prepared(close_l, atr_l, volatility, volatility_filter, pred_long, pred_short, params, initial_balance=INITIAL_BALANCE):
+    """simulate() with close and ATR already converted to lists, for callers that run many parameter sets."""
+    volatility_passed = np.asarray(volatility) >= np.asarray(volatility_filter) * params.volatility_filter
+    go_long, go_short = np.asarray(pred_long) > params.long_threshold, np.asarray(pred_short) > params.short_threshold
+    long_entry = volatility_passed & go_long & ~go_short
+    candidates = np.flatnonzero(volatility_passed & (go_long != go_short))
+    long_entry_l = long_entry.tolist()
+    m, risk_pct, max_alloc = params.atr_multiplier_sl, params.risk_per_trade_pct, params.max_allocation_pct
+
+    n, balance, trades, position = len(close_l), float(initial_balance), [], None
+    i, stale_at, stale_balance = 0, -1, 0.0
+    while i < n:
+        k = np.searchsorted(candidates, i)
+        if k == len(candidates): break
+        i = int(candidates[k])
+        sizing_balance = stale_balance if i == stale_at else balance
+        entry_price, a = close_l[i], atr_l[i]
+        is_long = long_entry_l[i]
+        if is_long: stop = entry_price - (a * m); risk_per_unit = entry_price - stop
+        else: stop = entry_price + (a * m); risk_per_unit = stop - entry_price
+        if risk_per_unit <= 0: i += 1; continue
+        size = (sizing_balance * risk_pct) / risk_per_unit
+        max_pos_value = sizing_balance * max_alloc
+        if (size * entry_price) > max_pos_value: size = max_pos_value / entry_price
+
+        j, exit_price = i + 1, None
+        if is_long:
+            while j < n:
+                c = close_l[j]; stop = max(stop, c - (atr_l[j] * m))
+                if c <= stop: exit_price = stop; break
+                j += 1
+        else:
+            while j < n:
+                c = close_l[j]; stop = min(stop, c + (atr_l[j] * m))
+                if c >= stop: exit_price = stop; break
+                j += 1
+        if exit_price is None:
+            position = {'type': 'long' if is_long else 'short', 'entry_price': entry_price, 'stop_loss': stop, 'position_size_units': size}
+            break
+        pnl = (exit_price - entry_price) * size if is_long else (entry_price - exit_price) * size
+        trades.append((j, 'long' if is_long else 'short', entry_price, exit_price, size * entry_price, pnl))
+        # A re-entry on the exit candle is sized from the balance at the start of that cycle, as in run_bot.
+        stale_at, stale_balance = j, balance
+        balance += pnl; i = j
+    return trades, balance, position
+
+
+def trades_frame(trades, timestamps):
+    """Trade tuples from simulate() in the trade log schema (see live_bot.log_trade_to_csv)."""
+    df = pd.DataFrame(trades, columns=['index', 'type', 'entry_price', 'exit_price', 'size_usd', 'pnl_usd'])
+    df.insert(0, 'timestamp', np.asarray(timestamps)[df.pop('index').values] if len(df) else [])
+    df['exit_reason'] = 'stop_loss'
+    return df[TRADE_COLUMNS]
+
+
+def summarize(pnl, initial_balance, final_balance):
+    """Return, max drawdown and win rate from the sequence of realized trade PnLs."""
+    pnl = np.asarray(pnl, dtype=float)
+    equity = initial_balance + np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.concatenate(([initial_balance], equity)))[1:]
+    return {'trades': len(pnl), 'return_pct': (final_balance / initial_balance - 1) * 100, 'max_drawdown_pct': float(((equity - peak) / peak).min() * 100) if len(pnl) else 0.0,
+            'win_rate_pct': float((pnl > 0).mean() * 100) if len(pnl) else 0.0, 'final_balance': final_balance}
+
+
+def prepare_predictions(data_file=DATA_FILE):
+    """Everything the simulator needs from a history, computed once: per-candle arrays keyed by name."""
+    df = prepare_history(load_resampled(data_file), champion_models.load_scaler())
+    long_model, short_model = champion_models.load_models()
+    print(f"   Scoring {len(df):,} candles with both models..."); pred_long, pred_short = predict_history(df, long_model, short_model)
+    return {'timestamp': df.index.values, 'close': df['close'].values, 'atr': df['atr'].values, 'volatility': df['volatility_10'].values,
+            'volatility_filter': df['volatility_filter'].values, 'pred_long': pred_long, 'pred_short': pred_short}
+
+
+def run_backtest(data_file=DATA_FILE, params=None, initial_balance=INITIAL_BALANCE):
+    params = params or StrategyParams.from_config(config)
+    start = time.perf_counter()
+    data = prepare_predictions(data_file)
+    prepared = time.perf_counter()
+    trades, final_balance, open_position = simulate(*(data[k] for k in SIMULATION_INPUTS), params, initial_balance)
+    trades_df = trades_frame(trades, data['timestamp'])
+    done = time.perf_counter()
+
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    log_file = os.path.join(REPORT_DIR, 'backtest_trade_log.csv'); trades_df.to_csv(log_file, index=False)
+    trade_store = TradeStore(); trade_store.clear('backtest', SYMBOL); trade_store.append_many(trades_df, 'backtest', SYMBOL, initial_balance)
+    summary = summarize(trades_df['pnl_usd'].values, initial_balance, final_balance)
+    print(f"✅ Backtest complete: {summary['trades']} trades | Return: {summary['return_pct']:.2f}% | Max DD: {summary['max_drawdown_pct']:.2f}% | Win rate: {summary['win_rate_pct']:.1f}%")
+    if open_position: print(f"   Position still open at the end of the data: {open_position['type'].upper()} @ ${open_position['entry_price']:,.2f}")
+    print(f"   Preparation: {prepared - start:.1f}s | Simulation: {done - prepared:.2f}s | Trade log: {log_file} (and {trade_store.path}, source 'backtest')")
+    return trades_df, summary
+
+
+if __name__ == '__main__':
+    run_backtest()
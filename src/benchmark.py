@@ -0,0 +1,188 @@
+# src/benchmark.py
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import champion_models
+import live_bot
+from backtester import RESAMPLE_AGG, resample_history
+from config import config
+from data_store import aggregate_candles
+from features import CANDLE_FIELDS, FEATURE_COLUMNS, FrozenScaler, IncrementalFeatureEngine, compute_features, wilder_atr
+from market_feed import CANDLE_DTYPE, MarketFeed
+from state_store import StateStore
+from trade_store import TradeStore
+
+BENCHMARK_DIR = os.path.join(config['PATHS']['REPORT_DIR'], 'benchmarks')
+LIVE_WINDOW = 500
+MIN_RUN_S = 0.2
+DEFAULT_TOLERANCE = 0.2
+
+
+def synthetic_ohlcv(n, seed=42, start='2024-01-01'):
+    """Deterministic random-walk 1m candles with every column the pipeline reads."""
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.0008, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.0005, n)); low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.0005, n))
+    volume = rng.uniform(0.5, 30, n)
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume, 'number_of_trades': rng.integers(10, 500, n).astype(float),
+                         'taker_buy_base_asset_volume': volume * rng.uniform(0.2, 0.8, n)}, index=pd.date_range(start, periods=n, freq='1min'))[list(RESAMPLE_AGG)]
+
+
+def to_rows(df):
+    rows = np.zeros(len(df), dtype=CANDLE_DTYPE)
+    rows['timestamp'] = (df.index - pd.Timestamp(0)) // pd.Timedelta('1ms')
+    for col in CANDLE_DTYPE.names[1:]: rows[col] = df[col].values
+    return rows
+
+
+def measure(fn, min_run_s=MIN_RUN_S, repeat=5):
+    """Median/min seconds per call over `repeat` runs, each looping long enough to be timed reliably."""
+    start = time.perf_counter(); fn(); first = time.perf_counter() - start
+    number = max(1, int(min_run_s / max(first, 1e-7)))
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number): fn()
+        runs.append((time.perf_counter() - start) / number)
+    return {'median_ms': float(np.median(runs) * 1000), 'min_ms': float(min(runs) * 1000), 'calls': number * repeat}
+
+
+def build_cases(rows, seed, workdir):
+    """name -> zero-argument callable. Single-candle (live-style) and bulk (historical) variants of each stage."""
+    df_1m = synthetic_ohlcv(rows, seed)
+    window_1m = df_1m.iloc[-LIVE_WINDOW:]
+    df_3m = resample_history(df_1m); window_3m = resample_history(window_1m)
+    scaler = FrozenScaler.fit(compute_features(df_3m.copy())[FEATURE_COLUMNS].values)
+    rows_1m = to_rows(df_1m)
+    cases = {
+        'resample_live_window': lambda: resample_history(window_1m),
+        'resample_bulk': lambda: resample_history(df_1m),
+        'resample_bulk_columnar': lambda: aggregate_candles(rows_1m, 60_000, 180_000),
+        'prepare_live_data_window': lambda: live_bot.prepare_live_data(window_3m.copy(), scaler),
+        'prepare_live_data_bulk': lambda: live_bot.prepare_live_data(df_3m.copy(), scaler),
+        'atr_window': lambda: wilder_atr(window_3m['high'].values, window_3m['low'].values, window_3m['close'].values),
+        'atr_bulk': lambda: wilder_atr(df_3m['high'].values, df_3m['low'].values, df_3m['close'].values),
+    }
+
+    feed = MarketFeed('BTC/USDT', '1m', '3min', capacity=LIVE_WINDOW); feed.add_candles(rows_1m[:LIVE_WINDOW])
+    stream_rows, position = rows_1m[LIVE_WINDOW:].tolist(), iter(range(10**12))
+    cases['feed_add_candle'] = lambda: feed.add_candle(stream_rows[next(position) % len(stream_rows)])
+
+    engine = IncrementalFeatureEngine(scaler); engine.update_frame(df_3m.iloc[:-1000])
+    tail = list(zip(range(10**6), *(df_3m[c].values[-1000:] for c in CANDLE_FIELDS)))
+    cases['feature_engine_update'] = lambda: engine.update(*tail[next(position) % len(tail)])
+
+    with contextlib.redirect_stdout(io.StringIO()): prepared, _ = live_bot.prepare_live_data(df_3m.copy(), scaler)
+    matrix = prepared[FEATURE_COLUMNS].values; vector = matrix[-1]
+    try:
+        models = champion_models.load_compiled_models()
+        cases['predict_single_compiled'] = lambda: models.predict_row(vector)
+        cases['predict_bulk_compiled'] = lambda: models.predict(matrix)
+    except FileNotFoundError as e: print(f"   Skipping compiled predictions: {e}")
+    try:
+        long_model, short_model = champion_models.load_models()
+        row = vector.reshape(1, -1)
+        cases['predict_single_xgboost'] = lambda: (long_model.predict(row), short_model.predict(row))
+        cases['predict_bulk_xgboost'] = lambda: (long_model.predict(matrix), short_model.predict(matrix))
+    except (ImportError, FileNotFoundError) as e: print(f"   Skipping xgboost predictions: {e}")
+
+    store = StateStore(os.path.join(workdir, 'state.db'))
+    dashboard = {'bot_status': 'Analyzing', 'paper_trading': True, 'account_balance': 100.0, 'signal_analysis': {'Latest Price': 30000.0, 'Pred Long': 0.001}, 'sizing_info': None}
+    balances = iter(range(10**12))
+    cases['state_commit_changed'] = lambda: store.commit({'type': 'long', 'stop_loss': 1.0}, {'balance': next(balances)}, {**dashboard, 'last_update': next(balances)})
+    cases['state_commit_unchanged'] = lambda: store.commit({'type': 'long', 'stop_loss': 1.0}, {'balance': 1}, dashboard)
+    cases['state_read'] = store.read
+    json_path = os.path.join(workdir, 'dashboard_state.json')
+    def json_save():
+        with open(json_path, 'w') as f: json.dump(dashboard, f, indent=4)
+    def json_load():
+        with open(json_path, 'r') as f: return json.load(f)
+    json_save(); cases['state_json_save_legacy'] = json_save; cases['state_json_load_legacy'] = json_load
+
+    live_bot.TRADE_LOG = os.path.join(workdir, 'trade_log.csv')
+    trade = {'type': 'long', 'entry_price': 30000.0, 'exit_price': 30100.0, 'size_usd': 50.0, 'pnl_usd': 0.16, 'exit_reason': 'stop_loss', 'timestamp': datetime.now(timezone.utc)}
+    cases['log_trade_to_csv'] = lambda: live_bot.log_trade_to_csv(trade)
+    trade_store = TradeStore(os.path.join(workdir, 'trades.db'))
+    cases['trade_store_append'] = lambda: trade_store.append({**trade, 'timestamp': datetime.now(timezone.utc)}, 'paper', 'BTC/USDT')
+    cases['trade_store_summary'] = lambda: trade_store.summary('paper', 'BTC/USDT')
+    return cases
+
+
+def run_benchmarks(rows=200_000, seed=42, only=None, min_run_s=MIN_RUN_S):
+    workdir = tempfile.mkdtemp(prefix='champion_bench_')
+    try:
+        print(f"🧪 Building benchmark cases on {rows:,} synthetic 1m candles (seed {seed})...")
+        cases = build_cases(rows, seed, workdir)
+        results = {}
+        for name, fn in cases.items():
+            if only and not any(o in name for o in only): continue
+            with contextlib.redirect_stdout(io.StringIO()): results[name] = measure(fn, min_run_s)
+            print(f"   {name:<28} {results[name]['median_ms']:>12.4f} ms  (min {results[name]['min_ms']:.4f} ms, {results[name]['calls']} calls)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    meta = {'rows': rows, 'seed': seed, 'created': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+    return {'meta': meta, 'results': results}
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Rows of (name, baseline ms, current ms, ratio, status). Compares the fastest run of each case,
+    which is far less sensitive to background load than the median; a case regresses when it is
+    more than `tolerance` slower.
+    """
+    report = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None: report.append((name, None, result['min_ms'], None, 'new')); continue
+        ratio = result['min_ms'] / base['min_ms'] if base['min_ms'] else float('inf')
+        status = 'REGRESSION' if ratio > 1 + tolerance else 'faster' if ratio < 1 - tolerance else 'ok'
+        report.append((name, base['min_ms'], result['min_ms'], ratio, status))
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time the live pipeline stages on deterministic synthetic OHLCV (no exchange access).")
+    parser.add_argument('--rows', type=int, default=200_000, help="Number of synthetic 1m candles for the bulk cases.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', nargs='*', help="Run only cases whose name contains one of these strings.")
+    parser.add_argument('--save', help="Store the results as <BENCHMARK_DIR>/<name>.json.")
+    parser.add_argument('--compare', help="Baseline JSON to compare against; exits with 1 on a regression.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown before a case is flagged (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f: baseline = json.load(f)
+        if baseline['meta']['rows'] != args.rows or baseline['meta']['seed'] != args.seed:
+            print(f"⚠️ Baseline was recorded with rows={baseline['meta']['rows']}, seed={baseline['meta']['seed']}; using the same for this run.")
+            args.rows, args.seed = baseline['meta']['rows'], baseline['meta']['seed']
+    current = run_benchmarks(args.rows, args.seed, args.only)
+    if args.save:
+        os.makedirs(BENCHMARK_DIR, exist_ok=True)
+        out_file = os.path.join(BENCHMARK_DIR, f"{args.save}.json")
+        with open(out_file, 'w') as f: json.dump(current, f, indent=2)
+        print(f"✅ Results saved to {out_file}")
+    if baseline:
+        report = compare(current, baseline, args.tolerance)
+        print(f"\n{'case':<28} {'baseline min':>12} {'current min':>12} {'ratio':>7}")
+        for name, base, cur, ratio, status in report:
+            print(f"{name:<28} {base if base is not None else float('nan'):>12.4f} {cur:>12.4f} {ratio if ratio is not None else float('nan'):>7.2f}  {status}")
+        regressions = [r[0] for r in report if r[4] == 'REGRESSION']
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}"); sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}.")
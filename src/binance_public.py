@@ -0,0 +1,113 @@
+# src/binance_public.py
+
+import http.client
+import json
+import os
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from config import config
+from market_feed import timeframe_to_ms
+
+REST_URL = config.get('API', 'REST_URL', fallback='https://api.binance.com')
+WEIGHT_LIMIT = config.getint('API', 'WEIGHT_LIMIT', fallback=6000)  # request weight per minute per IP
+KLINES_PAGE = 1000
+BINANCE_INTERVALS = {'1s', '1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h', '1d', '3d', '1w', '1M'}
+
+
+def binance_interval(timeframe):
+    """'1m' / '3min' / '1h' -> the Binance kline interval string."""
+    ms = timeframe_to_ms(timeframe)
+    for unit, unit_ms in (('d', 86_400_000), ('h', 3_600_000), ('m', 60_000), ('s', 1000)):
+        if ms % unit_ms == 0 and f"{ms // unit_ms}{unit}" in BINANCE_INTERVALS: return f"{ms // unit_ms}{unit}"
+    raise ValueError(f"Binance has no {timeframe} klines")
+
+
+def kline_params(symbol, timeframe, since=None, limit=KLINES_PAGE):
+    """Query parameters of GET /api/v3/klines (also accepted by ccxt's implicit publicGetKlines)."""
+    params = {'symbol': symbol.replace('/', '').upper(), 'interval': binance_interval(timeframe), 'limit': min(limit, KLINES_PAGE)}
+    if since is not None: params['startTime'] = int(since)
+    return params
+
+
+def parse_klines(klines):
+    """Raw Binance klines -> [timestamp, open, high, low, close, volume, number_of_trades, taker_buy_base_asset_volume] rows."""
+    return [[int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]), float(k[8]), float(k[9])] for k in klines]
+
+
+def fetch_klines(exchange, symbol, timeframe, since=None, limit=KLINES_PAGE):
+    """
+    Full-field klines from either client. ccxt's fetch_ohlcv keeps only OHLCV, so a ccxt exchange
+    is asked through its raw klines endpoint instead.
+    """
+    if hasattr(exchange, 'publicGetKlines'): return parse_klines(exchange.publicGetKlines(kline_params(symbol, timeframe, since, limit)))
+    return exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+
+
+class BinancePublicClient:
+    """
+    Minimal client for the public Binance spot endpoints the paper-trading bot needs (server time
+    and klines), with the same call signatures as ccxt. It runs on the standard library with one
+    keep-alive connection per thread, so the bot starts without importing ccxt and backfills can
+    page in parallel. It keeps the request weight Binance reports under WEIGHT_LIMIT and waits
+    out HTTP 429 replies. Klines keep the trade count and taker buy volume that ccxt's OHLCV drops.
+    """
+
+    def __init__(self, base_url=REST_URL, timeout=10, weight_limit=WEIGHT_LIMIT, max_retries=3):
+        parts = urlsplit(base_url)
+        self.host, self.secure, self.timeout, self.weight_limit, self.max_retries = parts.netloc, parts.scheme == 'https', timeout, weight_limit, max_retries
+        self.local, self.used_weight, self.weight_minute = threading.local(), 0, None
+
+    def _connect(self):
+        """Opens the connection, tunnelling through HTTPS_PROXY / HTTP_PROXY when set (as ccxt's trust_env session does)."""
+        cls = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+        proxy = os.environ.get('HTTPS_PROXY' if self.secure else 'HTTP_PROXY') or os.environ.get('https_proxy' if self.secure else 'http_proxy')
+        if not proxy: return cls(self.host, timeout=self.timeout)
+        conn = cls(urlsplit(proxy if '://' in proxy else f"http://{proxy}").netloc, timeout=self.timeout); conn.set_tunnel(self.host)
+        return conn
+
+    def _request(self, url):
+        """One GET on this thread's connection, reconnecting once if the kept-alive connection was dropped."""
+        for attempt in range(2):
+            conn = getattr(self.local, 'conn', None) or self._connect(); self.local.conn = conn
+            try:
+                conn.request('GET', url, headers={'Accept': 'application/json'})
+                response = conn.getresponse(); return response, response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close(); self.local.conn = None
+                if attempt: raise
+
+    def _throttle(self):
+        """Sleeps to the next minute when the weight used in this one is close to the limit."""
+        minute = int(time.time() // 60)
+        if self.weight_minute == minute and self.used_weight >= 0.9 * self.weight_limit:
+            wait = 60 - time.time() % 60 + 0.5
+            print(f"⚠️ Binance request weight at {self.used_weight}/{self.weight_limit}. Pausing {wait:.0f}s."); time.sleep(wait)
+
+    def get(self, path, **params):
+        url = f"{path}?{urlencode({k: v for k, v in params.items() if v is not None})}" if params else path
+        for attempt in range(self.max_retries + 1):
+            self._throttle()
+            response, body = self._request(url)
+            weight = response.getheader('X-MBX-USED-WEIGHT-1M')
+            if weight is not None: self.used_weight, self.weight_minute = int(weight), int(time.time() // 60)
+            if response.status != 429 or attempt == self.max_retries: break
+            wait = float(response.getheader('Retry-After') or 1)
+            print(f"⚠️ Binance rate limit hit on {path}. Retrying in {wait:.0f}s..."); time.sleep(wait)
+        data = json.loads(body) if body else None
+        if response.status != 200:
+            message = data.get('msg') if isinstance(data, dict) else body[:200]
+            raise RuntimeError(f"Binance {path} returned HTTP {response.status}: {message}")
+        return data
+
+    def fetch_time(self):
+        return self.get('/api/v3/time')['serverTime']
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=500):
+        """[timestamp, open, high, low, close, volume, number_of_trades, taker_buy_base_asset_volume] rows, oldest first."""
+        return parse_klines(self.get('/api/v3/klines', **kline_params(symbol, timeframe, since, limit)))
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None: conn.close(); self.local.conn = None
@@ -0,0 +1,31 @@
+# src/champion_models.py
+
+import os
+from config import config
+from features import FrozenScaler
+
+MODEL_DIR = config['PATHS']['MODEL_DIR']
+LONG_MODEL_NAME, SHORT_MODEL_NAME = config['MODELS']['LONG_MODEL_NAME'], config['MODELS']['SHORT_MODEL_NAME']
+SCALER_NAME = config.get('MODELS', 'SCALER_NAME', fallback='champion_scaler.json')
+
+def load_models(model_dir=MODEL_DIR, long_name=LONG_MODEL_NAME, short_name=SHORT_MODEL_NAME):
+    """Loads the champion long/short XGBoost regressors."""
+    import xgboost as xgb
+    long_model_path, short_model_path = os.path.join(model_dir, long_name), os.path.join(model_dir, short_name)
+    if not os.path.exists(long_model_path) or not os.path.exists(short_model_path): raise FileNotFoundError(f"Model files not found in '{model_dir}'.")
+    long_model, short_model = xgb.XGBRegressor(), xgb.XGBRegressor(); long_model.load_model(long_model_path); short_model.load_model(short_model_path)
+    print("✅ Champion models loaded successfully."); return long_model, short_model
+
+def load_compiled_models(model_dir=MODEL_DIR, long_name=LONG_MODEL_NAME, short_name=SHORT_MODEL_NAME):
+    """Loads both champion models into one CompiledForest (no xgboost needed): predict() returns [pred_long, pred_short] columns."""
+    from tree_inference import CompiledForest
+    long_model_path, short_model_path = os.path.join(model_dir, long_name), os.path.join(model_dir, short_name)
+    if not os.path.exists(long_model_path) or not os.path.exists(short_model_path): raise FileNotFoundError(f"Model files not found in '{model_dir}'.")
+    models = CompiledForest.load(long_model_path, short_model_path)
+    print(f"✅ Champion models compiled ({len(models.roots)} trees, depth {models.depth})."); return models
+
+def load_scaler(model_dir=MODEL_DIR, scaler_name=SCALER_NAME):
+    """Loads the frozen feature scaling parameters saved next to the models, if present."""
+    scaler_path = os.path.join(model_dir, scaler_name)
+    if not os.path.exists(scaler_path): return None
+    print(f"✅ Frozen scaler loaded from {scaler_path}."); return FrozenScaler.load(scaler_path)
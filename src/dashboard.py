@@ -1,13 +1,20 @@
 # src/dashboard.py
 
-import streamlit as st
-import pandas as pd
-import json
 import os
 import time
+import streamlit as st
+import pandas as pd
+from config import config
+from state_store import STATE_DB, read_state, list_scopes
+from shadow import SHADOW_PREFIX
+from dashboard_feed import DashboardSubscriber, DASHBOARD_SOCKET
+from trade_store import TradeStore, TRADE_DB, DAY_MS
+from strategy import StrategyParams
+
+FALLBACK_REFRESH = 5  # seconds between state store reads while the bot's dashboard feed is not connected
+VOLATILITY_FILTER = StrategyParams.from_config(config).volatility_filter
 
 # --- CONFIGURATION ---
-STATE_FILE_PATH = "dashboard_state.json"
 st.set_page_config(
     layout="wide",
     page_title="Champion Trader Live Dashboard",
@@ -28,12 +35,29 @@ def get_status_icon(status):
 def render_metric(label, value, help_text=""):
     st.metric(label, value, help=help_text)
 
+def history_frame(points, columns):
+    frame = pd.DataFrame(points, columns=['time', *columns])
+    return frame.set_index(pd.to_datetime(frame.pop('time'), unit='s')).dropna(how='all')
+
+@st.cache_resource
+def dashboard_feed():
+    """One feed subscriber and one history, shared by every browser session of this dashboard server."""
+    return DashboardSubscriber(DASHBOARD_SOCKET).start()
+
+@st.cache_resource
+def trade_store():
+    """Read-only trade store connection, shared by every browser session."""
+    return TradeStore(TRADE_DB, readonly=True)
+
 # --- UI LAYOUT ---
 st.title("🏆 Champion Trader Live Dashboard")
+feed = dashboard_feed()
+scopes = sorted(s for s in set(list_scopes()) | set(feed.scopes()) if not s.startswith(SHADOW_PREFIX))  # shadow models' virtual books are shown in their own table
+scope = st.sidebar.selectbox("Symbol", scopes, format_func=lambda s: s or "Default") if len(scopes) > 1 else (scopes[0] if scopes else '')
 status_placeholder = st.empty()
 st.markdown("---")
 
-tab1, tab2, tab3 = st.tabs(["**Current Position**", "**Signal Analysis**", "**Bot Internals & Sizing**"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["**Current Position**", "**Signal Analysis**", "**Live Charts**", "**Performance**", "**Bot Internals & Sizing**"])
 
 # Create placeholders within each tab
 with tab1:
@@ -41,19 +65,25 @@ with tab1:
 with tab2:
     signal_placeholder = st.empty()
 with tab3:
+    charts_placeholder = st.empty()
+with tab4:
+    performance_placeholder = st.empty()
+with tab5:
     internals_placeholder = st.empty()
 
 
 # --- MAIN UI LOOP ---
+version = 0
 while True:
-    try:
-        # To avoid file read errors if the bot is writing at the same time
-        with open(STATE_FILE_PATH, 'r') as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    # The bot pushes every update over the dashboard feed; the state store is only read until the first one arrives.
+    data, cycles, ticks = feed.snapshot(scope)
+    if data is None:
+        state = read_state(STATE_DB, scope)
+        data = state['dashboard'] if state else None
+    if not data:
         with status_placeholder.container():
-            st.warning("Dashboard is waiting for the bot's first data file (`dashboard_state.json`)... Make sure live_bot.py is running.", icon="⏳")
-        time.sleep(5)
+            st.warning(f"Dashboard is waiting for the bot's first update on `{DASHBOARD_SOCKET}` or in `{STATE_DB}`... Make sure live_bot.py is running.", icon="⏳")
+        version = feed.wait(version, timeout=FALLBACK_REFRESH)
         continue
 
     # --- 1. STATUS BAR (TOP) ---
@@ -63,7 +93,8 @@ while True:
         mode = "Paper Trading" if data.get('paper_trading', True) else "🔴 LIVE TRADING"
         
         st.header(f"{icon} Bot Status: **{status}** in **{mode}**")
-        st.caption(f"Last Update: {data.get('last_update', 'N/A')}")
+        latency = data.get('decision_latency_ms')
+        st.caption(f"Last Update: {data.get('last_update', 'N/A')}" + (f" | Decision latency after candle close: {latency:,.0f} ms" if latency is not None else ""))
         
         if status == "Error":
             st.error(f"**Error Message:** {data.get('error_message', 'No details provided.')}")
@@ -146,7 +177,47 @@ while True:
                 st.info(f"**Final Decision: HOLD. Conditions for entry are not met.**")
 
 
-    # --- 4. BOT INTERNALS & SIZING TAB ---
+    # --- 4. LIVE CHARTS TAB ---
+    with charts_placeholder.container():
+        if not cycles and not ticks:
+            st.info(f"Charts fill in as the bot publishes updates on `{DASHBOARD_SOCKET}`.")
+        else:
+            st.caption(f"Last {len(cycles)} candle cycles and {len(ticks)} price ticks received since this dashboard connected (bounded in memory).")
+            st.subheader("Price & Unrealized PnL")
+            live = pd.concat([history_frame(cycles, ['price', 'unrealized_pnl']), history_frame(ticks, ['price', 'unrealized_pnl'])]).sort_index()
+            lc1, lc2 = st.columns(2)
+            lc1.line_chart(live['price'].dropna()); lc2.line_chart(live['unrealized_pnl'].dropna())
+            st.subheader("Model Predictions vs. Thresholds")
+            st.line_chart(history_frame(cycles, ['pred_long', 'pred_short', 'long_threshold', 'short_threshold']))
+            hc1, hc2 = st.columns(2)
+            with hc1:
+                st.subheader("Volatility vs. Filter")
+                st.line_chart(history_frame(cycles, ['volatility', 'volatility_filter']))
+            with hc2:
+                st.subheader("Account Balance")
+                st.line_chart(history_frame(cycles, ['balance']))
+
+    # --- 5. PERFORMANCE TAB ---
+    with performance_placeholder.container():
+        # Window stats come from the trade store's running totals, so they cost the same with ten trades or millions.
+        symbol, source = data.get("symbol"), "paper" if data.get('paper_trading', True) else "live"
+        store = trade_store() if symbol and os.path.exists(TRADE_DB) else None
+        total = store.summary(source, symbol) if store else None
+        if not total or not total['trades']:
+            st.info(f"No closed {source} trades in `{TRADE_DB}` yet.")
+        else:
+            now_ms = int(time.time() * 1000)
+            windows = {label: store.summary(source, symbol, now_ms - days * DAY_MS) if days else total for label, days in (("24h", 1), ("7d", 7), ("30d", 30), ("All", None))}
+            st.subheader("Performance by Window")
+            st.dataframe(pd.DataFrame({label: {"Trades": s['trades'], "PnL ($)": s['pnl_usd'], "Return (%)": s['return_pct'], "Win Rate (%)": s['win_rate_pct'],
+                                               "Profit Factor": s['profit_factor'], "Max Drawdown (%)": s['max_drawdown_pct']} for label, s in windows.items()}).T, use_container_width=True)
+            st.subheader("Equity Curve")
+            curve = pd.DataFrame(store.equity_curve(source, symbol), columns=['time', 'equity'])
+            st.line_chart(curve.set_index(pd.to_datetime(curve.pop('time'), unit='ms')))
+            st.subheader("PnL by Exit Reason")
+            st.bar_chart(pd.DataFrame({r: {"PnL ($)": v['pnl_usd'], "Trades": v['trades']} for r, v in total['by_exit_reason'].items()}).T[["PnL ($)"]])
+
+    # --- 6. BOT INTERNALS & SIZING TAB ---
     with internals_placeholder.container():
         st.subheader("Next Trade Sizing Logic")
         sizing = data.get("sizing_info")
@@ -179,7 +250,22 @@ while True:
         if analysis:
             vc1, vc2 = st.columns(2)
             vc1.metric("Current Volatility (10-period)", f"{analysis.get('Volatility', 0):.6f}")
-            vc2.metric("Volatility Filter (50-period avg)", f"{analysis.get('Volatility Filter', 0):.6f}", "Bot only trades if Current > Filter")
+            vc2.metric("Volatility Filter (50-period avg)", f"{analysis.get('Volatility Filter', 0):.6f}", f"Bot only trades if Current ≥ {VOLATILITY_FILTER:g} × Filter")
+
+        st.subheader("Hot-Path Latency")
+        bot_metrics = data.get("metrics")
+        if bot_metrics and bot_metrics.get('stages'):
+            st.dataframe(pd.DataFrame(bot_metrics['stages']).T[['count', 'p50_ms', 'p95_ms', 'p99_ms', 'last_ms']], use_container_width=True)
+            if bot_metrics.get('counters'): st.caption(" | ".join(f"{k}: {v}" for k, v in sorted(bot_metrics['counters'].items())))
+            if bot_metrics.get('gauges'): st.caption(" | ".join(f"{k}: {v}" for k, v in sorted(bot_metrics['gauges'].items())))
+        else:
+            st.warning("Latency metrics not yet available.")
+
+        shadow_models = data.get("shadow_models")
+        if shadow_models:
+            st.subheader("Shadow Models (Virtual Paper PnL)")
+            st.dataframe(pd.DataFrame(shadow_models).set_index('model'), use_container_width=True)
+            st.caption("Every pair is scored in the same inference pass and trades virtually with the live entry and trailing-stop rules. Latency is each pair's share of that pass.")
 
     # --- REFRESH ---
-    time.sleep(5)
\ No newline at end of file
+    version = feed.wait(version, timeout=FALLBACK_REFRESH)
@@ -0,0 +1,153 @@
+# src/dashboard_feed.py
+
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from collections import deque
+
+from config import config
+from metrics import metrics
+
+DASHBOARD_SOCKET = config.get('DASHBOARD', 'SOCKET', fallback='dashboard.sock')
+HISTORY = config.getint('DASHBOARD', 'HISTORY', fallback=2000)
+TICK_INTERVAL = config.getfloat('DASHBOARD', 'TICK_INTERVAL', fallback=0.5)
+SEND_TIMEOUT = 0.2
+
+
+def history_point(message):
+    """One chart row from a published message; a tick only carries the price and the unrealized PnL."""
+    if message['kind'] == 'tick': return {'time': message['ts'], 'price': message['price'], 'unrealized_pnl': message['unrealized_pnl']}
+    data = message['dashboard']; analysis, position = data.get('signal_analysis') or {}, data.get('position_info')
+    return {'time': message['ts'], 'price': analysis.get('Latest Price'), 'pred_long': analysis.get('Pred Long'), 'pred_short': analysis.get('Pred Short'),
+            'long_threshold': analysis.get('Long Threshold'), 'short_threshold': analysis.get('Short Threshold'), 'volatility': analysis.get('Volatility'),
+            'volatility_filter': analysis.get('Volatility Filter'), 'balance': data.get('account_balance'), 'unrealized_pnl': position.get('unrealized_pnl_usd', 0.0) if position else 0.0}
+
+
+class DashboardPublisher:
+    """
+    Pushes dashboard updates from the bot to any number of local subscribers over a Unix socket, as
+    JSON lines. publish() only queues the message; a sender thread writes it to every connected
+    client and drops clients that stop reading, so a slow dashboard never delays a trading cycle.
+    The last HISTORY state updates and price ticks are replayed to each new subscriber, so a
+    dashboard opened late still starts with charts.
+    """
+
+    def __init__(self, path=DASHBOARD_SOCKET, history=HISTORY):
+        self.path, self.history, self.queue = path, {'state': deque(maxlen=history), 'tick': deque(maxlen=history)}, queue.SimpleQueue()
+        self.clients, self.lock, self._stop, self.session, self.seq = [], threading.Lock(), threading.Event(), time.time(), 0
+        if os.path.exists(path): os.unlink(path)  # left over from a previous run
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM); self.server.bind(path); self.server.listen()
+        self._threads = [threading.Thread(target=self._accept, name="dashboard-accept", daemon=True), threading.Thread(target=self._send, name="dashboard-send", daemon=True)]
+
+    def start(self):
+        for t in self._threads: t.start()
+        print(f"📡 Dashboard feed: {self.path}"); return self
+
+    def stop(self):
+        self._stop.set(); self.queue.put(None)
+        try: self.server.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+        self.server.close()
+        for t in self._threads: t.join(5)
+        with self.lock:
+            for client in self.clients: client.close()
+            self.clients.clear()
+        if os.path.exists(self.path): os.unlink(self.path)
+
+    def publish(self, scope, dashboard):
+        """Queues the state of one scope ('' for the single-symbol bot, else the symbol) as committed to the state store."""
+        self.queue.put({'scope': scope, 'ts': time.time(), 'kind': 'state', 'dashboard': dashboard})
+
+    def publish_tick(self, scope, price, unrealized_pnl):
+        """Queues a live price mark between candle closes."""
+        self.queue.put({'scope': scope, 'ts': time.time(), 'kind': 'tick', 'price': price, 'unrealized_pnl': unrealized_pnl})
+
+    def _accept(self):
+        while not self._stop.is_set():
+            try: client, _ = self.server.accept()
+            except OSError: break
+            client.settimeout(SEND_TIMEOUT)
+            with self.lock:
+                replay = b"".join(line for kind in ('state', 'tick') for line in self.history[kind])
+                try: client.sendall(replay)
+                except OSError: client.close(); continue
+                self.clients.append(client); metrics.set('dashboard_subscribers', len(self.clients))
+
+    def _send(self):
+        while True:
+            message = self.queue.get()
+            if message is None: break
+            self.seq += 1; message.update(session=self.session, seq=self.seq)
+            line = (json.dumps(message, sort_keys=True) + "\n").encode()
+            with self.lock:
+                self.history[message['kind']].append(line)
+                for client in list(self.clients):
+                    try: client.sendall(line)
+                    except OSError: client.close(); self.clients.remove(client); metrics.inc('dashboard_dropped_subscribers')
+                metrics.set('dashboard_subscribers', len(self.clients))
+            metrics.inc('dashboard_updates')
+
+
+class DashboardSubscriber:
+    """
+    Receives the bot's dashboard feed on a background thread: the latest state per scope and
+    bounded histories of chart points, one per candle cycle (predictions, volatility, balance,
+    unrealized PnL) and one per price tick (price, unrealized PnL).
+    One subscriber is meant to be shared by every dashboard session in the process; wait() blocks
+    until the next update instead of polling.
+    """
+
+    def __init__(self, path=DASHBOARD_SOCKET, history=HISTORY):
+        self.path, self.history_size = path, history
+        self.latest, self.history, self.last_seen, self.version = {}, {'state': {}, 'tick': {}}, {'state': (0, 0), 'tick': (0, 0)}, 0
+        self.condition, self.connected, self._stop, self._sock = threading.Condition(), threading.Event(), threading.Event(), None
+        self._thread = threading.Thread(target=self._run, name="dashboard-subscriber", daemon=True)
+
+    def start(self):
+        self._thread.start(); return self
+
+    def stop(self):
+        self._stop.set()
+        if self._sock is not None:
+            try: self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+        self._thread.join(5)
+
+    def on_message(self, message):
+        scope, kind, seen = message['scope'], message['kind'], (message['session'], message['seq'])
+        with self.condition:
+            if seen <= self.last_seen[kind]: return  # already seen (replayed after a reconnect)
+            self.last_seen[kind] = seen
+            if kind == 'state': self.latest[scope] = message['dashboard']
+            self.history[kind].setdefault(scope, deque(maxlen=self.history_size)).append(history_point(message))
+            self.version += 1; self.condition.notify_all()
+
+    def wait(self, version, timeout=None):
+        """Blocks until an update newer than `version` arrives (or the timeout passes). Returns the current version."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def snapshot(self, scope):
+        """(latest dashboard state or None, cycle points, tick points) for one scope, oldest first."""
+        with self.condition: return self.latest.get(scope), list(self.history['state'].get(scope, ())), list(self.history['tick'].get(scope, ()))
+
+    def scopes(self):
+        with self.condition: return sorted(self.latest)
+
+    def _run(self):
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.path); self._sock = sock; self.connected.set(); backoff = 0.5
+                    for line in sock.makefile('rb'):
+                        self.on_message(json.loads(line))
+            except OSError:
+                pass  # the bot is not running yet, or restarted
+            finally:
+                self.connected.clear(); self._sock = None
+            self._stop.wait(backoff); backoff = min(backoff * 2, 5)
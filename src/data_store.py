@@ -0,0 +1,263 @@
+# src/data_store.py
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import config
+from binance_public import KLINES_PAGE
+from market_feed import CANDLE_DTYPE, closed_candles, now_ms, timeframe_to_ms
+
+STORE_DIR = config.get('PATHS', 'STORE_DIR', fallback='data/store')
+CANDLE_CACHE_DIR = config.get('PATHS', 'CANDLE_CACHE_DIR', fallback=os.path.join(config.get('PATHS', 'CACHE_DIR', fallback='data/cache'), 'candles'))
+COLUMNS = list(CANDLE_DTYPE.names)
+BACKFILL_DAYS = config.getfloat('FEED', 'BACKFILL_DAYS', fallback=7)
+BACKFILL_WORKERS = config.getint('FEED', 'BACKFILL_WORKERS', fallback=4)
+
+
+def symbol_key(symbol):
+    return symbol.replace('/', '_').upper()
+
+
+def month_keys(timestamps):
+    """'YYYY-MM' partition key for each ms timestamp."""
+    return np.asarray(timestamps, dtype='i8').astype('datetime64[ms]').astype('datetime64[M]').astype(str)
+
+
+def epoch_ms(ts):
+    """A CSV timestamp column (epoch ms or date strings) as int64 epoch ms."""
+    import pandas as pd
+    return ts.values.astype('i8') if np.issubdtype(ts.dtype, np.number) else ((pd.to_datetime(ts) - pd.Timestamp(0)) // pd.Timedelta('1ms')).values
+
+
+def csv_time_range(csv_path):
+    """First and last timestamp (ms) of a history CSV, read from its first and last lines only."""
+    import io
+    import pandas as pd
+    with open(csv_path, 'rb') as f:
+        header, first = f.readline(), f.readline()
+        f.seek(max(0, os.path.getsize(csv_path) - 4096)); last = f.read().rstrip(b'\r\n').rsplit(b'\n', 1)[-1]
+    ts = epoch_ms(pd.read_csv(io.BytesIO(header + first + last + b'\n'))['timestamp'])
+    return int(ts[0]), int(ts[-1])
+
+
+def aggregate_candles(rows, base_ms, period_ms, include_partial_last=False):
+    """
+    Vectorized resample of base candles (CANDLE_DTYPE rows, sorted) into period buckets aligned
+    to multiples of the period, matching pandas resample + dropna. The last bucket is dropped
+    unless it is complete or include_partial_last is set.
+    """
+    if len(rows) == 0: return np.zeros(0, dtype=CANDLE_DTYPE)
+    buckets = rows['timestamp'] - rows['timestamp'] % period_ms
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.concatenate((starts[1:], [len(rows)])) - 1
+    out = np.zeros(len(starts), dtype=CANDLE_DTYPE)
+    out['timestamp'], out['open'], out['close'] = buckets[starts], rows['open'][starts], rows['close'][ends]
+    out['high'], out['low'] = np.maximum.reduceat(rows['high'], starts), np.minimum.reduceat(rows['low'], starts)
+    for col in ('volume', 'number_of_trades', 'taker_buy_base_asset_volume'): out[col] = np.add.reduceat(rows[col], starts)
+    if not include_partial_last and rows['timestamp'][-1] + base_ms != out['timestamp'][-1] + period_ms: out = out[:-1]
+    return out
+
+
+class Partition:
+    """One month of candles stored as one raw binary file per column, read through np.memmap."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _file(self, col): return os.path.join(self.path, f"{col}.bin")
+
+    def __len__(self):
+        sizes = [os.path.getsize(self._file(c)) // CANDLE_DTYPE[c].itemsize if os.path.exists(self._file(c)) else 0 for c in COLUMNS]
+        return min(sizes)
+
+    def column(self, col, length=None):
+        length = len(self) if length is None else length
+        if length == 0: return np.zeros(0, dtype=CANDLE_DTYPE[col])
+        return np.memmap(self._file(col), dtype=CANDLE_DTYPE[col], mode='r', shape=(length,))
+
+    def append(self, rows):
+        os.makedirs(self.path, exist_ok=True)
+        length = len(self)
+        # Columns are appended independently; the timestamp goes last, and readers only trust
+        # the shortest column, so a crash mid-append never exposes a half-written row.
+        for col in [c for c in COLUMNS if c != 'timestamp'] + ['timestamp']:
+            with open(self._file(col), 'r+b' if os.path.exists(self._file(col)) else 'wb') as f:
+                f.truncate(length * CANDLE_DTYPE[col].itemsize); f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(rows[col], dtype=CANDLE_DTYPE[col]).tobytes())
+
+
+class MarketDataStore:
+    """
+    Append-only, month-partitioned columnar candle store for one symbol and timeframe.
+    Reads are memory-mapped: a range inside one month is a zero-copy view, and ranges
+    spanning months are stitched with a single concatenation per column.
+    """
+
+    def __init__(self, symbol, timeframe='1m', root=STORE_DIR):
+        self.symbol, self.timeframe, self.root = symbol, timeframe, root
+        self.path = os.path.join(root, symbol_key(symbol), timeframe)
+
+    def exists(self):
+        return bool(self.partition_keys())
+
+    def partition_keys(self):
+        return sorted(os.listdir(self.path)) if os.path.isdir(self.path) else []
+
+    def _partition(self, key): return Partition(os.path.join(self.path, key))
+
+    def __len__(self):
+        return sum(len(self._partition(k)) for k in self.partition_keys())
+
+    @property
+    def first_timestamp(self):
+        keys = self.partition_keys()
+        return int(self._partition(keys[0]).column('timestamp')[0]) if keys else None
+
+    @property
+    def last_timestamp(self):
+        for key in reversed(self.partition_keys()):
+            ts = self._partition(key).column('timestamp')
+            if len(ts): return int(ts[-1])
+        return None
+
+    def append(self, rows):
+        """Appends candles newer than the last stored one. Returns how many were written."""
+        rows = np.asarray(rows, dtype=CANDLE_DTYPE)
+        last = self.last_timestamp
+        if last is not None: rows = rows[rows['timestamp'] > last]
+        if len(rows) == 0: return 0
+        keys = month_keys(rows['timestamp'])
+        for key in np.unique(keys): self._partition(str(key)).append(rows[keys == key])
+        return len(rows)
+
+    def read(self, start=None, end=None, columns=None):
+        """
+        Columns for candles with start <= timestamp < end (ms, either bound optional), as a dict of arrays.
+        """
+        columns = columns or COLUMNS
+        start_key = str(month_keys([start])[0]) if start is not None else None
+        end_key = str(month_keys([end - 1])[0]) if end is not None else None
+        parts = {c: [] for c in columns}
+        for key in self.partition_keys():
+            if (start_key and key < start_key) or (end_key and key > end_key): continue
+            part = self._partition(key); length = len(part)
+            ts = part.column('timestamp', length)
+            lo = int(np.searchsorted(ts, start)) if start is not None else 0
+            hi = int(np.searchsorted(ts, end)) if end is not None else length
+            if hi > lo:
+                for c in columns: parts[c].append(part.column(c, length)[lo:hi])
+        return {c: (v[0] if len(v) == 1 else np.concatenate(v) if v else np.zeros(0, dtype=CANDLE_DTYPE[c])) for c, v in parts.items()}
+
+    def read_rows(self, start=None, end=None):
+        """Like read(), but packed into a CANDLE_DTYPE record array (one copy)."""
+        cols = self.read(start, end); rows = np.zeros(len(cols['timestamp']), dtype=CANDLE_DTYPE)
+        for c in COLUMNS: rows[c] = cols[c]
+        return rows
+
+    def tail(self, n):
+        """The newest n candles as CANDLE_DTYPE rows."""
+        keys, chunks, needed = self.partition_keys(), [], n
+        for key in reversed(keys):
+            if needed <= 0: break
+            part = self._partition(key); length = len(part)
+            take = min(needed, length); needed -= take
+            chunk = np.zeros(take, dtype=CANDLE_DTYPE)
+            for c in COLUMNS: chunk[c] = part.column(c, length)[length - take:]
+            chunks.append(chunk)
+        return np.concatenate(chunks[::-1]) if chunks else np.zeros(0, dtype=CANDLE_DTYPE)
+
+    def to_frame(self, start=None, end=None):
+        import pandas as pd
+        cols = self.read(start, end)
+        return pd.DataFrame({c: cols[c] for c in COLUMNS if c != 'timestamp'}, index=pd.to_datetime(cols['timestamp'], unit='ms'))
+
+
+class CandleStore:
+    """
+    A base-timeframe MarketDataStore plus its pre-aggregated strategy-timeframe view,
+    which is extended on every append so readers never resample.
+    """
+
+    def __init__(self, symbol, base_timeframe=config['TRADING']['BASE_TIMEFRAME'], strategy_timeframe=config['TRADING']['STRATEGY_TIMEFRAME'], root=STORE_DIR):
+        self.base = MarketDataStore(symbol, base_timeframe, root)
+        self.view = MarketDataStore(symbol, strategy_timeframe, root)
+        self.base_ms, self.period_ms = timeframe_to_ms(base_timeframe), timeframe_to_ms(strategy_timeframe)
+
+    def exists(self):
+        return self.base.exists()
+
+    def covers(self, first, last):
+        """Whether the stored base candles span first..last (ms), e.g. the whole history CSV they were imported from."""
+        start = self.base.first_timestamp
+        return start is not None and start <= first and self.base.last_timestamp >= last
+
+    def append(self, rows):
+        written = self.base.append(rows)
+        if written: self.refresh_view()
+        return written
+
+    def refresh_view(self):
+        """Aggregates base candles after the last closed view bucket into new closed buckets."""
+        last = self.view.last_timestamp
+        base = self.base.read_rows(start=last + self.period_ms if last is not None else None)
+        return self.view.append(aggregate_candles(base, self.base_ms, self.period_ms))
+
+    def missing_pages(self, now=None, window=500, page_limit=KLINES_PAGE, max_gap_days=BACKFILL_DAYS):
+        """
+        (since, limit) REST pages covering every closed base candle after the last stored one, or
+        the latest `window` candles for an empty store. Gaps longer than max_gap_days are cut to
+        their most recent part.
+        """
+        now = int(now or now_ms()); end = now - now % self.base_ms  # open time of the still-forming candle
+        last = self.base.last_timestamp
+        start = end - window * self.base_ms if last is None else last + self.base_ms
+        oldest = end - max(int(max_gap_days * 86_400_000), window * self.base_ms)
+        if start < oldest:
+            print(f"⚠️ {self.base.path} is {(end - start) / 86_400_000:.1f} days behind; backfilling only the last {(end - oldest) / 86_400_000:.1f} days.")
+            start = oldest - oldest % self.base_ms
+        return [(since, min(page_limit, (end - since) // self.base_ms)) for since in range(start, end, page_limit * self.base_ms)]
+
+    def add_pages(self, pages, now=None):
+        """Stores fetched pages of ccxt-style rows (in any order, overlaps allowed). Returns how many candles were new."""
+        rows = np.array([c for page in pages for c in closed_candles(page, self.base_ms, now)], dtype=CANDLE_DTYPE)
+        if len(rows) == 0: return 0
+        rows = np.sort(rows, order='timestamp'); rows = rows[np.concatenate(([True], rows['timestamp'][1:] != rows['timestamp'][:-1]))]
+        return self.append(rows)
+
+    def backfill(self, fetch_page, now=None, window=500, workers=BACKFILL_WORKERS):
+        """Fetches the missing pages concurrently with fetch_page(since, limit) and stores them. Returns how many candles were new."""
+        pages = self.missing_pages(now, window)
+        if not pages: return 0
+        with ThreadPoolExecutor(max_workers=min(workers, len(pages))) as pool: fetched = list(pool.map(lambda page: fetch_page(*page), pages))
+        return self.add_pages(fetched, now)
+
+    def import_csv(self, csv_path, chunksize=1_000_000):
+        """Converts a 1m history CSV (timestamp + OHLCV columns) into the store, chunk by chunk."""
+        import pandas as pd
+        total = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            rows = np.zeros(len(chunk), dtype=CANDLE_DTYPE); rows['timestamp'] = epoch_ms(chunk['timestamp'])
+            for c in COLUMNS[1:]: rows[c] = chunk[c].values if c in chunk else 0
+            total += self.base.append(np.sort(rows, order='timestamp')); self.refresh_view()
+            print(f"   {total:,} candles imported...")
+        return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or inspect the columnar market data store.")
+    parser.add_argument('command', choices=['import', 'info'])
+    parser.add_argument('--csv', default=config['PATHS']['DATA_FILE'])
+    parser.add_argument('--symbol', default=config['TRADING']['SYMBOL'])
+    args = parser.parse_args()
+    store = CandleStore(args.symbol)
+    if args.command == 'import':
+        start = time.perf_counter(); print(f"📂 Importing {args.csv} into {store.base.path}...")
+        total = store.import_csv(args.csv)
+        print(f"✅ Imported {total:,} candles ({len(store.view):,} pre-aggregated) in {time.perf_counter() - start:.1f}s.")
+    else:
+        for s in (store.base, store.view):
+            print(f"{s.path}: {len(s):,} candles in {len(s.partition_keys())} partitions, last candle at {np.datetime64(s.last_timestamp, 'ms') if s.last_timestamp else 'n/a'}")
@@ -0,0 +1,229 @@
+# src/execution.py
+
+import asyncio
+import csv
+import itertools
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from config import config
+from metrics import metrics
+
+RETRIES = config.getint('EXECUTION', 'RETRIES', fallback=3)
+RETRY_DELAY = config.getfloat('EXECUTION', 'RETRY_DELAY', fallback=0.25)
+ORDER_TIMEOUT = config.getfloat('EXECUTION', 'ORDER_TIMEOUT', fallback=10.0)
+FILL_LOG = config.get('EXECUTION', 'FILL_LOG', fallback='reports/fills.csv')
+MOCK_LATENCY = config.getfloat('EXECUTION', 'MOCK_LATENCY', fallback=0.02)
+MOCK_FEE_RATE = config.getfloat('EXECUTION', 'MOCK_FEE_RATE', fallback=0.001)
+MOCK_SLIPPAGE_BPS = config.getfloat('EXECUTION', 'MOCK_SLIPPAGE_BPS', fallback=1.0)
+FILL_FIELDS = ['time', 'symbol', 'side', 'client_order_id', 'order_id', 'amount', 'price', 'expected_price', 'slippage_bps', 'fee', 'latency_ms', 'attempts']
+TICK_SIZE = 4  # ccxt's precisionMode for step-size precision (what ccxt uses for Binance)
+RETRYABLE_ERRORS = {'NetworkError', 'RequestTimeout', 'ExchangeNotAvailable', 'DDoSProtection', 'RateLimitExceeded', 'TimeoutError', 'ConnectionError'}
+FINAL_STATUSES = {'closed', 'canceled', 'expired', 'rejected'}
+
+
+def retryable(error):
+    """Transport-level failures (by ccxt's exception names, so ccxt need not be imported) are worth resending; rejections are not."""
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+def client_order_id(prefix='champ'):
+    """A Binance-compatible newClientOrderId (at most 36 of [A-Za-z0-9_-])."""
+    return f"{prefix}-{uuid.uuid4().hex[:24]}"
+
+
+@dataclass(frozen=True)
+class MarketRules:
+    """The lot-size and notional limits of one symbol, as loaded once at start-up."""
+    amount_step: float = 0.0
+    min_amount: float = 0.0
+    min_notional: float = 0.0
+
+    @classmethod
+    def from_market(cls, market, tick_size=True):
+        precision, limits = market.get('precision') or {}, market.get('limits') or {}
+        step = precision.get('amount') or 0
+        if step and not tick_size: step = 10.0 ** -step  # decimal-places precision mode
+        return cls(float(step), float((limits.get('amount') or {}).get('min') or 0), float((limits.get('cost') or {}).get('min') or 0))
+
+    def round_amount(self, amount, price):
+        """Floors the amount to the lot step. Returns 0 if it is then below the minimum quantity or notional."""
+        if self.amount_step: amount = round(math.floor(amount / self.amount_step + 1e-9) * self.amount_step, 12)
+        return amount if amount > 0 and amount >= self.min_amount and amount * price >= self.min_notional else 0.0
+
+
+def fill_fee(order, symbol, price, side):
+    """(fee in quote currency, fee taken from the bought base amount) from a ccxt order's fee/fees."""
+    base, quote = symbol.split('/')
+    fees, total, from_base = order.get('fees') or ([order['fee']] if order.get('fee') else []), 0.0, 0.0
+    for fee in fees:
+        if not fee or fee.get('cost') is None: continue
+        if fee.get('currency') == quote: total += float(fee['cost'])
+        elif fee.get('currency') == base:
+            total += float(fee['cost']) * price
+            if side == 'buy': from_base += float(fee['cost'])
+        else: metrics.inc('order_fees_unpriced')  # e.g. BNB-paid fees
+    return total, from_base
+
+
+class ExecutionManager:
+    """
+    Sends the bot's market orders. Market rules are loaded once at start-up (`markets`, or one
+    load_markets call), so amounts are rounded locally and the exchange client never pays a lazy
+    market load on the first order. submit() returns a Future and places the order on a worker
+    thread. Every order carries its own client order ID. A failed attempt is looked up by that
+    ID before it is resent, so an order whose reply was lost is never doubled. The fill (average
+    price, filled amount net of base-currency fees, fee in quote currency, submit-to-fill latency)
+    is the Future's result, appended to FILL_LOG and timed as the 'order' stage. `exchange`
+    is a ccxt-style client; with `loop` set, its methods are coroutines run on that event loop.
+    """
+
+    def __init__(self, exchange, symbols, loop=None, markets=None, retries=RETRIES, retry_delay=RETRY_DELAY, timeout=ORDER_TIMEOUT, fill_log=FILL_LOG, workers=4):
+        self.exchange, self.loop, self.retries, self.retry_delay, self.timeout, self.fill_log = exchange, loop, retries, retry_delay, timeout, fill_log
+        start = time.perf_counter()
+        markets = markets if markets is not None else self._call('load_markets')
+        tick_size = getattr(exchange, 'precisionMode', TICK_SIZE) == TICK_SIZE
+        self.rules = {symbol: MarketRules.from_market(markets[symbol], tick_size) for symbol in symbols}
+        self.pool, self.log_lock, self.fills = ThreadPoolExecutor(workers, thread_name_prefix='orders'), threading.Lock(), deque(maxlen=1000)
+        print(f"✅ Market rules for {len(self.rules)} symbols cached in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+    def _call(self, method, *args):
+        result = getattr(self.exchange, method)(*args)
+        return asyncio.run_coroutine_threadsafe(result, self.loop).result(self.timeout) if self.loop else result
+
+    def round_amount(self, symbol, amount, price):
+        return self.rules[symbol].round_amount(amount, price)
+
+    def submit(self, symbol, side, amount, price):
+        """Rounds and queues a market order; `price` is the price the decision was made at. The Future resolves to the fill, or None."""
+        rounded = self.round_amount(symbol, amount, price)
+        if not rounded:
+            print(f"⚠️ {side.upper()} {amount:.8f} {symbol} is below the exchange minimums ({self.rules[symbol]}). Not sent."); metrics.inc('order_rejections')
+            future = Future(); future.set_result(None); return future
+        return self.pool.submit(self._place, symbol, side, rounded, price, client_order_id(), time.perf_counter())
+
+    def execute(self, symbol, side, amount, price):
+        """Blocking form of submit() for strategy.step's execute callback: returns the fill record, or None."""
+        return self.submit(symbol, side, amount, price).result()
+
+    def _lookup(self, symbol, client_id):
+        try: return self._call('fetch_order', None, symbol, {'origClientOrderId': client_id})
+        except Exception: return None
+
+    def _place(self, symbol, side, amount, price, client_id, submitted):
+        order, attempts = None, 0
+        print(f"\n🚨 [ORDER] {side.upper()} {amount} {symbol} ({client_id})...")
+        while order is None:
+            attempts += 1
+            try: order = self._call('create_order', symbol, 'market', side, amount, None, {'newClientOrderId': client_id})
+            except Exception as e:
+                order = self._lookup(symbol, client_id)  # it may have been accepted even though the reply was lost
+                if order is None and (attempts > self.retries or not retryable(e)):
+                    print(f"❌ TRADE FAILED after {attempts} attempt(s): {e}"); metrics.inc('order_failures'); return None
+                if order is None: metrics.inc('order_retries'); time.sleep(self.retry_delay * attempts)
+        deadline = submitted + self.timeout
+        while order.get('status') not in FINAL_STATUSES and time.perf_counter() < deadline:
+            time.sleep(0.05); order = self._lookup(symbol, client_id) or order
+        filled = float(order.get('filled') or 0)
+        if not filled:
+            print(f"❌ TRADE FAILED: {client_id} is {order.get('status')} with nothing filled."); metrics.inc('order_failures'); return None
+        latency_s, avg = time.perf_counter() - submitted, float(order.get('average') or order.get('price') or price)
+        fee, fee_from_base = fill_fee(order, symbol, avg, side)
+        fill = {'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'), 'symbol': symbol, 'side': side, 'client_order_id': client_id, 'order_id': order.get('id'),
+                'amount': round(filled - fee_from_base, 12), 'price': avg, 'expected_price': price, 'slippage_bps': (avg / price - 1) * 1e4 * (1 if side == 'buy' else -1),
+                'fee': fee, 'latency_ms': round(latency_s * 1000, 2), 'attempts': attempts}
+        metrics.observe('order', latency_s); self.fills.append(fill); self.log(fill)
+        print(f"✅ FILLED {side.upper()} {filled} {symbol} @ {avg:.2f} | fee ${fee:.4f} | slippage {fill['slippage_bps']:+.1f} bps | {fill['latency_ms']:.0f} ms")
+        return fill
+
+    def log(self, fill):
+        if not self.fill_log: return
+        with self.log_lock:
+            if os.path.dirname(self.fill_log): os.makedirs(os.path.dirname(self.fill_log), exist_ok=True)
+            new_file = not os.path.isfile(self.fill_log)
+            with open(self.fill_log, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=FILL_FIELDS)
+                if new_file: writer.writeheader()
+                writer.writerow(fill)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+class NetworkError(Exception): pass
+class InvalidOrder(Exception): pass
+class DuplicateOrderId(InvalidOrder): pass
+class OrderNotFound(Exception): pass
+
+
+class MockExchange:
+    """
+    In-process stand-in for the ccxt Binance client's order endpoints (load_markets, create_order,
+    fetch_order, fetch_free_balance), with the same call signatures and exception names. It has
+    no market of its own: mark() sets the price the next orders fill around, with a fixed
+    slippage and a taker fee in the quote currency. It enforces the lot step, minimum notional
+    and unique client order IDs, and it can inject failures: `failure_rate` rejects the request
+    before it is booked, `lost_reply_rate` books the order but raises as if the reply timed out.
+    `latency` (seconds per request) can be set to 0 for accelerated soak tests.
+    """
+    precisionMode = TICK_SIZE
+
+    def __init__(self, markets=None, balances=None, latency=MOCK_LATENCY, fee_rate=MOCK_FEE_RATE, slippage_bps=MOCK_SLIPPAGE_BPS, failure_rate=0.0, lost_reply_rate=0.0, seed=None):
+        self.markets = markets or {symbol: {'symbol': symbol, 'precision': {'amount': step, 'price': 0.01}, 'limits': {'amount': {'min': step}, 'cost': {'min': 5.0}}}
+                                   for symbol, step in (('BTC/USDT', 1e-05), ('ETH/USDT', 1e-04))}
+        self.balances, self.prices, self.orders, self.by_client_id = dict(balances or {'USDT': 10_000.0}), {}, {}, {}
+        self.latency, self.fee_rate, self.slippage, self.failure_rate, self.lost_reply_rate = latency, fee_rate, slippage_bps / 1e4, failure_rate, lost_reply_rate
+        self.random, self.lock, self.ids, self.calls = random.Random(seed), threading.Lock(), itertools.count(1), {}
+
+    def _request(self, name):
+        with self.lock: self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency: time.sleep(self.latency)
+
+    def mark(self, symbol, price):
+        self.prices[symbol] = float(price)
+
+    def load_markets(self, reload=False):
+        self._request('load_markets'); return self.markets
+
+    def fetch_free_balance(self):
+        self._request('fetch_free_balance'); return dict(self.balances)
+
+    def create_market_order(self, symbol, side, amount, price=None, params=None):
+        return self.create_order(symbol, 'market', side, amount, price, params)
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self._request('create_order')
+        if self.random.random() < self.failure_rate: raise NetworkError("mock: request timed out before it reached the exchange")
+        market, client_id = self.markets[symbol], (params or {}).get('newClientOrderId') or f"mock-{uuid.uuid4().hex[:16]}"
+        step, limits = market['precision']['amount'], market['limits']
+        if type != 'market': raise InvalidOrder(f"mock: only market orders are supported, not {type}")
+        if abs(amount / step - round(amount / step)) > 1e-6: raise InvalidOrder(f"mock: amount {amount} is not a multiple of the lot step {step}")
+        fill_price = self.prices[symbol] * (1 + self.slippage if side == 'buy' else 1 - self.slippage)
+        if amount < limits['amount']['min'] or amount * fill_price < limits['cost']['min']: raise InvalidOrder(f"mock: {amount} {symbol} is below the minimum notional")
+        base, quote = symbol.split('/')
+        with self.lock:
+            if client_id in self.by_client_id: raise DuplicateOrderId(f"mock: duplicate client order ID {client_id}")
+            cost = amount * fill_price; fee = cost * self.fee_rate
+            self.balances[base] = self.balances.get(base, 0.0) + (amount if side == 'buy' else -amount)
+            self.balances[quote] = self.balances.get(quote, 0.0) + (-cost if side == 'buy' else cost) - fee
+            order = {'id': str(next(self.ids)), 'clientOrderId': client_id, 'timestamp': int(time.time() * 1000), 'symbol': symbol, 'type': type, 'side': side,
+                     'amount': amount, 'filled': amount, 'remaining': 0.0, 'price': fill_price, 'average': fill_price, 'cost': cost, 'status': 'closed',
+                     'fee': {'cost': fee, 'currency': quote}, 'fees': [{'cost': fee, 'currency': quote}]}
+            self.orders[order['id']] = self.by_client_id[client_id] = order
+        if self.random.random() < self.lost_reply_rate: raise NetworkError("mock: order booked but the reply was lost")
+        return dict(order)
+
+    def fetch_order(self, id, symbol=None, params=None):
+        self._request('fetch_order')
+        client_id = (params or {}).get('origClientOrderId')
+        order = self.by_client_id.get(client_id) if client_id else self.orders.get(id)
+        if order is None: raise OrderNotFound(f"mock: order {client_id or id} does not exist")
+        return dict(order)
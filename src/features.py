@@ -0,0 +1,219 @@
+# src/features.py
+
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+# Order matters: this is the column order the champion models were trained on.
+FEATURE_COLUMNS = [
+    'taker_buy_base_asset_volume', 'returns', 'returns_lag_1', 'returns_lag_2', 'returns_lag_3', 'returns_lag_5', 'returns_lag_10',
+    'momentum_5', 'momentum_10', 'volatility_10', 'volatility_filter', 'body_pct', 'upper_wick_pct', 'lower_wick_pct', 'taker_buy_ratio',
+]
+RETURN_LAGS = [1, 2, 3, 5, 10]
+ATR_WINDOW = 14
+VOLATILITY_FILTER_WINDOW = 50
+MIN_RANGE = 0.00001
+CANDLE_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'taker_buy_base_asset_volume']
+
+
+def compute_features(df_3m):
+    """
+    Batch feature engineering on a resampled OHLCV frame (unscaled).
+    Mirrors the original prepare_live_data steps and adds the `atr` column.
+    """
+    df_3m['returns'] = np.log(df_3m['close'] / df_3m['close'].shift(1))
+    for lag in RETURN_LAGS: df_3m[f'returns_lag_{lag}'] = df_3m['returns'].shift(lag)
+    df_3m['momentum_5'] = df_3m['returns'].rolling(window=5).mean(); df_3m['momentum_10'] = df_3m['returns'].rolling(window=10).mean()
+    df_3m['volatility_10'] = df_3m['returns'].rolling(window=10).std(); df_3m['volatility_filter'] = df_3m['volatility_10'].rolling(VOLATILITY_FILTER_WINDOW).mean()
+    candle_range = (df_3m['high'] - df_3m['low']).replace(0, MIN_RANGE); df_3m['body_pct'] = (abs(df_3m['close'] - df_3m['open']) / candle_range).fillna(0)
+    df_3m['upper_wick_pct'] = ((df_3m['high'] - np.maximum(df_3m['open'], df_3m['close'])) / candle_range).fillna(0)
+    df_3m['lower_wick_pct'] = ((np.minimum(df_3m['open'], df_3m['close']) - df_3m['low']) / candle_range).fillna(0)
+    df_3m['taker_buy_ratio'] = (df_3m['taker_buy_base_asset_volume'] / df_3m['volume']).fillna(0.5)
+    df_3m.replace([np.inf, -np.inf], np.nan, inplace=True); df_3m.dropna(inplace=True)
+    df_3m['atr'] = wilder_atr(df_3m['high'].values, df_3m['low'].values, df_3m['close'].values, ATR_WINDOW)
+    return df_3m
+
+
+def wilder_atr(high, low, close, window=ATR_WINDOW):
+    """
+    Wilder-smoothed ATR over NumPy arrays. Matches ta's AverageTrueRange:
+    zeros during warm-up, a simple mean at index window-1, then Wilder's recursion.
+    """
+    n = len(close); atr = np.zeros(n)
+    if n < window: return atr
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    atr[window - 1] = tr[:window].mean()
+    for i in range(window, n): atr[i] = (atr[i - 1] * (window - 1) + tr[i]) / float(window)
+    return atr
+
+
+class FrozenScaler:
+    """
+    Min-max scaling with parameters fixed at training time, so live features are
+    scaled the same way on every candle instead of refitting on the recent window.
+    Uses the same arithmetic as sklearn's MinMaxScaler (X * scale_ + min_).
+    """
+
+    def __init__(self, data_min, data_max, features=FEATURE_COLUMNS):
+        self.features = list(features)
+        self.data_min, self.data_max = np.asarray(data_min, dtype=float), np.asarray(data_max, dtype=float)
+        data_range = self.data_max - self.data_min
+        data_range[data_range < 10 * np.finfo(data_range.dtype).eps] = 1.0
+        self.scale_ = 1.0 / data_range
+        self.min_ = -self.data_min * self.scale_
+
+    @classmethod
+    def fit(cls, matrix, features=FEATURE_COLUMNS):
+        matrix = np.asarray(matrix, dtype=float)
+        return cls(np.nanmin(matrix, axis=0), np.nanmax(matrix, axis=0), features)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'r') as f: params = json.load(f)
+        return cls(params['data_min'], params['data_max'], params.get('features', FEATURE_COLUMNS))
+
+    def save(self, file_path):
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        with open(file_path, 'w') as f:
+            json.dump({'features': self.features, 'data_min': self.data_min.tolist(), 'data_max': self.data_max.tolist()}, f, indent=4)
+
+    def transform(self, values):
+        return np.asarray(values, dtype=float) * self.scale_ + self.min_
+
+
+class RollingWindow:
+    """Fixed-size sliding window keeping a running mean and sum of squared deviations (Welford)."""
+
+    def __init__(self, size):
+        self.size, self.values = size, deque(maxlen=size)
+        self.mean, self.m2 = 0.0, 0.0
+
+    def __len__(self): return len(self.values)
+
+    def _pushed(self, x):
+        """Returns (mean, m2) after pushing x, without mutating the window."""
+        n = len(self.values)
+        if n < self.size:
+            delta = x - self.mean; mean = self.mean + delta / (n + 1)
+            return mean, self.m2 + delta * (x - mean)
+        old = self.values[0]; mean = self.mean + (x - old) / n
+        return mean, max(self.m2 + (x - old) * (x - mean + old - self.mean), 0.0)
+
+    def push(self, x):
+        self.mean, self.m2 = self._pushed(x); self.values.append(x)
+
+    def peek(self, x):
+        """(mean, sample std) of the window as if x had been pushed."""
+        mean, m2 = self._pushed(x); n = min(len(self.values) + 1, self.size)
+        return mean, (math.sqrt(m2 / (n - 1)) if n > 1 else float('nan'))
+
+
+class IncrementalFeatureEngine:
+    """
+    Stateful per-symbol feature engine. Each closed candle updates the rolling state
+    in constant time; the output matches compute_features on the same history.
+    """
+
+    def __init__(self, scaler=None):
+        self.scaler = scaler
+        self.prev_close, self.last_timestamp, self.last_row = None, None, None
+        self.returns = deque(maxlen=max(RETURN_LAGS) + 1)
+        self.momentum_5, self.momentum_10 = RollingWindow(5), RollingWindow(10)  # momentum_10 also yields volatility_10
+        self.volatility_filter = RollingWindow(VOLATILITY_FILTER_WINDOW)
+        # ATR starts on the first fully-featured candle, exactly like the batch path after dropna.
+        self.atr_prev_close, self.atr, self.atr_count, self.tr_sum = None, 0.0, 0, 0.0
+
+    def update_frame(self, df_3m):
+        """Feeds closed candles from a resampled frame (oldest first), returning the last row."""
+        row = None
+        for ts, *candle in zip(df_3m.index, *(df_3m[c].values for c in CANDLE_FIELDS)): row = self.update(ts, *candle)
+        return row
+
+    def update_records(self, records):
+        """Feeds closed candles from a structured array with a `timestamp` field plus CANDLE_FIELDS."""
+        row = None
+        for ts, *candle in zip(records['timestamp'].tolist(), *(records[c].tolist() for c in CANDLE_FIELDS)): row = self.update(ts, *candle)
+        return row
+
+    def update(self, timestamp, open_, high, low, close, volume, taker_buy_volume):
+        """Commits a closed candle. Returns its feature row, or None while warming up."""
+        return self._step(timestamp, open_, high, low, close, volume, taker_buy_volume, commit=True)
+
+    def peek(self, timestamp, open_, high, low, close, volume, taker_buy_volume):
+        """Feature row for a candle (e.g. still forming) without changing the engine state."""
+        return self._step(timestamp, open_, high, low, close, volume, taker_buy_volume, commit=False)
+
+    def _step(self, timestamp, open_, high, low, close, volume, taker_buy_volume, commit):
+        open_, high, low, close = float(open_), float(high), float(low), float(close)
+        ret = math.log(close / self.prev_close) if self.prev_close else float('nan')
+        has_return = not math.isnan(ret)
+        momentum_5 = momentum_10 = volatility_10 = volatility_filter = float('nan')
+        if has_return:
+            momentum_5 = self.momentum_5.peek(ret)[0]; momentum_10, volatility_10 = self.momentum_10.peek(ret)
+            if len(self.momentum_5) + 1 < 5: momentum_5 = float('nan')
+            if len(self.momentum_10) + 1 < 10: momentum_10 = volatility_10 = float('nan')
+            if not math.isnan(volatility_10):
+                volatility_filter = self.volatility_filter.peek(volatility_10)[0]
+                if len(self.volatility_filter) + 1 < VOLATILITY_FILTER_WINDOW: volatility_filter = float('nan')
+        lags = [self.returns[-lag] if len(self.returns) >= lag else float('nan') for lag in RETURN_LAGS]
+
+        row = None
+        values = [float(taker_buy_volume), ret, *lags, momentum_5, momentum_10, volatility_10, volatility_filter]
+        if not any(math.isnan(v) for v in values):
+            candle_range = (high - low) or MIN_RANGE
+            volume = float(volume)
+            taker_buy_ratio = float(taker_buy_volume) / volume if volume else 0.5
+            values += [abs(close - open_) / candle_range, (high - max(open_, close)) / candle_range, (min(open_, close) - low) / candle_range, taker_buy_ratio]
+            atr, atr_count, tr_sum = self._atr_step(high, low, close)
+            row = dict(zip(FEATURE_COLUMNS, values))
+            row.update({'timestamp': timestamp, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume, 'atr': atr})
+            row['raw'] = np.array(values)
+            row['vector'] = self.scaler.transform(row['raw']) if self.scaler is not None else row['raw']
+            # Scaled values replace the raw ones, as in the batch path where the scaler runs in place.
+            row.update(zip(FEATURE_COLUMNS, row['vector'].tolist()))
+            if commit: self.atr_prev_close, self.atr, self.atr_count, self.tr_sum = close, atr, atr_count, tr_sum
+
+        if commit:
+            if has_return:
+                self.momentum_5.push(ret); self.momentum_10.push(ret); self.returns.append(ret)
+                if not math.isnan(volatility_10): self.volatility_filter.push(volatility_10)
+            self.prev_close, self.last_timestamp, self.last_row = close, timestamp, row
+        return row
+
+    def _atr_step(self, high, low, close):
+        tr = high - low
+        if self.atr_prev_close is not None: tr = max(tr, abs(high - self.atr_prev_close), abs(low - self.atr_prev_close))
+        count, tr_sum = self.atr_count + 1, self.tr_sum
+        if count < ATR_WINDOW: return 0.0, count, tr_sum + tr
+        if count == ATR_WINDOW: return (tr_sum + tr) / ATR_WINDOW, count, tr_sum + tr
+        return (self.atr * (ATR_WINDOW - 1) + tr) / float(ATR_WINDOW), count, tr_sum
+
+
+def fit_scaler(records):
+    """FrozenScaler fitted on the unscaled feature rows of closed candles (same rows compute_features keeps)."""
+    engine, vectors = IncrementalFeatureEngine(), []
+    for ts, *candle in zip(records['timestamp'].tolist(), *(records[c].tolist() for c in CANDLE_FIELDS)):
+        row = engine.update(ts, *candle)
+        if row is not None: vectors.append(row['raw'])
+    return FrozenScaler.fit(vectors)
+
+
+def sync_feature_engine(engine, scaler, feed):
+    """
+    Feeds newly closed strategy candles from a MarketFeed into the incremental engine and returns
+    (engine, scaler, forming bucket). The engine is (re)built on the first call or after a gap.
+    """
+    closed, forming = feed.snapshot(engine.last_timestamp if engine else None)
+    if engine is not None and engine.last_timestamp is not None and len(closed) and closed['timestamp'][0] - engine.last_timestamp > feed.period_ms: engine = None
+    if engine is None:
+        closed = feed.snapshot(None)[0]
+        if scaler is None:
+            print("   ⚠️ No frozen scaler found next to the models. Fitting one on the warm-up window and freezing it.")
+            scaler = fit_scaler(closed)
+        engine = IncrementalFeatureEngine(scaler)
+    engine.update_records(closed)
+    return engine, scaler, forming
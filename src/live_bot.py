@@ -1,200 +1,241 @@
 # src/live_bot.py
 
-import ccxt
-import pandas as pd
-import numpy as np
-import xgboost as xgb
-from ta.volatility import AverageTrueRange
-from sklearn.preprocessing import MinMaxScaler
-import time, json, os, traceback, configparser
+import time
+STARTED = time.perf_counter()  # before the imports, so the reported start-up time includes them
+
+import os, threading, traceback
+from datetime import datetime, timezone
+import strategy, champion_models
+from config import config
+from features import FEATURE_COLUMNS, FrozenScaler, compute_features, sync_feature_engine
+from market_feed import MarketFeed, KlineStream, now_ms, stream_symbol
+from binance_public import fetch_klines
+from scheduler import ExchangeClock, CandleCloseScheduler
+from shadow import ShadowModels, load_registry
+from stop_watcher import StopWatcher
+from metrics import metrics, METRICS_PORT, process_rss_mb
+from dashboard_feed import DashboardPublisher, DASHBOARD_SOCKET, TICK_INTERVAL
+from execution import ExecutionManager, MockExchange
+from data_store import CandleStore, CANDLE_CACHE_DIR
+from state_store import StateStore, STATE_DB, UNCHANGED
+from trade_store import TradeStore, append_csv_log
 from notifications import send_telegram_message, format_entry_message, format_exit_message
 
-def load_config():
-    """Loads settings from the config.ini file."""
-    config = configparser.ConfigParser()
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.ini')
-    if not os.path.exists(config_path): raise FileNotFoundError("config.ini not found!")
-    config.read(config_path)
-    return config
-
 # --- SETUP FROM CONFIG ---
-config = load_config()
-# Use environment variables first, fallback to config
-API_KEY = os.getenv('BINANCE_API_KEY') or config['API']['KEY']
-API_SECRET = os.getenv('BINANCE_API_SECRET') or config['API']['SECRET']
-
-# Validate that API credentials are provided
-if not API_KEY or not API_SECRET:
-    raise ValueError("❌ CRITICAL: Binance API credentials not found! Set BINANCE_API_KEY and BINANCE_API_SECRET environment variables.")
 SYMBOL = config['TRADING']['SYMBOL']
 BASE_TIMEFRAME, STRATEGY_TIMEFRAME = config['TRADING']['BASE_TIMEFRAME'], config['TRADING']['STRATEGY_TIMEFRAME']
-LONG_PRED_THRESHOLD, SHORT_PRED_THRESHOLD = config.getfloat('TRADING', 'LONG_THRESHOLD'), config.getfloat('TRADING', 'SHORT_THRESHOLD')
 VOLATILITY_FILTER = config.getfloat('TRADING', 'VOLATILITY_FILTER')
-RISK_PER_TRADE_PCT, MAX_ALLOCATION_PCT, ATR_MULTIPLIER_SL = config.getfloat('TRADING', 'RISK_PER_TRADE_PCT'), config.getfloat('TRADING', 'MAX_ALLOCATION_PCT'), config.getfloat('TRADING', 'ATR_MULTIPLIER_SL')
 MODEL_DIR, LONG_MODEL_NAME, SHORT_MODEL_NAME, STATE_FILE = config['PATHS']['MODEL_DIR'], config['MODELS']['LONG_MODEL_NAME'], config['MODELS']['SHORT_MODEL_NAME'], config['PATHS']['STATE_FILE']
+SCALER_NAME = config.get('MODELS', 'SCALER_NAME', fallback='champion_scaler.json')
 PAPER_ACCOUNT_STATE, TRADE_LOG = config['PATHS']['PAPER_ACCOUNT_STATE'], config['PATHS']['TRADE_LOG']
+STREAM_URL, SETTLE_DELAY, STREAM_GRACE = config.get('FEED', 'STREAM_URL', fallback=''), config.getfloat('FEED', 'SETTLE_DELAY', fallback=0.25), config.getfloat('FEED', 'STREAM_GRACE', fallback=2.0)
+STOP_STREAM_URL, STOP_STREAM = config.get('FEED', 'STOP_STREAM_URL', fallback=STREAM_URL), config.get('FEED', 'STOP_STREAM', fallback='aggTrade')
+REST_RETRIES = 3
+
+STRATEGY_PARAMS = strategy.StrategyParams.from_config(config)
 
 PAPER_TRADING = True
 PAPER_TRADE_INITIAL_BALANCE = 100.0
+TRADE_SOURCE = 'paper' if PAPER_TRADING else 'live'  # trade store stream
+EXECUTION_MOCK = config.getboolean('EXECUTION', 'MOCK', fallback=False)  # paper orders fill on the in-process mock exchange
 
 # --- Exchange and Model Setup ---
-exchange = ccxt.binance({'apiKey': API_KEY, 'secret': API_SECRET, 'enableRateLimit': True})
-exchange.session.trust_env = True
+exchange = None  # created by connect_exchange() when the bot starts
+execution = None  # created by connect_execution(); None fills paper orders as asked
+
+def connect_exchange():
+    """
+    Paper trading only reads public market data, so it runs on the lightweight standard-library
+    client. ccxt and the API credentials are only loaded when real orders will be sent.
+    """
+    if PAPER_TRADING:
+        from binance_public import BinancePublicClient
+        return BinancePublicClient()
+    import ccxt
+    # Use environment variables first, fallback to config
+    api_key = os.getenv('BINANCE_API_KEY') or config['API']['KEY']
+    api_secret = os.getenv('BINANCE_API_SECRET') or config['API']['SECRET']
+    # Validate that API credentials are provided
+    if not api_key or not api_secret:
+        raise ValueError("❌ CRITICAL: Binance API credentials not found! Set BINANCE_API_KEY and BINANCE_API_SECRET environment variables.")
+    client = ccxt.binance({'apiKey': api_key, 'secret': api_secret, 'enableRateLimit': True})
+    client.session.trust_env = True
+    return client
+
+def connect_execution():
+    """
+    Real orders go through the execution manager on the ccxt client, which loads the market
+    rules now rather than on the first order. With [EXECUTION] MOCK, paper orders take the same
+    path against the in-process mock exchange, so they are rounded and pay slippage and fees.
+    """
+    if not PAPER_TRADING: return ExecutionManager(exchange, [SYMBOL])
+    return ExecutionManager(MockExchange(), [SYMBOL]) if EXECUTION_MOCK else None
+
+def utc_now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
 
 def load_models():
-    long_model_path, short_model_path = os.path.join(MODEL_DIR, LONG_MODEL_NAME), os.path.join(MODEL_DIR, SHORT_MODEL_NAME)
-    if not os.path.exists(long_model_path) or not os.path.exists(short_model_path): raise FileNotFoundError(f"Model files not found in '{MODEL_DIR}'.")
-    long_model, short_model = xgb.XGBRegressor(), xgb.XGBRegressor(); long_model.load_model(long_model_path); short_model.load_model(short_model_path)
-    print("✅ Champion models loaded successfully."); return long_model, short_model
+    """The compiled champion pair, or, with challengers listed under [SHADOW], all pairs in one forest scored in a single pass."""
+    registry = load_registry(MODEL_DIR)
+    if not registry: return champion_models.load_compiled_models(MODEL_DIR, LONG_MODEL_NAME, SHORT_MODEL_NAME)
+    return ShadowModels((os.path.join(MODEL_DIR, LONG_MODEL_NAME), os.path.join(MODEL_DIR, SHORT_MODEL_NAME)), registry, STRATEGY_PARAMS, STATE_DB, PAPER_TRADE_INITIAL_BALANCE)
 
-def save_state(state, file_path):
-    with open(file_path, 'w') as f: json.dump(state, f, indent=4)
-
-def load_state(file_path):
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r') as f: return json.load(f)
-        except json.JSONDecodeError: return {}
-    return {}
+def load_scaler():
+    return champion_models.load_scaler(MODEL_DIR, SCALER_NAME)
 
 def execute_trade(trade_type, amount, price):
-    if PAPER_TRADING: return True
-    try:
-        print(f"\n🚨 [REAL TRADE] Attempting {trade_type.upper()} order for {amount}...\n"); order = exchange.create_market_order(SYMBOL, trade_type, amount)
-        print(f"✅ REAL TRADE EXECUTED: {order}"); return True
-    except Exception as e:
-        print(f"❌ TRADE FAILED: {e}"); return False
-
-def prepare_live_data(df_3m):
+    """Order callback for strategy.step: the fill record (price, amount, fee, latency), None if the order failed, or True in plain paper mode."""
+    if execution is None: return True
+    if isinstance(execution.exchange, MockExchange): execution.exchange.mark(SYMBOL, price)
+    return execution.execute(SYMBOL, trade_type, amount, price)
+
+def prepare_live_data(df_3m, scaler=None):
+    """Batch feature path. Without a frozen scaler, min-max parameters are refit on this window."""
     print("   Engineering features on resampled 3m data...")
-    df_3m['returns'] = np.log(df_3m['close'] / df_3m['close'].shift(1))
-    for lag in [1, 2, 3, 5, 10]: df_3m[f'returns_lag_{lag}'] = df_3m['returns'].shift(lag)
-    df_3m['momentum_5'] = df_3m['returns'].rolling(window=5).mean(); df_3m['momentum_10'] = df_3m['returns'].rolling(window=10).mean()
-    df_3m['volatility_10'] = df_3m['returns'].rolling(window=10).std(); df_3m['volatility_filter'] = df_3m['volatility_10'].rolling(50).mean()
-    candle_range = (df_3m['high'] - df_3m['low']).replace(0, 0.00001); df_3m['body_pct'] = (abs(df_3m['close'] - df_3m['open']) / candle_range).fillna(0)
-    df_3m['upper_wick_pct'] = ((df_3m['high'] - np.maximum(df_3m['open'], df_3m['close'])) / candle_range).fillna(0)
-    df_3m['lower_wick_pct'] = ((np.minimum(df_3m['open'], df_3m['close']) - df_3m['low']) / candle_range).fillna(0)
-    df_3m['taker_buy_ratio'] = (df_3m['taker_buy_base_asset_volume'] / df_3m['volume']).fillna(0.5)
-    df_3m.replace([np.inf, -np.inf], np.nan, inplace=True); df_3m.dropna(inplace=True)
-    features = [c for c in df_3m.columns if c.startswith(('returns', 'momentum', 'volatility', 'body', 'upper', 'lower', 'taker'))]
-    scaler = MinMaxScaler(); df_3m[features] = scaler.fit_transform(df_3m[features])
-    df_3m['atr'] = AverageTrueRange(df_3m['high'], df_3m['low'], df_3m['close'], 14).average_true_range()
-    df_3m.dropna(inplace=True); return df_3m, features
+    df_3m = compute_features(df_3m)
+    if df_3m.empty: return df_3m, FEATURE_COLUMNS
+    if scaler is None: scaler = FrozenScaler.fit(df_3m[FEATURE_COLUMNS].values)
+    df_3m[FEATURE_COLUMNS] = scaler.transform(df_3m[FEATURE_COLUMNS].values)
+    return df_3m, FEATURE_COLUMNS
+
+def warm_up_feed(feed, store, now=None, window=500):
+    """Backfills the local candle cache up to now (paged, in parallel), then seeds the feed from it."""
+    start = time.perf_counter()
+    added = store.backfill(lambda since, limit: fetch_klines(exchange, SYMBOL, BASE_TIMEFRAME, since, limit), now, window)
+    feed.add_candles(store.base.tail(window))
+    print(f"   Warmed up from the candle cache ({store.base.path}): {added} candles fetched in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+def cache_candles(feed, store):
+    """Appends base candles the feed received since the last cache write."""
+    return store.append(feed.base.since(store.base.last_timestamp))
 
 def log_trade_to_csv(trade_details):
-    log_file = TRADE_LOG
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
-    df = pd.DataFrame([trade_details])
-    if not os.path.isfile(log_file):
-        df.to_csv(log_file, index=False)
-    else:
-        df.to_csv(log_file, mode='a', header=False, index=False)
-    print(f"✅ Trade logged to {log_file}")
+    append_csv_log(trade_details, TRADE_LOG)
 
 # --- MAIN LOOP ---
 def run_bot():
+    global exchange, execution
     print("🚀 Starting Champion Live Bot (v4.1 - Telegram Integrated)...")
-    long_model, short_model = load_models()
-    current_position = load_state(STATE_FILE).get('current_position')
-    paper_account = load_state(PAPER_ACCOUNT_STATE)
+    exchange = connect_exchange()
+    execution = connect_execution()
+    models = load_models()
+    scaler, feature_engine = load_scaler(), None
+    state_store = StateStore(STATE_DB); state_store.import_json(STATE_FILE, PAPER_ACCOUNT_STATE, "dashboard_state.json")
+    state, trade_store = state_store.read(), TradeStore()
+    current_position, paper_account = state['current_position'], state['paper_account']
     if 'balance' not in paper_account: paper_account['balance'] = PAPER_TRADE_INITIAL_BALANCE
-    last_processed_timestamp = None
-    dashboard_data = load_state("dashboard_state.json")
+    last_processed_timestamp = state['last_processed_timestamp']
+    dashboard_data = state['dashboard']
+    position_lock, publisher, last_tick = threading.Lock(), None, 0.0
+
+    def stop_out(position, price, event_ms):
+        """Stop watcher exit path: closes the position at the print that crossed the stop, between candle closes. Returns False if the exit order failed, so the watcher re-arms."""
+        nonlocal current_position, dashboard_data
+        with position_lock:
+            if current_position is not position: return  # the candle cycle already closed or replaced it
+            print(f"\n❗️ STOP-LOSS CROSSED ({position['type'].upper()}) @ ${price:.2f} (stop ${position['stop_loss']:.2f}). Exiting now.")
+            fill = execute_trade(strategy.EXIT_SIDE[position['type']], position['position_size_units'], price)
+            if not fill: return False
+            price, units, fee = strategy.fill_terms(fill, price, position['position_size_units'])
+            closed = strategy.exited_part(position, units)
+            pnl = strategy.closed_pnl(closed, price, fee)
+            trade = strategy.trade_record(closed, price, pnl, 'stop_loss_tick', datetime.now(timezone.utc))
+            log_trade_to_csv(trade); trade_store.append(trade, TRADE_SOURCE, SYMBOL, PAPER_TRADE_INITIAL_BALANCE)
+            send_telegram_message(format_exit_message(trade['type'], trade['entry_price'], trade['exit_price'], trade['pnl_usd'], trade['exit_reason']))
+            if PAPER_TRADING: paper_account['balance'] += pnl
+            current_position, dashboard_data = None, {**dashboard_data, 'position_info': None, 'last_update': utc_now()}
+            state_store.commit(current_position, paper_account if PAPER_TRADING else UNCHANGED, dashboard_data)
+            if publisher: publisher.publish('', dashboard_data)
+            print(f"   Exit booked {now_ms() - event_ms} ms after the print.")
+
+    def publish_tick(price, event_ms):
+        """Live price and unrealized PnL for the dashboard between candle closes, at most every TICK_INTERVAL seconds."""
+        nonlocal last_tick
+        if time.monotonic() - last_tick < TICK_INTERVAL: return
+        position, last_tick = current_position, time.monotonic()
+        publisher.publish_tick('', price, strategy.position_pnl(position, price) if position else 0.0)
+
+    clock = ExchangeClock().sync(exchange)
+    feed, candle_store = MarketFeed(SYMBOL, BASE_TIMEFRAME, STRATEGY_TIMEFRAME), CandleStore(SYMBOL, BASE_TIMEFRAME, STRATEGY_TIMEFRAME, root=CANDLE_CACHE_DIR)
+    warm_up_feed(feed, candle_store, clock.now_ms())
+    stream = KlineStream(feed, STREAM_URL).start() if STREAM_URL else None
+    if DASHBOARD_SOCKET: publisher = DashboardPublisher(DASHBOARD_SOCKET).start()
+    watcher = StopWatcher(SYMBOL, f"{STOP_STREAM_URL.rstrip('/')}/{stream_symbol(SYMBOL)}@{STOP_STREAM}", stop_out, publish_tick if publisher else None) if STOP_STREAM_URL and STOP_STREAM else None
+    if watcher: watcher.arm(current_position); watcher.start()
+    scheduler = CandleCloseScheduler(feed.period_ms, clock, 0.0 if stream else SETTLE_DELAY)  # without a stream, wake once REST has the candle
+    if METRICS_PORT: metrics.serve(METRICS_PORT)
+    startup_s, rss_mb = time.perf_counter() - STARTED, process_rss_mb()
+    metrics.set('startup_seconds', round(startup_s, 3)); metrics.set('rss_megabytes', round(rss_mb, 1))
+    print(f"⚡ Ready in {startup_s * 1000:.0f} ms | RSS {rss_mb:.0f} MB")
 
     while True:
         try:
-            print(f"\n🕒 [{pd.Timestamp.now('UTC').strftime('%Y-%m-%d %H:%M:%S UTC')}] Main loop initiated.")
-            usdt_balance = paper_account['balance'] if PAPER_TRADING else exchange.fetch_free_balance().get('USDT', 0)
+            # Wake at the strategy candle close (exchange time) and act only on that fully closed candle:
+            # as soon as the stream delivers it, or via REST (the scheduler wakes SETTLE_DELAY after the close when there is no stream).
+            candle_open = scheduler.wait_for_close()
+            print(f"\n🕒 [{utc_now()}] {STRATEGY_TIMEFRAME} candle closed.")
+            cycle_start = time.perf_counter()
+            with metrics.timer('candle_wait'): closed = feed.wait_for_closed(candle_open, timeout=STREAM_GRACE if stream else 0)
+            for attempt in range(REST_RETRIES):
+                if closed: break
+                print(f"   Fetching the closed candle via REST (attempt {attempt + 1}/{REST_RETRIES})...")
+                metrics.inc('rest_polls')
+                with metrics.timer('fetch_ohlcv'): feed.poll(exchange, now=clock.now_ms())
+                closed = feed.wait_for_closed(candle_open, timeout=0.5 * attempt)
+            if not closed: metrics.inc('missed_candles')
+            with metrics.timer('fetch_balance'): usdt_balance = paper_account['balance'] if PAPER_TRADING else exchange.fetch_free_balance().get('USDT', 0)
             if PAPER_TRADING: print(f"   -- Paper Trading Mode -- Simulated Balance: ${usdt_balance:,.2f}")
             else: print(f"   -- Live Trading Mode -- Real Balance: ${usdt_balance:,.2f}")
-            print(f"   Fetching latest 500 candles of {BASE_TIMEFRAME} data...")
-            ohlcv_1m = exchange.fetch_ohlcv(SYMBOL, timeframe=BASE_TIMEFRAME, limit=500)
-            df_1m = pd.DataFrame(ohlcv_1m, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']); df_1m['timestamp'] = pd.to_datetime(df_1m['timestamp'], unit='ms'); df_1m.set_index('timestamp', inplace=True)
-            df_1m['number_of_trades'], df_1m['taker_buy_base_asset_volume'] = 0, 0
-            print(f"   Resampling {BASE_TIMEFRAME} data to {STRATEGY_TIMEFRAME}...")
-            agg_dict = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum', 'number_of_trades': 'sum', 'taker_buy_base_asset_volume': 'sum'}
-            df_3m = df_1m.resample(STRATEGY_TIMEFRAME).agg(agg_dict).dropna()
-            latest_candle_timestamp = df_3m.index[-1]
-            bot_status, signal_analysis, position_info, sizing_info = "Waiting", dashboard_data.get('signal_analysis'), dashboard_data.get('position_info'), dashboard_data.get('sizing_info')
-
-            if latest_candle_timestamp != last_processed_timestamp:
-                bot_status = "Analyzing"
-                print(f"   New candle to process: {latest_candle_timestamp}")
-                processed_df, features = prepare_live_data(df_3m.copy())
-                if not processed_df.empty:
-                    latest_candle = processed_df.iloc[-1]; last_processed_timestamp = latest_candle.name
-                    feature_values = latest_candle[features].values.reshape(1, -1)
-                    predicted_long, predicted_short = long_model.predict(feature_values)[0], short_model.predict(feature_values)[0]
-                    print(f"📈 Analysis: Close=${latest_candle['close']:.2f} | Pred_Long: {predicted_long:.4f} | Pred_Short: {predicted_short:.4f}")
-                    signal_analysis = {"Latest Price": float(latest_candle['close']), "Pred Long": float(predicted_long), "Pred Short": float(predicted_short), "Long Threshold": LONG_PRED_THRESHOLD, "Short Threshold": SHORT_PRED_THRESHOLD, "Go Long Signal": bool(predicted_long > LONG_PRED_THRESHOLD), "Go Short Signal": bool(predicted_short > SHORT_PRED_THRESHOLD), "Is Clear Signal": bool((predicted_long > LONG_PRED_THRESHOLD) != (predicted_short > SHORT_PRED_THRESHOLD)), "Volatility": float(latest_candle['volatility_10']), "Volatility Filter": float(latest_candle['volatility_filter']), "Volatility Passed": bool(latest_candle['volatility_10'] >= latest_candle['volatility_filter'])}
-                    if current_position:
-                        pnl = (latest_candle['close'] - current_position['entry_price']) * current_position['position_size_units'] if current_position['type'] == 'long' else (current_position['entry_price'] - latest_candle['close']) * current_position['position_size_units']
-                        position_info = {"type": current_position['type'], "entry_price": current_position['entry_price'], "size_units": current_position['position_size_units'], "size_usd": current_position['position_size_units'] * current_position['entry_price'], "stop_loss": current_position['stop_loss'], "unrealized_pnl_usd": pnl, "unrealized_pnl_pct": (pnl / (current_position['entry_price'] * current_position['position_size_units'])) * 100}
-                        if current_position['type'] == 'long':
-                            new_sl = latest_candle['close'] - (latest_candle['atr'] * ATR_MULTIPLIER_SL); current_position['stop_loss'] = max(current_position['stop_loss'], new_sl)
-                            if latest_candle['close'] <= current_position['stop_loss']:
-                                print(f"❗️ STOP-LOSS HIT (LONG). Exiting @ ${latest_candle['close']:.2f}")
-                                exit_price = current_position['stop_loss']
-                                if execute_trade('sell', current_position['position_size_units'], exit_price):
-                                    pnl = (exit_price - current_position['entry_price']) * current_position['position_size_units']
-                                    log_trade_to_csv({'timestamp': datetime.now(timezone.utc), 'type': 'long', 'entry_price': current_position['entry_price'], 'exit_price': exit_price, 'size_usd': position_info['size_usd'], 'pnl_usd': pnl, 'exit_reason': 'stop_loss'})
-                                    msg = format_exit_message('long', current_position['entry_price'], exit_price, pnl, 'stop_loss')
-                                    send_telegram_message(msg)
-                                    if PAPER_TRADING: paper_account['balance'] += pnl
-                                    current_position, position_info = None, None
-                        elif current_position['type'] == 'short':
-                            new_sl = latest_candle['close'] + (latest_candle['atr'] * ATR_MULTIPLIER_SL); current_position['stop_loss'] = min(current_position['stop_loss'], new_sl)
-                            if latest_candle['close'] >= current_position['stop_loss']:
-                                print(f"❗️ STOP-LOSS HIT (SHORT). Exiting @ ${latest_candle['close']:.2f}")
-                                exit_price = current_position['stop_loss']
-                                if execute_trade('buy', current_position['position_size_units'], exit_price):
-                                    pnl = (current_position['entry_price'] - exit_price) * current_position['position_size_units']
-                                    log_trade_to_csv({'timestamp': datetime.now(timezone.utc), 'type': 'short', 'entry_price': current_position['entry_price'], 'exit_price': exit_price, 'size_usd': position_info['size_usd'], 'pnl_usd': pnl, 'exit_reason': 'stop_loss'})
-                                    msg = format_exit_message('short', current_position['entry_price'], exit_price, pnl, 'stop_loss')
-                                    send_telegram_message(msg)
-                                    if PAPER_TRADING: paper_account['balance'] += pnl
-                                    current_position, position_info = None, None
-                    if not current_position:
-                        position_info = None
-                        if signal_analysis['Volatility Passed']:
-                            go_long, go_short = signal_analysis['Go Long Signal'], signal_analysis['Go Short Signal']
-                            if go_long and not go_short:
-                                entry_price = latest_candle['close']; sl_price = entry_price - (latest_candle['atr'] * ATR_MULTIPLIER_SL); risk_per_unit = entry_price - sl_price
-                                sizing_info = {"account_balance": usdt_balance, "risk_per_trade_pct": RISK_PER_TRADE_PCT, "capital_to_risk_usd": usdt_balance * RISK_PER_TRADE_PCT, "entry_price": entry_price, "stop_loss_price": sl_price, "risk_per_unit_usd": risk_per_unit, "calculated_position_size": (usdt_balance * RISK_PER_TRADE_PCT) / risk_per_unit if risk_per_unit > 0 else 0}
-                                if risk_per_unit > 0:
-                                    print(f"💡 Entry Signal: LONG"); pos_size = sizing_info['calculated_position_size']; max_pos_value = usdt_balance * MAX_ALLOCATION_PCT
-                                    if (pos_size * entry_price) > max_pos_value: pos_size = max_pos_value / entry_price
-                                    if execute_trade('buy', pos_size, entry_price):
-                                        msg = format_entry_message('long', entry_price, sl_price, (pos_size * entry_price), pos_size)
-                                        send_telegram_message(msg)
-                                        current_position = {'type': 'long', 'entry_price': entry_price, 'stop_loss': sl_price, 'position_size_units': pos_size}
-                            elif go_short and not go_long:
-                                entry_price = latest_candle['close']; sl_price = entry_price + (latest_candle['atr'] * ATR_MULTIPLIER_SL); risk_per_unit = sl_price - entry_price
-                                sizing_info = {"account_balance": usdt_balance, "risk_per_trade_pct": RISK_PER_TRADE_PCT, "capital_to_risk_usd": usdt_balance * RISK_PER_TRADE_PCT, "entry_price": entry_price, "stop_loss_price": sl_price, "risk_per_unit_usd": risk_per_unit, "calculated_position_size": (usdt_balance * RISK_PER_TRADE_PCT) / risk_per_unit if risk_per_unit > 0 else 0}
-                                if risk_per_unit > 0:
-                                    print(f"💡 Entry Signal: SHORT"); pos_size = sizing_info['calculated_position_size']; max_pos_value = usdt_balance * MAX_ALLOCATION_PCT
-                                    if (pos_size * entry_price) > max_pos_value: pos_size = max_pos_value / entry_price
-                                    if execute_trade('sell', pos_size, entry_price):
-                                        msg = format_entry_message('short', entry_price, sl_price, (pos_size * entry_price), pos_size)
-                                        send_telegram_message(msg)
-                                        current_position = {'type': 'short', 'entry_price': entry_price, 'stop_loss': sl_price, 'position_size_units': pos_size}
-                        else: print("   Filter: Market too quiet. No new entries."); sizing_info = None
-            else:
-                print("   No new 3m candle has formed yet. Waiting..."); sizing_info = None
-
-            dashboard_data = {"bot_status": bot_status, "last_update": pd.Timestamp.now('UTC').strftime('%Y-%m-%d %H:%M:%S UTC'), "paper_trading": PAPER_TRADING, "account_balance": usdt_balance, "signal_analysis": signal_analysis, "position_info": position_info, "sizing_info": sizing_info}
-            save_state(dashboard_data, "dashboard_state.json")
-            save_state({'current_position': current_position}, STATE_FILE)
-            if PAPER_TRADING: save_state(paper_account, PAPER_ACCOUNT_STATE)
-            
-            print("✅ Cycle complete. Sleeping for 60 seconds...")
-            time.sleep(60)
+            with metrics.timer('features'): feature_engine, scaler, _ = sync_feature_engine(feature_engine, scaler, feed)
+            with position_lock:  # the stop watcher may close the position between candles
+                bot_status, signal_analysis, position_info, sizing_info = "Waiting", dashboard_data.get('signal_analysis'), dashboard_data.get('position_info'), dashboard_data.get('sizing_info')
+                decision_latency_ms = dashboard_data.get('decision_latency_ms')
+
+                if feature_engine.last_timestamp != last_processed_timestamp:
+                    bot_status = "Analyzing"
+                    print(f"   New candle to process: {datetime.fromtimestamp(feature_engine.last_timestamp / 1000, timezone.utc):%Y-%m-%d %H:%M:%S}")
+                    latest_candle = feature_engine.last_row
+                    if latest_candle is not None:
+                        last_processed_timestamp = latest_candle['timestamp']
+                        with metrics.timer('predict'): predicted_long, predicted_short = models.predict_row(latest_candle['vector'])
+                        print(f"📈 Analysis: Close=${latest_candle['close']:.2f} | Pred_Long: {predicted_long:.4f} | Pred_Short: {predicted_short:.4f}")
+                        with metrics.timer('strategy'): result = strategy.step(current_position, usdt_balance, latest_candle, predicted_long, predicted_short, STRATEGY_PARAMS, sizing_info, execute=execute_trade)
+                        decision_latency_ms = round(scheduler.latency_ms(latest_candle['timestamp']), 1)
+                        metrics.observe('decision_latency', decision_latency_ms / 1000)
+                        print(f"   Decision made {decision_latency_ms:.0f} ms after the candle close.")
+                        signal_analysis, position_info, sizing_info = result['signal_analysis'], result['position_info'], result['sizing_info']
+                        if result['exit']:
+                            trade = result['exit']; print(f"❗️ STOP-LOSS HIT ({trade['type'].upper()}). Exiting @ ${trade['exit_price']:.2f}")
+                            with metrics.timer('trade_log'):
+                                record = {**trade, 'timestamp': datetime.now(timezone.utc)}
+                                log_trade_to_csv(record); trade_store.append(record, TRADE_SOURCE, SYMBOL, PAPER_TRADE_INITIAL_BALANCE)
+                            send_telegram_message(format_exit_message(trade['type'], trade['entry_price'], trade['exit_price'], trade['pnl_usd'], trade['exit_reason']))
+                            if PAPER_TRADING: paper_account['balance'] += result['pnl']
+                        if result['entry']:
+                            entry = result['entry']; print(f"💡 Entry Signal: {entry['type'].upper()}")
+                            send_telegram_message(format_entry_message(entry['type'], entry['entry_price'], entry['stop_loss'], (entry['position_size_units'] * entry['entry_price']), entry['position_size_units']))
+                        elif not result['position'] and not signal_analysis['Volatility Passed']: print("   Filter: Market too quiet. No new entries.")
+                        current_position = result['position']
+                        if isinstance(models, ShadowModels): models.step(latest_candle)
+                else:
+                    print(f"   No new closed {STRATEGY_TIMEFRAME} candle yet. Waiting..."); sizing_info = None
+
+                dashboard_data = {"symbol": SYMBOL, "bot_status": bot_status, "last_update": utc_now(), "paper_trading": PAPER_TRADING, "account_balance": usdt_balance, "signal_analysis": signal_analysis, "position_info": position_info, "sizing_info": sizing_info, "decision_latency_ms": decision_latency_ms, "metrics": metrics.summary()}
+                if isinstance(models, ShadowModels) and signal_analysis: dashboard_data["shadow_models"] = models.leaderboard(signal_analysis['Latest Price'])
+                with metrics.timer('state_commit'): state_store.commit(current_position, paper_account if PAPER_TRADING else UNCHANGED, dashboard_data, last_processed_timestamp)
+                if publisher: publisher.publish('', dashboard_data)
+                if watcher: watcher.arm(current_position)
+            with metrics.timer('candle_cache'): cache_candles(feed, candle_store)
+            metrics.observe('cycle', time.perf_counter() - cycle_start); metrics.set('rss_megabytes', round(process_rss_mb(), 1))
+            if clock.due: clock.sync(exchange)
+
+            print("✅ Cycle complete. Waiting for the next candle...")
 
         except Exception as e:
-            print(f"💥 UNEXPECTED ERROR: {e}"); traceback.print_exc()
-            error_data = {"bot_status": "Error", "last_update": pd.Timestamp.now('UTC').strftime('%Y-%m-%d %H:%M:%S UTC'), "error_message": str(e)}
-            save_state(error_data, "dashboard_state.json")
-            time.sleep(60)
+            print(f"💥 UNEXPECTED ERROR: {e}"); traceback.print_exc(); metrics.inc('errors')
+            error_data = {"bot_status": "Error", "last_update": utc_now(), "error_message": str(e)}
+            state_store.commit(dashboard=error_data)
+            if publisher: publisher.publish('', error_data)
 
 if __name__ == '__main__':
     run_bot()
\ No newline at end of file
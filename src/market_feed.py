@@ -0,0 +1,275 @@
+# src/market_feed.py
+
+import json
+import re
+import threading
+import time
+
+import numpy as np
+
+from metrics import metrics
+
+# Closed candles are kept as rows of this dtype; timestamps are candle open times in ms (UTC).
+CANDLE_DTYPE = np.dtype([
+    ('timestamp', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+    ('volume', 'f8'), ('number_of_trades', 'f8'), ('taker_buy_base_asset_volume', 'f8'),
+])
+TIMEFRAME_UNITS_MS = {'s': 1000, 'm': 60_000, 'min': 60_000, 'h': 3_600_000, 'd': 86_400_000}
+
+
+def timeframe_to_ms(timeframe):
+    """Parses both ccxt ('1m', '1h') and pandas ('3min', '1h') timeframe strings."""
+    match = re.fullmatch(r'(\d+)\s*(min|[smhd])', timeframe.strip().lower())
+    if not match: raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return int(match.group(1)) * TIMEFRAME_UNITS_MS[match.group(2)]
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def closed_candles(ohlcv, base_ms, now=None):
+    """CANDLE_DTYPE tuples from ccxt-style rows (trade count and taker volume when present, else 0), without the still-forming candle."""
+    now = now or now_ms()
+    return [(int(row[0]), *map(float, row[1:6]), *(float(v) for v in (row[6:8] if len(row) >= 8 else (0, 0)))) for row in ohlcv if row[0] + base_ms <= now]
+
+
+class CandleRingBuffer:
+    """Fixed-capacity, array-backed store of the most recent closed candles."""
+
+    def __init__(self, capacity):
+        self.capacity, self.count = capacity, 0
+        self.data = np.zeros(capacity, dtype=CANDLE_DTYPE)
+
+    def __len__(self): return min(self.count, self.capacity)
+
+    @property
+    def last_timestamp(self):
+        return int(self.data[(self.count - 1) % self.capacity]['timestamp']) if self.count else None
+
+    def append(self, candle):
+        """Appends a candle tuple in CANDLE_DTYPE order. Stale or duplicate candles are ignored."""
+        if self.count and candle[0] <= self.last_timestamp: return False
+        self.data[self.count % self.capacity] = candle; self.count += 1
+        return True
+
+    def last(self, n=None):
+        """Copy of the newest n candles (all held candles by default), oldest first."""
+        size = len(self); n = size if n is None else min(n, size)
+        return self.data[np.arange(self.count - n, self.count) % self.capacity]
+
+    def since(self, timestamp):
+        """Candles newer than `timestamp`, oldest first."""
+        rows = self.last()
+        return rows if timestamp is None else rows[rows['timestamp'] > timestamp]
+
+    def to_frame(self, n=None):
+        """Newest n candles as a DataFrame indexed by timestamp, for the batch (pandas) paths."""
+        import pandas as pd
+        df = pd.DataFrame(self.last(n)); df.index = pd.to_datetime(df.pop('timestamp'), unit='ms')
+        return df
+
+
+class CandleAggregator:
+    """
+    Incrementally folds closed base-timeframe candles into strategy-timeframe buckets.
+    Buckets are aligned to multiples of the period (as pandas resample does for 3min),
+    and a bucket is closed as soon as its last base candle arrives.
+    """
+
+    def __init__(self, base_ms, period_ms, capacity):
+        self.base_ms, self.period_ms = base_ms, period_ms
+        self.closed, self.forming = CandleRingBuffer(capacity), None
+
+    def add(self, candle):
+        """Adds a closed base candle. Returns the strategy candle it closed, if any."""
+        ts = int(candle[0]); bucket = ts - ts % self.period_ms; closed = None
+        if self.forming is not None and bucket != self.forming[0]:
+            closed = self._close()
+        if self.forming is None:
+            self.forming = [bucket, *candle[1:]]
+        else:
+            f = self.forming
+            f[2], f[3], f[4] = max(f[2], candle[2]), min(f[3], candle[3]), candle[4]
+            f[5] += candle[5]; f[6] += candle[6]; f[7] += candle[7]
+        if ts + self.base_ms == bucket + self.period_ms: closed = self._close()
+        return closed
+
+    def _close(self):
+        candle, self.forming = tuple(self.forming), None
+        self.closed.append(candle)
+        return candle
+
+
+class MarketFeed:
+    """
+    Thread-safe candle state for one symbol: a ring buffer of closed base candles and
+    the incrementally maintained strategy-timeframe view. Writers are the stream thread
+    and the REST fallback; the trading loop waits on new data instead of sleeping.
+    """
+
+    def __init__(self, symbol, base_timeframe, strategy_timeframe, capacity=1000):
+        self.symbol = symbol
+        self.base_timeframe, self.base_ms, self.period_ms = base_timeframe, timeframe_to_ms(base_timeframe), timeframe_to_ms(strategy_timeframe)
+        self.base = CandleRingBuffer(capacity)
+        self.aggregator = CandleAggregator(self.base_ms, self.period_ms, max(capacity * self.base_ms // self.period_ms, 1))
+        self.version, self.condition = 0, threading.Condition()
+
+    def add_candle(self, candle):
+        """Adds one closed base candle (CANDLE_DTYPE order). Returns True if it was new."""
+        with self.condition:
+            if not self.base.append(candle): return False
+            self.aggregator.add(candle); self.version += 1
+            self.condition.notify_all()
+        return True
+
+    def add_candles(self, rows):
+        """Adds closed candles given as CANDLE_DTYPE records (e.g. from the local data store)."""
+        return sum(self.add_candle(candle) for candle in np.asarray(rows, dtype=CANDLE_DTYPE).tolist())
+
+    def add_ohlcv(self, ohlcv, now=None):
+        """Adds ccxt-style rows, skipping the still-forming last candle. Returns how many were new."""
+        return sum(self.add_candle(candle) for candle in closed_candles(ohlcv, self.base_ms, now))
+
+    @property
+    def next_since(self):
+        """Open time of the first candle not held yet (None when empty), for since-based REST fetches."""
+        return self.base.last_timestamp + self.base_ms if self.base.count else None
+
+    def poll(self, exchange, limit=500, now=None):
+        """REST catch-up: fetches only candles newer than the last one held, with all kline fields."""
+        from binance_public import fetch_klines
+        return self.add_ohlcv(fetch_klines(exchange, self.symbol, self.base_timeframe, since=self.next_since, limit=limit), now)
+
+    def wait_for_update(self, last_version, timeout):
+        """Blocks until a candle newer than `last_version` arrives (or timeout). Returns the current version."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != last_version, timeout=timeout)
+            return self.version
+
+    def wait_for_closed(self, timestamp, timeout):
+        """Blocks until the strategy candle opening at `timestamp` has closed (or timeout). Returns whether it has."""
+        with self.condition:
+            return self.condition.wait_for(lambda: (self.aggregator.closed.last_timestamp or -1) >= timestamp, timeout=timeout)
+
+    def snapshot(self, since_timestamp):
+        """(closed strategy candles newer than since_timestamp, forming bucket or None), read atomically."""
+        with self.condition:
+            forming = self.aggregator.forming
+            return self.aggregator.closed.since(since_timestamp), (tuple(forming) if forming else None)
+
+
+def parse_kline_message(message):
+    """Binance kline stream payload (single or combined stream) -> (stream symbol, is_closed, candle tuple in CANDLE_DTYPE order)."""
+    data = json.loads(message); k = data.get('k', data.get('data', {}).get('k'))
+    if k is None: return None, False, None
+    candle = (int(k['t']), float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v']), float(k['n']), float(k['V']))
+    return k['s'].lower(), bool(k['x']), candle
+
+
+def stream_symbol(symbol):
+    return symbol.replace('/', '').lower()
+
+
+class KlineStream:
+    """
+    Background websocket subscription to the exchange kline feed. Closed candles are
+    pushed into their MarketFeed; drops are retried with exponential backoff. Several
+    feeds share one connection through the exchange's combined-stream endpoint.
+    """
+
+    def __init__(self, feeds, base_url):
+        feeds = feeds if isinstance(feeds, (list, tuple)) else [feeds]
+        self.feeds = {stream_symbol(f.symbol): f for f in feeds}
+        streams = [f"{stream_symbol(f.symbol)}@kline_{f.base_timeframe}" for f in feeds]
+        base_url = base_url.rstrip('/')
+        if len(streams) == 1: self.url = f"{base_url}/{streams[0]}"
+        else: self.url = f"{base_url[:-3] if base_url.endswith('/ws') else base_url}/stream?streams={'/'.join(streams)}"
+        self.connected, self._stop, self._ws = threading.Event(), threading.Event(), None
+        self._thread = threading.Thread(target=self._run, name=f"kline-{'+'.join(self.feeds)[:40]}", daemon=True)
+
+    def start(self):
+        self._thread.start(); return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._ws is not None: self._ws.close()
+        self._thread.join(timeout)
+
+    def _run(self):
+        from websockets.sync.client import connect
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                with connect(self.url, open_timeout=10) as ws:
+                    self._ws = ws; self.connected.set(); backoff = 1
+                    print(f"✅ Kline stream connected: {self.url}")
+                    for message in ws:
+                        symbol, is_closed, candle = parse_kline_message(message)
+                        feed = self.feeds.get(symbol) if len(self.feeds) > 1 else next(iter(self.feeds.values()))
+                        if is_closed and feed is not None: feed.add_candle(candle); metrics.inc('stream_candles')
+            except Exception as e:
+                if self._stop.is_set(): break
+                print(f"❌ Kline stream error: {e}. Reconnecting in {backoff}s..."); metrics.inc('stream_reconnects')
+            finally:
+                self.connected.clear(); self._ws = None
+            self._stop.wait(backoff); backoff = min(backoff * 2, 60)
+
+
+def kline_message(symbol, interval, candle, is_closed=True):
+    """Builds a Binance-format kline event; used by the replay server."""
+    ts, o, h, l, c, v, n, tb = candle
+    return json.dumps({'e': 'kline', 'E': now_ms(), 's': stream_symbol(symbol).upper(), 'k': {
+        't': int(ts), 'T': int(ts) + timeframe_to_ms(interval) - 1, 's': stream_symbol(symbol).upper(), 'i': interval,
+        'o': str(o), 'h': str(h), 'l': str(l), 'c': str(c), 'v': str(v), 'n': int(n), 'x': is_closed, 'V': str(tb)}})
+
+
+class ReplayServer:
+    """
+    Local stand-in for the exchange kline websocket. Replays a list of candles (or a dict of
+    symbol -> candles, interleaved) to every client that connects, `interval_s` apart, so the
+    streaming path can be exercised offline.
+    """
+
+    def __init__(self, candles, symbol='BTC/USDT', interval='1m', host='127.0.0.1', port=0, interval_s=0.0):
+        self.streams = {s: list(c) for s, c in candles.items()} if isinstance(candles, dict) else {symbol: list(candles)}
+        self.interval, self.interval_s = interval, interval_s
+        from websockets.sync.server import serve
+        self._server = serve(self._handle, host, port)
+        self.port = self._server.socket.getsockname()[1]
+        self.url = f"ws://{host}:{self.port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="kline-replay", daemon=True)
+
+    def start(self):
+        self._thread.start(); return self
+
+    def stop(self):
+        self._server.shutdown(); self._thread.join(5)
+
+    def _handle(self, ws):
+        from websockets.exceptions import ConnectionClosed
+        try:
+            for candles in zip(*self.streams.values()):
+                for symbol, candle in zip(self.streams, candles):
+                    ws.send(kline_message(symbol, self.interval, candle, is_closed=False))
+                    ws.send(kline_message(symbol, self.interval, candle, is_closed=True))
+                if self.interval_s: time.sleep(self.interval_s)
+            for _ in ws: pass  # hold the connection open until the client leaves
+        except ConnectionClosed: pass  # the client left mid-replay (e.g. a reconnect test)
+
+
+if __name__ == '__main__':
+    import argparse
+    import pandas as pd
+    parser = argparse.ArgumentParser(description="Replay 1m candles from a CSV as a local kline websocket.")
+    parser.add_argument('csv'); parser.add_argument('--port', type=int, default=8765); parser.add_argument('--interval', type=float, default=1.0)
+    args = parser.parse_args()
+    df = pd.read_csv(args.csv)
+    ts = df['timestamp'] if np.issubdtype(df['timestamp'].dtype, np.number) else (pd.to_datetime(df['timestamp']) - pd.Timestamp(0)) // pd.Timedelta('1ms')
+    rows = zip(ts, df['open'], df['high'], df['low'], df['close'], df['volume'], df.get('number_of_trades', 0 * df['volume']), df.get('taker_buy_base_asset_volume', 0 * df['volume']))
+    server = ReplayServer(rows, port=args.port, interval_s=args.interval).start()
+    print(f"🔁 Replaying {len(df)} candles on {server.url} (set [FEED] STREAM_URL to this address)")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
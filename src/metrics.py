@@ -0,0 +1,117 @@
+# src/metrics.py
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from config import config
+
+METRICS_HOST = config.get('METRICS', 'HOST', fallback='127.0.0.1')
+METRICS_PORT = config.getint('METRICS', 'PORT', fallback=9108)
+MULTI_METRICS_PORT = config.getint('METRICS', 'MULTI_PORT', fallback=9109)  # multi_bot's, so both bots can run on one host
+WINDOW = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+PREFIX = 'champion'
+
+
+class StageStats:
+    """Latency of one stage: lifetime count/sum plus the last WINDOW samples for rolling quantiles."""
+
+    def __init__(self, window=WINDOW):
+        self.samples, self.count, self.total, self.last = np.zeros(window), 0, 0.0, 0.0
+
+    def observe(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1; self.total += seconds; self.last = seconds
+
+    def quantiles(self, qs=QUANTILES):
+        window = self.samples[:min(self.count, len(self.samples))]
+        return np.quantile(window, qs).tolist() if len(window) else [0.0] * len(qs)
+
+
+class Metrics:
+    """
+    Per-stage timers and event counters for the hot path. Recording a sample is one perf_counter
+    pair and an array write; quantiles are only computed when the summary or endpoint is read.
+    """
+
+    def __init__(self):
+        self.stages, self.counters, self.gauges, self.lock = {}, {}, {}, threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None: stats = self.stages[stage] = StageStats()
+            stats.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try: yield
+        finally: self.observe(stage, time.perf_counter() - start)
+
+    def inc(self, counter, amount=1):
+        with self.lock: self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def set(self, gauge, value):
+        with self.lock: self.gauges[gauge] = value
+
+    def summary(self):
+        """Compact per-stage p50/p95/p99/last in ms plus counters, for the dashboard state."""
+        with self.lock:
+            stages = {name: {'count': s.count, **{f"p{round(q * 100)}_ms": round(v * 1000, 3) for q, v in zip(QUANTILES, s.quantiles())}, 'last_ms': round(s.last * 1000, 3)}
+                      for name, s in self.stages.items()}
+            return {'stages': stages, 'counters': dict(self.counters), 'gauges': dict(self.gauges)}
+
+    def prometheus(self):
+        """Prometheus text exposition: one summary per stage, one counter per event and one gauge per value."""
+        lines = [f"# HELP {PREFIX}_stage_seconds Hot-path stage latency over the last {WINDOW} samples.", f"# TYPE {PREFIX}_stage_seconds summary"]
+        with self.lock:
+            for name, s in sorted(self.stages.items()):
+                lines += [f'{PREFIX}_stage_seconds{{stage="{name}",quantile="{q}"}} {v:.9f}' for q, v in zip(QUANTILES, s.quantiles())]
+                lines += [f'{PREFIX}_stage_seconds_sum{{stage="{name}"}} {s.total:.9f}', f'{PREFIX}_stage_seconds_count{{stage="{name}"}} {s.count}']
+            for name, value in sorted(self.counters.items()):
+                lines += [f"# TYPE {PREFIX}_{name}_total counter", f"{PREFIX}_{name}_total {value}"]
+            for name, value in sorted(self.gauges.items()):
+                lines += [f"# TYPE {PREFIX}_{name} gauge", f"{PREFIX}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=METRICS_PORT, host=METRICS_HOST):
+        """
+        Serves /metrics on a background thread. Returns the server (port 0 picks a free port), or
+        None if the port is taken: the bot keeps running without the endpoint.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics': self.send_error(404); return
+                body = registry.prometheus().encode()
+                self.send_response(200); self.send_header('Content-Type', 'text/plain; version=0.0.4'); self.send_header('Content-Length', str(len(body))); self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args): pass
+
+        try: server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"⚠️ Metrics endpoint not started on {host}:{port}: {e}. Set a free port under [METRICS]."); return None
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"📊 Metrics endpoint: http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+def process_rss_mb():
+    """Current resident set size of this process in MB (peak RSS where /proc is not available)."""
+    try:
+        with open('/proc/self/statm', 'r') as f: return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if os.uname().sysname == 'Darwin' else 2**10)
+
+
+# Process-wide registry shared by the bot, the feed and the notifier.
+metrics = Metrics()
@@ -0,0 +1,236 @@
+# src/multi_bot.py
+
+import asyncio
+import os
+import time
+import traceback
+from datetime import datetime, timezone
+
+import numpy as np
+
+import champion_models
+import strategy
+from binance_public import kline_params, parse_klines
+from config import config
+from dashboard_feed import DashboardPublisher, DASHBOARD_SOCKET
+from execution import ExecutionManager, MockExchange
+from data_store import CandleStore, CANDLE_CACHE_DIR
+from features import sync_feature_engine
+from market_feed import MarketFeed, KlineStream, timeframe_to_ms
+from scheduler import ExchangeClock, CandleCloseScheduler
+from metrics import metrics, MULTI_METRICS_PORT
+from state_store import StateStore, STATE_DB, UNCHANGED
+from trade_store import TradeStore, append_csv_log
+from notifications import send_telegram_message, format_entry_message, format_exit_message
+
+# --- SETUP FROM CONFIG ---
+SYMBOLS = [s.strip() for s in config.get('TRADING', 'SYMBOLS', fallback=config['TRADING']['SYMBOL']).split(',') if s.strip()]
+BASE_TIMEFRAME, STRATEGY_TIMEFRAME = config['TRADING']['BASE_TIMEFRAME'], config['TRADING']['STRATEGY_TIMEFRAME']
+STATE_FILE, PAPER_ACCOUNT_STATE, TRADE_LOG = config['PATHS']['STATE_FILE'], config['PATHS']['PAPER_ACCOUNT_STATE'], config['PATHS']['TRADE_LOG']
+STREAM_URL = config.get('FEED', 'STREAM_URL', fallback='')
+SETTLE_DELAY, STREAM_GRACE = config.getfloat('FEED', 'SETTLE_DELAY', fallback=0.25), config.getfloat('FEED', 'STREAM_GRACE', fallback=2.0)
+MAX_CONCURRENT_REQUESTS = config.getint('FEED', 'MAX_CONCURRENT_REQUESTS', fallback=10)
+STRATEGY_PARAMS = strategy.StrategyParams.from_config(config)
+
+PAPER_TRADING = True
+PAPER_TRADE_INITIAL_BALANCE = 100.0
+TRADE_SOURCE = 'paper' if PAPER_TRADING else 'live'  # trade store stream
+EXECUTION_MOCK = config.getboolean('EXECUTION', 'MOCK', fallback=False)  # paper orders fill on the in-process mock exchange
+
+
+def symbol_path(file_path, symbol):
+    """Per-symbol variant of a file: reports/trade_log.csv -> reports/trade_log_ETH_USDT.csv."""
+    root, ext = os.path.splitext(file_path)
+    return f"{root}_{symbol.replace('/', '_').upper()}{ext}"
+
+
+class SymbolTrader:
+    """
+    Everything the scheduler keeps per symbol: candles, feature engine and scaler, position and
+    paper account. Without the frozen scaler file, each symbol fits its own on its warm-up window.
+    """
+
+    def __init__(self, symbol, scaler=None):
+        self.symbol, self.scaler = symbol, scaler
+        self.feed = MarketFeed(symbol, BASE_TIMEFRAME, STRATEGY_TIMEFRAME)
+        self.candles, self.engine = CandleStore(symbol, BASE_TIMEFRAME, STRATEGY_TIMEFRAME, root=CANDLE_CACHE_DIR), None
+        self.trade_log = symbol_path(TRADE_LOG, symbol)
+        self.store = StateStore(STATE_DB, scope=symbol)
+        self.store.import_json(symbol_path(STATE_FILE, symbol), symbol_path(PAPER_ACCOUNT_STATE, symbol), symbol_path("dashboard_state.json", symbol))
+        state = self.store.read()
+        self.current_position, self.paper_account, self.dashboard_data = state['current_position'], state['paper_account'], state['dashboard']
+        self.last_processed_timestamp = state['last_processed_timestamp']
+        if 'balance' not in self.paper_account: self.paper_account['balance'] = PAPER_TRADE_INITIAL_BALANCE
+
+    def next_candle(self):
+        """Syncs the feature engine and returns the latest unprocessed closed strategy candle, or None."""
+        self.engine, self.scaler, _ = sync_feature_engine(self.engine, self.scaler, self.feed)
+        candle = self.engine.last_row
+        if candle is None or candle['timestamp'] == self.last_processed_timestamp: return None
+        self.last_processed_timestamp = candle['timestamp']
+        return candle
+
+
+class MultiSymbolBot:
+    """
+    Runs many symbols in one asyncio process: one rate-limited exchange client, one copy of the
+    compiled models, one batched call scoring both models per cycle, and per-symbol state in the state store.
+    """
+
+    def __init__(self, symbols, exchange, models, scaler=None):
+        self.traders = {s: SymbolTrader(s, scaler) for s in symbols}
+        self.exchange, self.models, self.trade_store = exchange, models, TradeStore()
+        self.requests = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.clock, self.stream, self.publisher, self.execution = ExchangeClock(), None, None, None
+        self.scheduler = CandleCloseScheduler(timeframe_to_ms(STRATEGY_TIMEFRAME), self.clock)
+
+    async def sync_clock(self):
+        try:
+            sent_at = time.time(); server_ms = await self.exchange.fetch_time(); received_at = time.time()
+            self.clock.update(server_ms, sent_at, received_at)
+            print(f"🕒 Exchange clock offset: {self.clock.offset_ms:+.0f} ms (round trip {self.clock.round_trip_ms:.0f} ms)")
+        except Exception as e:
+            print(f"⚠️ Could not fetch exchange server time: {e}")
+
+    async def fetch_klines(self, symbol, since=None, limit=500):
+        """Full-field klines through the raw endpoint (ccxt's fetch_ohlcv drops trade count and taker volume), within the request limit."""
+        async with self.requests:
+            with metrics.timer('fetch_ohlcv'): return parse_klines(await self.exchange.publicGetKlines(kline_params(symbol, BASE_TIMEFRAME, since, limit)))
+
+    async def fetch_new_candles(self, trader, limit=500):
+        return trader.feed.add_ohlcv(await self.fetch_klines(trader.symbol, trader.feed.next_since, limit), self.clock.now_ms())
+
+    async def catch_up(self, candle_open):
+        """
+        Gives the stream up to STREAM_GRACE seconds to close the strategy candle opening at candle_open
+        on every feed, then REST-fetches only the symbols still missing it. Without a stream the
+        scheduler already waited SETTLE_DELAY past the close, so it fetches right away.
+        """
+        start = time.monotonic(); deadline = start + (STREAM_GRACE if self.stream else 0)
+        while True:
+            lagging = [t for t in self.traders.values() if not t.feed.wait_for_closed(candle_open, 0)]
+            if not lagging or time.monotonic() >= deadline: break
+            await asyncio.sleep(0.02)
+        metrics.observe('candle_wait', time.monotonic() - start); metrics.inc('rest_polls', len(lagging))
+        results = await asyncio.gather(*(self.fetch_new_candles(t) for t in lagging), return_exceptions=True)
+        for trader, result in zip(lagging, results):
+            if isinstance(result, Exception): print(f"❌ [{trader.symbol}] Candle fetch failed: {result}"); metrics.inc('fetch_failures')
+
+    async def connect_execution(self):
+        """Live orders go through the execution manager on the shared async client, with every symbol's market rules loaded up front; see live_bot.connect_execution."""
+        if not PAPER_TRADING: self.execution = ExecutionManager(self.exchange, list(self.traders), asyncio.get_running_loop(), await self.exchange.load_markets())
+        elif EXECUTION_MOCK: self.execution = await asyncio.to_thread(ExecutionManager, MockExchange(), list(self.traders))
+
+    def execute_trade(self, symbol):
+        """Order callback for strategy.step. It runs in a worker thread, which waits for the fill the manager places through the event loop."""
+        def execute(trade_type, amount, price):
+            if self.execution is None: return True
+            if isinstance(self.execution.exchange, MockExchange): self.execution.exchange.mark(symbol, price)
+            return self.execution.execute(symbol, trade_type, amount, price)
+        return execute
+
+    async def run_cycle(self, candle_open=None):
+        """Processes the strategy candle opening at candle_open (default: the last one closed) on every symbol."""
+        if candle_open is None: candle_open = self.scheduler.next_close() - 2 * self.scheduler.period_ms
+        await self.catch_up(candle_open)
+        with metrics.timer('fetch_balance'): usdt_balance = None if PAPER_TRADING else (await self.exchange.fetch_free_balance()).get('USDT', 0)
+        ready = []
+        with metrics.timer('features'):
+            for trader in self.traders.values():
+                candle = trader.next_candle()
+                if candle is not None: ready.append((trader, candle))
+        if ready:
+            matrix = np.vstack([candle['vector'] for _, candle in ready])
+            with metrics.timer('predict'): pred_long, pred_short = self.models.predict(matrix).T
+            metrics.observe('decision_latency', self.scheduler.latency_ms(candle_open) / 1000)
+            print(f"   {len(ready)} symbols scored {self.scheduler.latency_ms(candle_open):.0f} ms after the candle close.")
+        for i, (trader, candle) in enumerate(ready):
+            balance = trader.paper_account['balance'] if PAPER_TRADING else usdt_balance
+            print(f"📈 [{trader.symbol}] Close=${candle['close']:.2f} | Pred_Long: {pred_long[i]:.4f} | Pred_Short: {pred_short[i]:.4f}")
+            with metrics.timer('strategy'):
+                result = await asyncio.to_thread(strategy.step, trader.current_position, balance, candle, pred_long[i], pred_short[i], STRATEGY_PARAMS,
+                                                 trader.dashboard_data.get('sizing_info'), self.execute_trade(trader.symbol))
+            await self.handle_events(trader, result)
+            trader.current_position = result['position']
+            trader.dashboard_data = {"symbol": trader.symbol, "bot_status": "Analyzing", "last_update": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'), "paper_trading": PAPER_TRADING,
+                                     "account_balance": balance, "signal_analysis": result['signal_analysis'], "position_info": result['position_info'], "sizing_info": result['sizing_info'],
+                                     "decision_latency_ms": round(self.scheduler.latency_ms(candle_open), 1)}
+        summary = metrics.summary()
+        for trader, _ in ready: trader.dashboard_data['metrics'] = summary
+        with metrics.timer('state_commit'): await asyncio.to_thread(self.save_states, [t for t, _ in ready])
+        with metrics.timer('candle_cache'): await asyncio.to_thread(self.cache_candles)
+        return len(ready)
+
+    async def handle_events(self, trader, result):
+        if result['exit']:
+            trade = result['exit']; print(f"❗️ [{trader.symbol}] STOP-LOSS HIT ({trade['type'].upper()}). Exiting @ ${trade['exit_price']:.2f}")
+            record = {**trade, 'timestamp': datetime.now(timezone.utc), 'symbol': trader.symbol}
+            with metrics.timer('trade_log'):
+                await asyncio.to_thread(append_csv_log, record, trader.trade_log)
+                await asyncio.to_thread(self.trade_store.append, record, TRADE_SOURCE, trader.symbol, PAPER_TRADE_INITIAL_BALANCE)
+            send_telegram_message(f"[{trader.symbol}]\n" + format_exit_message(trade['type'], trade['entry_price'], trade['exit_price'], trade['pnl_usd'], trade['exit_reason']))
+            if PAPER_TRADING: trader.paper_account['balance'] += result['pnl']
+        if result['entry']:
+            entry = result['entry']; print(f"💡 [{trader.symbol}] Entry Signal: {entry['type'].upper()}")
+            send_telegram_message(f"[{trader.symbol}]\n" + format_entry_message(entry['type'], entry['entry_price'], entry['stop_loss'], entry['position_size_units'] * entry['entry_price'], entry['position_size_units']))
+
+    def save_states(self, traders):
+        for trader in traders:
+            trader.store.commit(trader.current_position, trader.paper_account if PAPER_TRADING else UNCHANGED, trader.dashboard_data, trader.last_processed_timestamp)
+            if self.publisher: self.publisher.publish(trader.store.scope, trader.dashboard_data)
+
+    def cache_candles(self):
+        """Appends the base candles each feed received since its last cache write."""
+        for trader in self.traders.values(): trader.candles.append(trader.feed.base.since(trader.candles.base.last_timestamp))
+
+    async def warm_up(self, window=500):
+        """Backfills every symbol's candle cache up to now, all pages concurrently, then seeds the feeds from the caches."""
+        start, now = time.perf_counter(), self.clock.now_ms()
+        pages = [(t, page) for t in self.traders.values() for page in t.candles.missing_pages(now, window)]
+        print(f"   Warming up {len(self.traders)} symbols from the candle cache, backfilling {len(pages)} pages of {BASE_TIMEFRAME} data...")
+        fetched = await asyncio.gather(*(self.fetch_klines(t.symbol, since, limit) for t, (since, limit) in pages))
+        for trader in self.traders.values():
+            added = await asyncio.to_thread(trader.candles.add_pages, [rows for (t, _), rows in zip(pages, fetched) if t is trader], now)
+            trader.feed.add_candles(trader.candles.base.tail(window))
+            print(f"   [{trader.symbol}] {added} candles fetched, {len(trader.feed.base)} in the feed.")
+        print(f"   Warm-up took {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+    async def run(self):
+        if MULTI_METRICS_PORT: metrics.serve(MULTI_METRICS_PORT)
+        if DASHBOARD_SOCKET: self.publisher = DashboardPublisher(DASHBOARD_SOCKET).start()
+        await self.sync_clock(); await self.connect_execution(); await self.warm_up()
+        self.stream = KlineStream([t.feed for t in self.traders.values()], STREAM_URL).start() if STREAM_URL else None
+        self.scheduler.delay_s = 0.0 if self.stream else SETTLE_DELAY
+        try:
+            while True:
+                # Wake at each strategy candle close (exchange time) and process only that closed candle.
+                close_ms = self.scheduler.next_close()
+                await asyncio.sleep(self.scheduler.seconds_until(close_ms))
+                try:
+                    start = time.perf_counter(); processed = await self.run_cycle(close_ms - self.scheduler.period_ms)
+                    metrics.observe('cycle', time.perf_counter() - start)
+                    print(f"✅ Cycle complete: {processed}/{len(self.traders)} symbols analyzed in {(time.perf_counter() - start) * 1000:.0f} ms.")
+                    if self.clock.due: await self.sync_clock()
+                except Exception as e:
+                    print(f"💥 UNEXPECTED ERROR: {e}"); traceback.print_exc(); metrics.inc('errors')
+        finally:
+            if self.stream: self.stream.stop()
+            if self.publisher: self.publisher.stop()
+            if self.execution: self.execution.close()
+
+
+async def main():
+    import ccxt.async_support as ccxt_async
+    api_key, api_secret = os.getenv('BINANCE_API_KEY') or config['API']['KEY'], os.getenv('BINANCE_API_SECRET') or config['API']['SECRET']
+    if not api_key or not api_secret:
+        raise ValueError("❌ CRITICAL: Binance API credentials not found! Set BINANCE_API_KEY and BINANCE_API_SECRET environment variables.")
+    print(f"🚀 Starting Champion Multi-Symbol Bot for {len(SYMBOLS)} symbols: {', '.join(SYMBOLS)}")
+    exchange = ccxt_async.binance({'apiKey': api_key, 'secret': api_secret, 'enableRateLimit': True})
+    try:
+        await MultiSymbolBot(SYMBOLS, exchange, champion_models.load_compiled_models(), champion_models.load_scaler()).run()
+    finally:
+        await exchange.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,37 +1,128 @@
 # src/notifications.py
 
-import requests
+import atexit
 import os
+import queue
+import threading
+import time
+
 from config import config # Import the central config object
+from metrics import metrics
 
 # --- LOAD SETTINGS FROM THE CENTRAL CONFIG ---
 # Use environment variables first, fallback to config
 TOKEN = os.getenv('TELEGRAM_BOT_TOKEN') or config.get('TELEGRAM', 'TOKEN', fallback=None)
 CHAT_ID = os.getenv('TELEGRAM_CHAT_ID') or config.get('TELEGRAM', 'CHAT_ID', fallback=None)
+API_URL = config.get('TELEGRAM', 'API_URL', fallback='https://api.telegram.org')
+MAX_MESSAGE_CHARS = 4096
+RESERVED_CHARS = r'_*[]()~`>#+-=|{}.!'
 
-def send_telegram_message(message):
-    """Sends a message to the configured Telegram chat with proper escaping."""
+def escape_markdown(message):
+    return "".join(['\\' + char if char in RESERVED_CHARS else char for char in message])
+
+def is_configured():
     if not TOKEN or "YOUR_TELEGRAM_BOT_TOKEN_HERE" in TOKEN:
-        print("Telegram TOKEN is not configured. Skipping notification.")
-        return
+        print("Telegram TOKEN is not configured. Skipping notification."); return False
     if not CHAT_ID or "YOUR_TELEGRAM_CHAT_ID_HERE" in CHAT_ID:
-        print("Telegram CHAT_ID is not configured. Skipping notification.")
-        return
-
-    reserved_chars = r'_*[]()~`>#+-=|{}.!'
-    escaped_message = "".join(['\\' + char if char in reserved_chars else char for char in message])
-
-    url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
-    payload = {'chat_id': CHAT_ID, 'text': escaped_message, 'parse_mode': 'MarkdownV2'}
-    
-    try:
-        response = requests.post(url, json=payload)
-        if response.status_code == 200:
-            print("✅ Telegram notification sent successfully.")
-        else:
-            print(f"❌ Failed to send Telegram notification. Status: {response.status_code}, Response: {response.text}")
-    except Exception as e:
-        print(f"❌ An exception occurred while sending Telegram notification: {e}")
+        print("Telegram CHAT_ID is not configured. Skipping notification."); return False
+    return True
+
+
+class TelegramDispatcher:
+    """
+    Sends Telegram messages from a background thread so the trading loop never waits on the API.
+    Messages go through a bounded queue; bursts that arrive within `coalesce_s` are merged into one
+    request; requests share a keep-alive session and are retried with backoff, honouring the
+    `retry_after` Telegram returns on HTTP 429. close() delivers whatever is still queued.
+    """
+
+    def __init__(self, token=TOKEN, chat_id=CHAT_ID, api_url=API_URL, max_queue=100, coalesce_s=0.5, timeout=10, max_retries=5, backoff_s=1.0):
+        self.url = f"{api_url.rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id, self.coalesce_s, self.timeout, self.max_retries, self.backoff_s = chat_id, coalesce_s, timeout, max_retries, backoff_s
+        self.queue = queue.Queue(maxsize=max_queue)
+        import requests  # loaded with the first notification rather than at bot start-up
+        self.session, self.request_error = requests.Session(), requests.RequestException
+        self.sent, self.failed, self.dropped = 0, 0, 0
+        self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+
+    def start(self):
+        self._thread.start(); return self
+
+    def send(self, message):
+        """Queues a message without blocking. Returns False (and counts a drop) if the queue is full."""
+        try:
+            self.queue.put_nowait(escape_markdown(message)); return True
+        except queue.Full:
+            self.dropped += 1; metrics.inc('telegram_dropped'); print(f"❌ Telegram queue full ({self.queue.maxsize}). Notification dropped."); return False
+
+    def close(self, timeout=30):
+        """Flushes the queue and stops the worker, waiting at most `timeout` seconds."""
+        if not self._thread.is_alive(): return
+        try: self.queue.put(None, timeout=timeout)
+        except queue.Full: pass
+        self._thread.join(timeout)
+        self.session.close()
+
+    def _next_batch(self, first):
+        """The first message plus any that arrive within the coalescing window, up to the size limit."""
+        texts, size, deadline, done = [first], len(first), time.monotonic() + self.coalesce_s, False
+        while True:
+            try: text = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty: break
+            if text is None: done = True; break
+            if size + len(text) + 2 > MAX_MESSAGE_CHARS: self._post("\n\n".join(texts)); texts, size = [], 0
+            texts.append(text); size += len(text) + 2
+        return "\n\n".join(texts), done
+
+    def _run(self):
+        while True:
+            first = self.queue.get()
+            if first is None: return
+            text, done = self._next_batch(first)
+            self._post(text)
+            if done: return
+
+    def _post(self, text):
+        payload, delay = {'chat_id': self.chat_id, 'text': text, 'parse_mode': 'MarkdownV2'}, self.backoff_s
+        for attempt in range(self.max_retries + 1):
+            try:
+                with metrics.timer('telegram_send'): response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code == 200:
+                    self.sent += 1; print("✅ Telegram notification sent successfully."); return True
+                if response.status_code == 429:
+                    try: delay = float(response.json().get('parameters', {}).get('retry_after', delay))
+                    except (ValueError, AttributeError): pass
+                elif response.status_code < 500:
+                    print(f"❌ Failed to send Telegram notification. Status: {response.status_code}, Response: {response.text}"); break
+                error = f"Status: {response.status_code}"
+            except self.request_error as e:
+                error = str(e)
+            if attempt < self.max_retries:
+                print(f"⚠️ Telegram send failed ({error}). Retrying in {delay:.1f}s..."); metrics.inc('telegram_retries'); time.sleep(delay); delay = min(delay * 2, 60)
+        self.failed += 1; metrics.inc('telegram_failures'); return False
+
+
+_dispatcher, _dispatcher_lock = None, threading.Lock()
+
+def get_dispatcher():
+    """The process-wide dispatcher, started on first use and flushed at interpreter exit."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = TelegramDispatcher().start(); atexit.register(_dispatcher.close)
+        return _dispatcher
+
+def send_telegram_message(message):
+    """Queues a message for the configured Telegram chat (escaped for MarkdownV2). Never blocks on the network."""
+    if not is_configured(): return False
+    return get_dispatcher().send(message)
+
+def flush_notifications(timeout=30):
+    """Delivers queued notifications and stops the dispatcher (a later send starts a new one)."""
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None: dispatcher.close(timeout)
 
 def format_entry_message(position_type, entry_price, stop_loss, size_usd, size_units):
     """Formats a message for a new trade entry."""
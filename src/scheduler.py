@@ -0,0 +1,64 @@
+# src/scheduler.py
+
+import time
+
+CLOCK_SYNC_INTERVAL_S = 30 * 60
+
+
+class ExchangeClock:
+    """
+    Local clock corrected by the exchange server-time offset. The offset is measured against the
+    midpoint of the request round trip and refreshed every `sync_interval_s`.
+    """
+
+    def __init__(self, sync_interval_s=CLOCK_SYNC_INTERVAL_S):
+        self.offset_ms, self.round_trip_ms, self.synced_at, self.sync_interval_s = 0.0, None, None, sync_interval_s
+
+    def update(self, server_ms, sent_at, received_at):
+        """Records one server-time sample; sent_at/received_at are local time.time() values around the request."""
+        self.round_trip_ms = (received_at - sent_at) * 1000
+        self.offset_ms = server_ms - (sent_at + received_at) * 500
+        self.synced_at = time.monotonic()
+        return self
+
+    def sync(self, exchange):
+        """Measures the offset with a (synchronous) ccxt exchange. Keeps the old offset if the request fails."""
+        try:
+            sent_at = time.time(); server_ms = exchange.fetch_time(); received_at = time.time()
+        except Exception as e:
+            print(f"⚠️ Could not fetch exchange server time: {e}"); return self
+        self.update(server_ms, sent_at, received_at)
+        print(f"🕒 Exchange clock offset: {self.offset_ms:+.0f} ms (round trip {self.round_trip_ms:.0f} ms)")
+        return self
+
+    @property
+    def due(self):
+        return self.synced_at is None or time.monotonic() - self.synced_at > self.sync_interval_s
+
+    def now_ms(self):
+        return time.time() * 1000 + self.offset_ms
+
+
+class CandleCloseScheduler:
+    """Sleeps until the next candle boundary of `period_ms` on the exchange clock, plus `delay_s`."""
+
+    def __init__(self, period_ms, clock, delay_s=0.0):
+        self.period_ms, self.clock, self.delay_s = period_ms, clock, delay_s
+
+    def next_close(self, now_ms=None):
+        """Server time (ms) of the next candle close strictly after now."""
+        now_ms = self.clock.now_ms() if now_ms is None else now_ms
+        return (int(now_ms) // self.period_ms + 1) * self.period_ms
+
+    def seconds_until(self, close_ms):
+        return max((close_ms - self.clock.now_ms()) / 1000 + self.delay_s, 0.0)
+
+    def wait_for_close(self, sleep=time.sleep):
+        """Blocks until the next boundary (+ delay). Returns the open time of the candle that just closed."""
+        close_ms = self.next_close()
+        while (remaining := self.seconds_until(close_ms)) > 0: sleep(remaining)
+        return close_ms - self.period_ms
+
+    def latency_ms(self, candle_open_ms):
+        """Time elapsed since the close of the candle that opened at candle_open_ms."""
+        return self.clock.now_ms() - (candle_open_ms + self.period_ms)
@@ -0,0 +1,106 @@
+# src/shadow.py
+
+import os
+import time
+
+import numpy as np
+
+import strategy
+from config import config
+from metrics import metrics
+from state_store import StateStore, STATE_DB
+from tree_inference import CompiledForest
+
+MODEL_DIR = config['PATHS']['MODEL_DIR']
+SHADOW_PREFIX = 'shadow.'
+CHAMPION = 'champion'
+
+
+def load_registry(model_dir=MODEL_DIR):
+    """Challenger pairs from [SHADOW] in config.ini, one `name = long_model.json, short_model.json` per line (files in MODEL_DIR)."""
+    if not config.has_section('SHADOW'): return []
+    registry = []
+    for name, value in config.items('SHADOW'):
+        files = [f.strip() for f in value.split(',') if f.strip()]
+        if len(files) != 2: raise ValueError(f"[SHADOW] {name} must name a long and a short model file, got '{value}'.")
+        registry.append((name, os.path.join(model_dir, files[0]), os.path.join(model_dir, files[1])))
+    return registry
+
+
+class VirtualBook:
+    """One model pair's paper trading: its position, balance and trade stats, kept under the `shadow.<name>` state scope."""
+
+    def __init__(self, name, state_path=STATE_DB, initial_balance=100.0):
+        self.name = name
+        self.store = StateStore(state_path, scope=SHADOW_PREFIX + name)
+        state = self.store.read()
+        self.position, self.account, self.sizing_info = state['current_position'], state['paper_account'], None
+        for key, value in (('balance', initial_balance), ('initial_balance', initial_balance), ('trades', 0), ('wins', 0), ('realized_pnl', 0.0), ('latency_us', 0.0)):
+            self.account.setdefault(key, value)
+
+    def step(self, candle, pred_long, pred_short, params, latency_s):
+        """Applies the live entry and trailing-stop rules to this pair's predictions. Returns the strategy.step result."""
+        result = strategy.step(self.position, self.account['balance'], candle, pred_long, pred_short, params, self.sizing_info)
+        if result['exit']:
+            self.account['balance'] += result['pnl']; self.account['realized_pnl'] += result['pnl']
+            self.account['trades'] += 1; self.account['wins'] += result['pnl'] > 0
+        self.position, self.sizing_info = result['position'], result['sizing_info']
+        self.account['last_prediction'] = [float(pred_long), float(pred_short)]
+        self.account['latency_us'] = round(float(latency_s) * 1e6, 2)
+        return result
+
+    def summary(self, price):
+        account, position = self.account, self.position
+        unrealized = strategy.position_pnl(position, price) if position else 0.0
+        return {'model': self.name, 'trades': account['trades'], 'win_rate': account['wins'] / account['trades'] if account['trades'] else None,
+                'realized_pnl': round(account['realized_pnl'], 4), 'unrealized_pnl': round(unrealized, 4), 'balance': round(account['balance'], 4),
+                'return_pct': round((account['balance'] + unrealized) / account['initial_balance'] * 100 - 100, 3),
+                'position': position['type'] if position else None, 'latency_us': account['latency_us']}
+
+    def commit(self):
+        self.store.commit(self.position, self.account)
+
+
+class ShadowModels:
+    """
+    The champion pair plus N challenger pairs compiled into one CompiledForest, so a single pass
+    over the candle's feature vector scores every model. Every pair, the champion included, also
+    trades virtually with the same strategy rules and starting balance, which keeps the comparison
+    independent of real order fills. Per-pair latency is the pair's share of the batched pass by
+    tree count, since the pairs are not run separately.
+    """
+
+    def __init__(self, champion_paths, registry, params, state_path=STATE_DB, initial_balance=100.0):
+        self.names = [CHAMPION] + [name for name, _, _ in registry]
+        if len(set(self.names)) != len(self.names): raise ValueError("Shadow model names must be unique (and not 'champion').")
+        self.forest = CompiledForest.load(*champion_paths, *(path for _, long_path, short_path in registry for path in (long_path, short_path)))
+        trees = np.diff(np.append(self.forest.model_starts, len(self.forest.roots)))
+        self.share = trees.reshape(-1, 2).sum(axis=1) / len(self.forest.roots)
+        self.params, self.last_pass_s = params, 0.0
+        self.books = [VirtualBook(name, state_path, initial_balance) for name in self.names]
+        print(f"✅ Shadow mode: champion + {len(registry)} challengers compiled ({len(self.forest.roots)} trees, depth {self.forest.depth}).")
+
+    def predict_all(self, vector):
+        """(pairs, 2) array of [pred_long, pred_short], champion first, from one pass over the forest."""
+        start = time.perf_counter()
+        preds = np.asarray(self.forest.predict_row(vector)).reshape(-1, 2)
+        self.last_pass_s = time.perf_counter() - start
+        return preds
+
+    def predict_row(self, vector):
+        """The champion's (pred_long, pred_short); the whole registry is scored in the same pass and kept for step()."""
+        self.last_predictions = self.predict_all(vector)
+        return tuple(self.last_predictions[0].tolist())
+
+    def step(self, candle, predictions=None):
+        """Advances every virtual book on a closed candle and commits them."""
+        predictions = self.last_predictions if predictions is None else predictions
+        with metrics.timer('shadow_step'):
+            for book, (pred_long, pred_short), share in zip(self.books, predictions, self.share):
+                result = book.step(candle, pred_long, pred_short, self.params, self.last_pass_s * share)
+                if result['exit']: metrics.inc('shadow_trades')
+                book.commit()
+
+    def leaderboard(self, price):
+        """Per-model summaries, best total return first."""
+        return sorted((book.summary(price) for book in self.books), key=lambda s: s['return_pct'], reverse=True)
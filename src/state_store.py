@@ -0,0 +1,118 @@
+# src/state_store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import config
+
+STATE_DB = config.get('PATHS', 'STATE_DB', fallback='state.db')
+DASHBOARD_PREFIX = 'dashboard.'
+UNCHANGED = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (scope, key)
+)
+"""
+
+
+class StateStore:
+    """
+    Bot state in SQLite (WAL mode): the open position, the paper account, the last processed candle and the dashboard
+    status for one scope (a symbol, or '' for the single-symbol bot). commit() writes only the
+    values that changed since the last commit, all in one transaction, so a crash leaves either
+    the previous or the new cycle on disk. Readers get a consistent snapshot from a single query
+    and never block the writer. Dashboard fields are stored one row each, so a cycle that only
+    moves `last_update` rewrites one small row.
+    """
+
+    def __init__(self, path=STATE_DB, scope=''):
+        self.path, self.scope = path, scope
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL"); self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+        self.lock, self.written = threading.Lock(), self._rows()
+        self.writes = 0
+
+    def _rows(self):
+        return dict(self.conn.execute("SELECT key, value FROM state WHERE scope = ?", (self.scope,)).fetchall())
+
+    def is_empty(self):
+        return not self.written
+
+    def read(self):
+        """{'current_position', 'paper_account', 'dashboard', 'last_processed_timestamp'} as of the last committed cycle."""
+        return unpack(self._rows())
+
+    def commit(self, current_position=UNCHANGED, paper_account=UNCHANGED, dashboard=UNCHANGED, last_processed_timestamp=UNCHANGED):
+        """
+        Atomically stores the cycle's state. Arguments that are not passed are left as they are; a
+        dashboard dict replaces the previous one field by field. Returns the number of rows written or removed.
+        """
+        rows = {k: v for k, v in (('current_position', current_position), ('paper_account', paper_account), ('last_processed_timestamp', last_processed_timestamp)) if v is not UNCHANGED}
+        if dashboard is not UNCHANGED: rows.update({DASHBOARD_PREFIX + k: v for k, v in dashboard.items()})
+        encoded = {k: json.dumps(v, sort_keys=True) for k, v in rows.items()}
+        with self.lock:
+            changed = {k: v for k, v in encoded.items() if self.written.get(k) != v}
+            removed = [k for k in self.written if dashboard is not UNCHANGED and k.startswith(DASHBOARD_PREFIX) and k not in encoded]
+            if not changed and not removed: return 0
+            now = time.time()
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany("INSERT INTO state (scope, key, value, updated_at) VALUES (?, ?, ?, ?) ON CONFLICT(scope, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                                      [(self.scope, k, v, now) for k, v in changed.items()])
+                self.conn.executemany("DELETE FROM state WHERE scope = ? AND key = ?", [(self.scope, k) for k in removed])
+            self.written.update(changed)
+            for k in removed: del self.written[k]
+            self.writes += len(changed) + len(removed)
+            return len(changed) + len(removed)
+
+    def import_json(self, state_file, paper_file, dashboard_file):
+        """One-time migration from the legacy JSON state files, if the store is still empty."""
+        if not self.is_empty(): return False
+        legacy = [load_json(p) for p in (state_file, paper_file, dashboard_file)]
+        if not any(legacy): return False
+        self.commit(legacy[0].get('current_position'), *(d if d else UNCHANGED for d in legacy[1:]))
+        print(f"✅ Imported legacy state files into {self.path} ({self.scope or 'default'})."); return True
+
+    def close(self):
+        self.conn.close()
+
+
+def unpack(rows):
+    values = {k: json.loads(v) for k, v in rows.items()}
+    return {'current_position': values.get('current_position'), 'paper_account': values.get('paper_account') or {}, 'last_processed_timestamp': values.get('last_processed_timestamp'),
+            'dashboard': {k[len(DASHBOARD_PREFIX):]: v for k, v in values.items() if k.startswith(DASHBOARD_PREFIX)}}
+
+
+def load_json(file_path):
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, 'r') as f: return json.load(f)
+        except json.JSONDecodeError: return {}
+    return {}
+
+
+def read_state(path=STATE_DB, scope=''):
+    """Read-only snapshot for other processes (e.g. the dashboard); None if the bot has not written yet."""
+    if not os.path.exists(path): return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try: rows = dict(conn.execute("SELECT key, value FROM state WHERE scope = ?", (scope,)).fetchall())
+    except sqlite3.OperationalError: return None
+    finally: conn.close()
+    return unpack(rows) if rows else None
+
+
+def list_scopes(path=STATE_DB):
+    if not os.path.exists(path): return []
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try: return [r[0] for r in conn.execute("SELECT DISTINCT scope FROM state ORDER BY scope")]
+    except sqlite3.OperationalError: return []
+    finally: conn.close()
@@ -0,0 +1,117 @@
+# src/stop_watcher.py
+
+import json
+import threading
+import time
+
+from metrics import metrics
+from market_feed import now_ms, stream_symbol
+import strategy
+
+
+def parse_price_message(message):
+    """Binance trade / aggTrade / markPriceUpdate payload (single or combined stream) -> (stream symbol, price, event time ms)."""
+    data = json.loads(message); data = data.get('data', data)
+    if data.get('e') not in ('trade', 'aggTrade', 'markPriceUpdate'): return None, None, None
+    return data['s'].lower(), float(data['p']), int(data.get('T') or data['E'])
+
+
+def trade_message(symbol, price, quantity=0.001, timestamp=None):
+    """Builds a Binance-format trade event; used by the tick replay server."""
+    timestamp = timestamp or now_ms()
+    return json.dumps({'e': 'trade', 'E': timestamp, 's': stream_symbol(symbol).upper(), 't': timestamp, 'p': str(price), 'q': str(quantity), 'T': timestamp, 'm': False})
+
+
+class StopWatcher:
+    """
+    Watches a trade (or mark-price) websocket and fires the exit as soon as a print crosses the
+    stop of the open position, instead of waiting for the next candle close. The trading loop
+    arm()s it with the position after every cycle (the stop is still trailed on the candle
+    cadence) and the watcher fires at most once per arm, unless `on_stop(position, price, event_ms)`
+    returns False (the exit did not go through): then it re-arms with the same position and fires
+    again on the next crossing print. `on_stop` and the optional `on_tick(price, event_ms)`, called
+    for every print, run on the watcher thread.
+    """
+
+    def __init__(self, symbol, url, on_stop, on_tick=None):
+        self.symbol, self.url, self.on_stop, self.on_tick = stream_symbol(symbol), url, on_stop, on_tick
+        self.position, self.side, self.level, self.last_price = None, None, None, None
+        self.lock, self.connected, self._stop, self._ws = threading.Lock(), threading.Event(), threading.Event(), None
+        self._thread = threading.Thread(target=self._run, name=f"stop-{self.symbol}", daemon=True)
+
+    def start(self):
+        self._thread.start(); return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._ws is not None: self._ws.close()
+        self._thread.join(timeout)
+
+    def arm(self, position):
+        """Watches `position` (or nothing, if it is None) at its current stop level."""
+        with self.lock:
+            self.position = position
+            self.side, self.level = (position['type'], position['stop_loss']) if position else (None, None)
+
+    def disarm(self):
+        self.arm(None)
+
+    def on_price(self, price, event_ms=None):
+        """Checks one price print. Returns True if it fired the exit."""
+        with self.lock:
+            self.last_price = price
+            if self.position is None or not strategy.stop_crossed(self.side, self.level, price): return False
+            position = self.position; self.position = None
+        metrics.inc('stop_triggers')
+        with metrics.timer('stop_exit'): exited = self.on_stop(position, price, event_ms or now_ms())
+        if exited is False:
+            with self.lock:
+                if self.position is None and self.side == position['type']: self.position = position  # unless arm() has moved on meanwhile
+        return True
+
+    def _run(self):
+        from websockets.sync.client import connect
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                with connect(self.url, open_timeout=10) as ws:
+                    self._ws = ws; self.connected.set(); backoff = 1
+                    print(f"✅ Stop watcher connected: {self.url}")
+                    for message in ws:
+                        symbol, price, event_ms = parse_price_message(message)
+                        if price is None or symbol != self.symbol: continue
+                        self.on_price(price, event_ms)
+                        if self.on_tick: self.on_tick(price, event_ms)
+            except Exception as e:
+                if self._stop.is_set(): break
+                print(f"❌ Stop watcher stream error: {e}. Reconnecting in {backoff}s..."); metrics.inc('stop_stream_reconnects')
+            finally:
+                self.connected.clear(); self._ws = None
+            self._stop.wait(backoff); backoff = min(backoff * 2, 60)
+
+
+class TickReplayServer:
+    """
+    Local stand-in for the exchange trade websocket. Sends each (timestamp, price) tick to every
+    client that connects, `interval_s` apart, recording when each one went out (perf_counter),
+    so stop reactions can be measured offline.
+    """
+
+    def __init__(self, ticks, symbol='BTC/USDT', host='127.0.0.1', port=0, interval_s=0.0):
+        self.ticks, self.symbol, self.interval_s, self.sent_at = list(ticks), symbol, interval_s, []
+        from websockets.sync.server import serve
+        self._server = serve(self._handle, host, port)
+        self.url = f"ws://{host}:{self._server.socket.getsockname()[1]}/{stream_symbol(symbol)}@trade"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="tick-replay", daemon=True)
+
+    def start(self):
+        self._thread.start(); return self
+
+    def stop(self):
+        self._server.shutdown(); self._thread.join(5)
+
+    def _handle(self, ws):
+        for timestamp, price in self.ticks:
+            if self.interval_s: time.sleep(self.interval_s)
+            self.sent_at.append(time.perf_counter()); ws.send(trade_message(self.symbol, price, timestamp=timestamp))
+        for _ in ws: pass  # hold the connection open until the client leaves
@@ -0,0 +1,136 @@
+# src/strategy.py
+
+from dataclasses import dataclass
+
+EXIT_SIDE = {'long': 'sell', 'short': 'buy'}
+ENTRY_SIDE = {'long': 'buy', 'short': 'sell'}
+
+
+@dataclass(frozen=True)
+class StrategyParams:
+    """Trading parameters from the [TRADING] section of config.ini."""
+    long_threshold: float = 0.005
+    short_threshold: float = 0.005
+    risk_per_trade_pct: float = 0.02
+    max_allocation_pct: float = 0.5
+    atr_multiplier_sl: float = 2.0
+    volatility_filter: float = 1.0  # volatility must reach this fraction of its 50-period average
+
+    @classmethod
+    def from_config(cls, config):
+        get = lambda key: config.getfloat('TRADING', key)
+        return cls(get('LONG_THRESHOLD'), get('SHORT_THRESHOLD'), get('RISK_PER_TRADE_PCT'), get('MAX_ALLOCATION_PCT'), get('ATR_MULTIPLIER_SL'), get('VOLATILITY_FILTER'))
+
+
+def analyze_signal(pred_long, pred_short, candle, params):
+    """The signal checklist shown on the dashboard and used for entries."""
+    go_long, go_short = bool(pred_long > params.long_threshold), bool(pred_short > params.short_threshold)
+    return {"Latest Price": float(candle['close']), "Pred Long": float(pred_long), "Pred Short": float(pred_short), "Long Threshold": params.long_threshold, "Short Threshold": params.short_threshold,
+            "Go Long Signal": go_long, "Go Short Signal": go_short, "Is Clear Signal": go_long != go_short,
+            "Volatility": float(candle['volatility_10']), "Volatility Filter": float(candle['volatility_filter']), "Volatility Passed": bool(candle['volatility_10'] >= candle['volatility_filter'] * params.volatility_filter)}
+
+
+def position_pnl(position, price):
+    if position['type'] == 'long': return (price - position['entry_price']) * position['position_size_units']
+    return (position['entry_price'] - price) * position['position_size_units']
+
+
+def closed_pnl(position, exit_price, exit_fee=0.0):
+    """Realized PnL net of the entry and exit fees (fees are only known for exchange fills)."""
+    return position_pnl(position, exit_price) - position.get('fees_usd', 0.0) - exit_fee
+
+
+def fill_terms(fill, price, amount):
+    """What an execute() callback reported: (price, units, fee in quote currency). A plain True means filled as asked, without fees."""
+    if isinstance(fill, dict): return fill['price'], fill['amount'], fill.get('fee', 0.0)
+    return price, amount, 0.0
+
+
+def exited_part(position, units):
+    """The part of `position` an exit filled: `units` of it, with that share of the entry fee."""
+    if units == position['position_size_units']: return position
+    part = {**position, 'position_size_units': units}
+    if 'fees_usd' in position: part['fees_usd'] = position['fees_usd'] * units / position['position_size_units']
+    return part
+
+
+def position_snapshot(position, price):
+    pnl = position_pnl(position, price)
+    return {"type": position['type'], "entry_price": position['entry_price'], "size_units": position['position_size_units'], "size_usd": position['position_size_units'] * position['entry_price'],
+            "stop_loss": position['stop_loss'], "unrealized_pnl_usd": pnl, "unrealized_pnl_pct": (pnl / (position['entry_price'] * position['position_size_units'])) * 100}
+
+
+def stop_crossed(position_type, stop_loss, price):
+    return price <= stop_loss if position_type == 'long' else price >= stop_loss
+
+
+def trail_stop(position, close, atr, params):
+    """Ratchets the stop-loss towards price. Returns the exit price (the stop level) if it was hit."""
+    if position['type'] == 'long': position['stop_loss'] = max(position['stop_loss'], close - (atr * params.atr_multiplier_sl))
+    else: position['stop_loss'] = min(position['stop_loss'], close + (atr * params.atr_multiplier_sl))
+    return position['stop_loss'] if stop_crossed(position['type'], position['stop_loss'], close) else None
+
+
+def plan_entry(position_type, entry_price, atr, balance, params):
+    """Fixed-fractional sizing with an ATR stop. Returns (sizing_info, position size or None if the risk is not positive)."""
+    if position_type == 'long': sl_price = entry_price - (atr * params.atr_multiplier_sl); risk_per_unit = entry_price - sl_price
+    else: sl_price = entry_price + (atr * params.atr_multiplier_sl); risk_per_unit = sl_price - entry_price
+    sizing_info = {"account_balance": balance, "risk_per_trade_pct": params.risk_per_trade_pct, "capital_to_risk_usd": balance * params.risk_per_trade_pct, "entry_price": entry_price,
+                   "stop_loss_price": sl_price, "risk_per_unit_usd": risk_per_unit, "calculated_position_size": (balance * params.risk_per_trade_pct) / risk_per_unit if risk_per_unit > 0 else 0}
+    if risk_per_unit <= 0: return sizing_info, None
+    pos_size, max_pos_value = sizing_info['calculated_position_size'], balance * params.max_allocation_pct
+    if (pos_size * entry_price) > max_pos_value: pos_size = max_pos_value / entry_price
+    return sizing_info, pos_size
+
+
+def trade_record(position, exit_price, pnl, exit_reason, timestamp):
+    """A row of the trade log (reports/trade_log.csv)."""
+    return {'timestamp': timestamp, 'type': position['type'], 'entry_price': position['entry_price'], 'exit_price': exit_price,
+            'size_usd': position['position_size_units'] * position['entry_price'], 'pnl_usd': pnl, 'exit_reason': exit_reason}
+
+
+def step(position, balance, candle, pred_long, pred_short, params, sizing_info=None, execute=None):
+    """
+    One candle of the live decision logic: trail and check the stop of an open position,
+    then look for a new entry if flat. `balance` is the balance at the start of the cycle
+    (an exit on this candle does not change the sizing of a re-entry on the same candle).
+    `execute(side, amount, price)` places the order and returns True on success, or the
+    fill record (see fill_terms), in which case the fill price, amount and fees are booked.
+
+    Returns a dict with the updated `position`, the dashboard `signal_analysis`,
+    `position_info` and `sizing_info`, plus `exit` (trade record) and `entry` events.
+    """
+    execute = execute or (lambda side, amount, price: True)
+    signal = analyze_signal(pred_long, pred_short, candle, params)
+    close, atr = candle['close'], candle['atr']
+    result = {'signal_analysis': signal, 'position_info': None, 'sizing_info': sizing_info, 'exit': None, 'entry': None, 'pnl': 0.0}
+
+    if position:
+        result['position_info'] = position_snapshot(position, close)
+        exit_price = trail_stop(position, close, atr, params)
+        fill = exit_price is not None and execute(EXIT_SIDE[position['type']], position['position_size_units'], exit_price)
+        if fill:
+            exit_price, units, fee = fill_terms(fill, exit_price, position['position_size_units'])
+            closed = exited_part(position, units)  # a lot-size remainder the exchange would not sell is not booked
+            pnl = closed_pnl(closed, exit_price, fee)
+            result['exit'] = trade_record(closed, exit_price, pnl, 'stop_loss', candle['timestamp'])
+            result['pnl'], position = pnl, None
+
+    if not position:
+        result['position_info'] = None
+        if signal['Volatility Passed']:
+            go_long, go_short = signal['Go Long Signal'], signal['Go Short Signal']
+            position_type = 'long' if go_long and not go_short else 'short' if go_short and not go_long else None
+            if position_type:
+                result['sizing_info'], pos_size = plan_entry(position_type, close, atr, balance, params)
+                fill = pos_size is not None and execute(ENTRY_SIDE[position_type], pos_size, close)
+                if fill:
+                    entry_price, units, fee = fill_terms(fill, close, pos_size)
+                    position = {'type': position_type, 'entry_price': entry_price, 'stop_loss': result['sizing_info']['stop_loss_price'], 'position_size_units': units}
+                    if fee: position['fees_usd'] = fee
+                    result['entry'] = position
+        else:
+            result['sizing_info'] = None
+
+    result['position'] = position
+    return result
@@ -0,0 +1,121 @@
+# src/sweep.py
+
+import argparse
+import hashlib
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import backtester
+import champion_models
+from config import config
+from data_store import CandleStore
+from strategy import StrategyParams
+
+CACHE_DIR = config.get('PATHS', 'CACHE_DIR', fallback='data/cache')
+REPORT_DIR = config['PATHS']['REPORT_DIR']
+SWEEP_PARAMS = ['long_threshold', 'short_threshold', 'volatility_filter', 'risk_per_trade_pct', 'atr_multiplier_sl']
+DEFAULT_GRID = {
+    'long_threshold': [0.003, 0.004, 0.005, 0.006, 0.007, 0.008],
+    'short_threshold': [0.003, 0.004, 0.005, 0.006, 0.007, 0.008],
+    'volatility_filter': [0.6, 0.7, 0.8, 0.9, 1.0],
+    'risk_per_trade_pct': [0.01, 0.02, 0.03],
+    'atr_multiplier_sl': [1.0, 1.5, 2.0, 2.5, 3.0],
+}
+
+
+def cache_key(data_file):
+    """Identifies a prediction cache by the history file and the model/scaler artifacts it was built from."""
+    digest = hashlib.sha1()
+    for path in (data_file, os.path.join(champion_models.MODEL_DIR, champion_models.LONG_MODEL_NAME), os.path.join(champion_models.MODEL_DIR, champion_models.SHORT_MODEL_NAME), os.path.join(champion_models.MODEL_DIR, champion_models.SCALER_NAME)):
+        stat = os.stat(path) if os.path.exists(path) else None
+        digest.update(f"{os.path.abspath(path)}:{stat.st_size if stat else '-'}:{stat.st_mtime_ns if stat else '-'}".encode())
+    digest.update(str(CandleStore(backtester.SYMBOL).view.last_timestamp).encode())
+    return digest.hexdigest()[:16]
+
+
+def build_cache(data_file=backtester.DATA_FILE, cache_dir=CACHE_DIR):
+    """Computes features, ATR and both model predictions once and stores them as .npy columns. Returns the cache directory."""
+    path = os.path.join(cache_dir, f"predictions_{cache_key(data_file)}")
+    if os.path.exists(os.path.join(path, 'pred_short.npy')):
+        print(f"✅ Using cached predictions from {path}"); return path
+    data = backtester.prepare_predictions(data_file)
+    os.makedirs(path, exist_ok=True)
+    for name, values in data.items(): np.save(os.path.join(path, f"{name}.npy"), np.asarray(values))
+    print(f"✅ Predictions cached to {path}"); return path
+
+
+def load_cache(path):
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in ['timestamp', *backtester.SIMULATION_INPUTS]}
+
+
+def grid_params(grid, base):
+    keys = list(grid)
+    return [base.__class__(**{**base.__dict__, **dict(zip(keys, values))}) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def random_params(grid, base, count, seed=0):
+    """Random search within the min/max range of each grid axis."""
+    rng = np.random.default_rng(seed)
+    draws = {k: rng.uniform(min(v), max(v), count) for k, v in grid.items()}
+    return [base.__class__(**{**base.__dict__, **{k: float(draws[k][i]) for k in grid}}) for i in range(count)]
+
+
+_worker_data = None
+
+def _init_worker(path, initial_balance):
+    """Each worker memory-maps the cache once and keeps close/ATR as lists for the simulation loop."""
+    global _worker_data
+    data = load_cache(path)
+    _worker_data = {'close_l': np.asarray(data['close']).tolist(), 'atr_l': np.asarray(data['atr']).tolist(), 'initial_balance': initial_balance,
+                    **{k: np.asarray(data[k]) for k in ('volatility', 'volatility_filter', 'pred_long', 'pred_short')}}
+
+
+def _evaluate_chunk(params_chunk):
+    d, rows = _worker_data, []
+    for params in params_chunk:
+        trades, final_balance, _ = backtester.simulate_prepared(d['close_l'], d['atr_l'], d['volatility'], d['volatility_filter'], d['pred_long'], d['pred_short'], params, d['initial_balance'])
+        summary = backtester.summarize([t[5] for t in trades], d['initial_balance'], final_balance)
+        rows.append({**{k: getattr(params, k) for k in SWEEP_PARAMS}, **summary})
+    return rows
+
+
+def run_sweep(params_list, cache_path, workers=None, chunk_size=16, initial_balance=backtester.INITIAL_BALANCE):
+    """Evaluates every parameter set against the cached predictions across a process pool."""
+    chunks = [params_list[i:i + chunk_size] for i in range(0, len(params_list), chunk_size)]
+    rows, start = [], time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_path, initial_balance)) as pool:
+        for i, chunk_rows in enumerate(pool.map(_evaluate_chunk, chunks), 1):
+            rows.extend(chunk_rows)
+            if i % max(len(chunks) // 10, 1) == 0: print(f"   {len(rows):,}/{len(params_list):,} configurations evaluated ({time.perf_counter() - start:.1f}s)")
+    return pd.DataFrame(rows).sort_values('return_pct', ascending=False, ignore_index=True)
+
+
+def parse_axis(text):
+    return [float(v) for v in text.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluate many trading parameter sets against cached model predictions.")
+    parser.add_argument('--data', default=backtester.DATA_FILE)
+    parser.add_argument('--random', type=int, default=0, help="Random search with this many samples instead of the full grid.")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    for name in SWEEP_PARAMS: parser.add_argument(f"--{name.replace('_', '-')}", type=parse_axis, help="Comma-separated values")
+    args = parser.parse_args()
+
+    grid = {name: getattr(args, name) or DEFAULT_GRID[name] for name in SWEEP_PARAMS}
+    base = StrategyParams.from_config(config)
+    params_list = random_params(grid, base, args.random, args.seed) if args.random else grid_params(grid, base)
+    cache_path = build_cache(args.data)
+    print(f"🔎 Sweeping {len(params_list):,} configurations on {args.workers or os.cpu_count()} workers...")
+    start = time.perf_counter()
+    results = run_sweep(params_list, cache_path, args.workers)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    out_file = os.path.join(REPORT_DIR, 'sweep_results.csv'); results.to_csv(out_file, index=False)
+    print(f"✅ Sweep complete in {time.perf_counter() - start:.1f}s. Results: {out_file}")
+    print(results.head(10).to_string())
@@ -0,0 +1,44 @@
+# src/test_backtester.py
+
+import time
+import numpy as np
+import strategy
+from backtester import simulate, INITIAL_BALANCE
+from strategy import StrategyParams
+
+def make_inputs(n, seed=11):
+    """Synthetic price path, ATR, volatility and model predictions that produce plenty of trades."""
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    atr = np.abs(rng.normal(60, 20, n)); atr[rng.random(n) < 0.001] = 0.0
+    volatility = rng.random(n); volatility_filter = rng.random(n) * 0.9
+    pred_long, pred_short = rng.normal(0.003, 0.003, n), rng.normal(0.003, 0.003, n)
+    return close, atr, volatility, volatility_filter, pred_long, pred_short
+
+def stepped_run(close, atr, volatility, volatility_filter, pred_long, pred_short, params):
+    """Replays the candles one by one through strategy.step, exactly as run_bot does."""
+    position, balance, trades = None, INITIAL_BALANCE, []
+    for i in range(len(close)):
+        candle = {'timestamp': i, 'close': float(close[i]), 'atr': float(atr[i]), 'volatility_10': volatility[i], 'volatility_filter': volatility_filter[i]}
+        result = strategy.step(position, balance, candle, pred_long[i], pred_short[i], params)
+        if result['exit']:
+            e = result['exit']; trades.append((i, e['type'], e['entry_price'], e['exit_price'], e['size_usd'], e['pnl_usd']))
+            balance += result['pnl']
+        position = result['position']
+    return trades, balance, position
+
+def run_test():
+    """Checks that the vectorized simulator reproduces the stepped live decision logic trade for trade."""
+    print("--- Backtester Parity Test ---")
+    inputs = make_inputs(200_000)
+    for params in (StrategyParams(), StrategyParams(volatility_filter=0.8, atr_multiplier_sl=1.5)):
+        start = time.perf_counter(); fast = simulate(*inputs, params); fast_time = time.perf_counter() - start
+        start = time.perf_counter(); stepped = stepped_run(*inputs, params); stepped_time = time.perf_counter() - start
+        print(f"{params}\n   Trades: {len(fast[0])} | Final balance: ${fast[1]:,.2f} | simulate: {fast_time:.2f}s | stepped: {stepped_time:.2f}s")
+        assert fast[0] == stepped[0], "Trade lists differ"
+        assert fast[1] == stepped[1], "Final balances differ"
+        assert fast[2] == stepped[2], "Open positions differ"
+    print("\n✅ Backtester matches the stepped live logic.")
+
+if __name__ == '__main__':
+    run_test()
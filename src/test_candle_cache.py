@@ -0,0 +1,75 @@
+# src/test_candle_cache.py
+
+import json
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from binance_public import BinancePublicClient, fetch_klines
+from data_store import CandleStore, aggregate_candles
+
+MINUTE = 60_000
+
+def kline(ts):
+    """Deterministic Binance kline for an open time, so any page can be checked against it."""
+    price = 30000 + 500 * np.sin(ts / 3.6e6)
+    return [ts, str(price), str(price + 5), str(price - 5), str(price + 1), '12.5', ts + MINUTE - 1, '375000.0', int(ts // MINUTE % 97), str(ts // MINUTE % 7 + 0.5), '0', '0']
+
+class BinanceStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for GET /api/v3/klines: `server.delay` seconds per request, one HTTP 429 first, and the weight header."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        server = self.server; time.sleep(server.delay)
+        with server.lock:
+            server.requests.append(self.client_address); server.weight += 2
+            throttle = server.throttle > 0; server.throttle -= 1
+        if throttle: status, body, headers = 429, {'code': -1003, 'msg': 'Too many requests.'}, {'Retry-After': '0'}
+        else:
+            start, limit = int(query['startTime']), int(query['limit'])
+            status, body, headers = 200, [kline(ts) for ts in range(start, min(start + limit * MINUTE, server.now - server.now % MINUTE + MINUTE), MINUTE)], {}
+        data = json.dumps(body).encode()
+        self.send_response(status); self.send_header('Content-Length', str(len(data))); self.send_header('X-MBX-USED-WEIGHT-1M', str(server.weight))
+        for k, v in headers.items(): self.send_header(k, v)
+        self.end_headers(); self.wfile.write(data)
+
+    def log_message(self, *args): pass
+
+def run_test():
+    """Backfills an empty cache, then a 3-day outage, against a local klines stand-in; checks continuity, kline fields, parallelism and 429 handling."""
+    print("--- Candle Cache Test ---")
+    root = tempfile.mkdtemp(prefix='candle_cache_')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), BinanceStandIn)
+    server.requests, server.weight, server.throttle, server.delay, server.lock = [], 0, 1, 0.2, threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = BinancePublicClient(f"http://127.0.0.1:{server.server_address[1]}")
+    fetch_page = lambda since, limit: fetch_klines(client, 'BTC/USDT', '1m', since, limit)
+    try:
+        store = CandleStore('BTC/USDT', '1m', '3min', root=root)
+        server.now = now = int(time.time() * 1000) - 4 * 86_400_000
+        added = store.backfill(fetch_page, now, window=500)
+        print(f"   Empty cache: {added} candles | requests {len(server.requests)} (one 429 retried)")
+        assert added == 500 and store.base.last_timestamp == now - now % MINUTE - MINUTE, "Warm-up window not cached up to the last closed candle"
+        assert store.backfill(fetch_page, now - now % MINUTE + MINUTE - 1, window=500) == 0, "An up-to-date cache should not fetch anything"
+
+        server.now = now = now + 3 * 86_400_000; server.requests.clear()
+        pages = store.missing_pages(now)
+        start = time.perf_counter(); added = store.backfill(fetch_page, now, window=500, workers=4); elapsed = time.perf_counter() - start
+        print(f"   After a 3-day outage: {added} candles in {len(pages)} pages | {elapsed * 1000:.0f} ms over {len(set(server.requests))} connections "
+              f"(sequential would take >= {len(pages) * server.delay * 1000:.0f} ms) | weight reported {client.used_weight}")
+        rows = store.base.read_rows()
+        assert np.all(np.diff(rows['timestamp']) == MINUTE) and len(rows) == 500 + 3 * 1440, "Cache has gaps or duplicates after the backfill"
+        expected = np.array([kline(ts) for ts in rows['timestamp'][::997].tolist()], dtype=object)
+        assert np.allclose(rows['number_of_trades'][::997], expected[:, 8].astype(float)) and np.allclose(rows['taker_buy_base_asset_volume'][::997], expected[:, 9].astype(float)), "Trade count / taker buy volume were not stored"
+        assert len(set(server.requests)) > 1 and elapsed < 0.6 * len(pages) * server.delay, "Pages were not fetched in parallel"
+        assert store.view.last_timestamp == aggregate_candles(rows, MINUTE, 3 * MINUTE)['timestamp'][-1], "Strategy-timeframe view not extended"
+        print("\n✅ Cache backfills gaps in parallel and keeps the full kline fields.")
+    finally:
+        server.shutdown(); shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == '__main__':
+    run_test()
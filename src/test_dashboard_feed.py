@@ -0,0 +1,64 @@
+# src/test_dashboard_feed.py
+
+import os
+import socket
+import tempfile
+import time
+import numpy as np
+from dashboard_feed import DashboardPublisher, DashboardSubscriber
+from metrics import metrics
+
+def dashboard(i, padding=0):
+    """A dashboard update shaped like the live bot's, with optional padding to fill socket buffers."""
+    return {"bot_status": "Analyzing", "account_balance": 100.0 + i, "position_info": {"type": "long", "unrealized_pnl_usd": i / 10} if i % 2 else None, "metrics": "x" * padding,
+            "signal_analysis": {"Latest Price": 30000.0 + i, "Pred Long": 0.001 * i, "Pred Short": 0.002, "Long Threshold": 0.002, "Short Threshold": 0.002, "Volatility": 0.01, "Volatility Filter": 0.02}}
+
+def wait_until(condition, timeout=10):
+    """Polls condition() until it holds or `timeout` seconds pass. Returns its last value."""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline: time.sleep(0.01)
+    return condition()
+
+def run_test():
+    """Pushes bot updates to several dashboard subscribers over a Unix socket; checks replay, delivery latency, bounded history, slow clients and bot restarts."""
+    print("--- Dashboard Feed Test ---")
+    path = os.path.join(tempfile.mkdtemp(prefix='dashboard_feed_'), 'dashboard.sock')
+    publisher = DashboardPublisher(path, history=100).start()
+    for i in range(150): publisher.publish('', dashboard(i))
+    subscribers = [DashboardSubscriber(path, history=200).start() for _ in range(5)]
+    try:
+        assert wait_until(lambda: all(len(s.snapshot('')[1]) == 100 for s in subscribers)), "Late subscribers did not get the replayed history"
+        data, cycles, _ = subscribers[0].snapshot('')
+        assert data['account_balance'] == 249.0 and cycles[0]['balance'] == 150.0, "Replay should hold the last 100 updates, oldest first"
+
+        latencies, subscriber = [], subscribers[-1]
+        for i in range(150, 350):
+            version = subscriber.version; start = time.perf_counter()
+            if i % 4: publisher.publish_tick('', 30000.0 + i, i / 10)
+            else: publisher.publish('', dashboard(i))
+            assert subscriber.wait(version, timeout=1) != version, "Update was not delivered"
+            latencies.append((time.perf_counter() - start) * 1000)
+        assert wait_until(lambda: all(s.version == subscriber.version for s in subscribers)), "Not every subscriber got every update"
+        data, cycles, ticks = subscriber.snapshot('')
+        print(f"   5 subscribers | push latency p50 {np.percentile(latencies, 50):.2f}ms, max {max(latencies):.2f}ms | history: {len(cycles)} cycles, {len(ticks)} ticks")
+        assert len(cycles) == 150 and len(ticks) == 150 and data['account_balance'] == 448.0 and ticks[-1] == {'time': ticks[-1]['time'], 'price': 30349.0, 'unrealized_pnl': 34.9}, "History not kept per kind"
+        assert max(latencies) < 100, "Updates should arrive well under a second"
+
+        stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM); stalled.connect(path)  # a viewer that never reads
+        dropped = metrics.counters.get('dashboard_dropped_subscribers', 0)
+        for i in range(100): publisher.publish('', dashboard(i, padding=20_000))
+        assert wait_until(lambda: metrics.counters.get('dashboard_dropped_subscribers', 0) > dropped), "A stalled subscriber was not dropped"
+        assert wait_until(lambda: all(s.snapshot('')[0]['account_balance'] == 199.0 for s in subscribers)), "A stalled subscriber held up the others"
+        stalled.close()
+        assert len(subscriber.snapshot('')[1]) == 200, "History is not bounded"
+
+        publisher.stop(); publisher = DashboardPublisher(path, history=100).start()  # the bot restarts
+        publisher.publish('ETH/USDT', dashboard(1)); publisher.publish('', dashboard(1000))
+        assert wait_until(lambda: all(s.snapshot('')[0]['account_balance'] == 1100.0 and s.scopes() == ['', 'ETH/USDT'] for s in subscribers)), "Subscribers did not reconnect to the restarted bot"
+        print("\n✅ Dashboard updates are pushed to every subscriber within milliseconds, with bounded history.")
+    finally:
+        for s in subscribers: s.stop()
+        publisher.stop()
+
+if __name__ == '__main__':
+    run_test()
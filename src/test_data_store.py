@@ -0,0 +1,99 @@
+# src/test_data_store.py
+
+import os
+import shutil
+import tempfile
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+import backtester
+from data_store import CANDLE_CACHE_DIR, COLUMNS, CandleStore, MarketDataStore, aggregate_candles
+from market_feed import CANDLE_DTYPE
+
+MINUTE = 60_000
+
+def synthetic_rows(n, start_ms, seed=9):
+    """n sorted 1m candles from start_ms, as CANDLE_DTYPE rows."""
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(n, dtype=CANDLE_DTYPE); rows['timestamp'] = start_ms + np.arange(n) * MINUTE
+    close = 30000 + np.cumsum(rng.normal(0, 5, n)); rows['open'] = np.r_[close[0], close[:-1]]; rows['close'] = close
+    rows['high'], rows['low'] = np.maximum(rows['open'], close) + 2, np.minimum(rows['open'], close) - 2
+    rows['volume'], rows['number_of_trades'], rows['taker_buy_base_asset_volume'] = rng.uniform(1, 5, n), rng.integers(10, 100, n), rng.uniform(0, 1, n)
+    return rows
+
+def same(got, want):
+    return len(got['timestamp']) == len(want) and all(np.array_equal(np.asarray(got[c]), want[c]) for c in COLUMNS)
+
+def resampled(rows):
+    """pandas resample of the same candles, as the batch path does it."""
+    df = pd.DataFrame(rows); df.index = pd.to_datetime(df.pop('timestamp'), unit='ms')
+    return df.resample('3min').agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum', 'number_of_trades': 'sum', 'taker_buy_base_asset_volume': 'sum'}).dropna()
+
+def load_resampled():
+    """backtester.load_resampled() and whether it read the store view."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out): df = backtester.load_resampled()
+    return df, 'pre-aggregated' in out.getvalue()
+
+def check_history_import(rows):
+    """A bot's candle cache must not stand in for the imported history: the import still takes the whole CSV, and the backtester only reads a store that covers it."""
+    pd.DataFrame(rows[:500]).to_csv(backtester.DATA_FILE, index=False)
+    cache = CandleStore(backtester.SYMBOL, '1m', '3min', root=CANDLE_CACHE_DIR)
+    assert cache.append(rows[450:]) == 150, "The bot's cache write failed"  # a bot start backfills the most recent candles
+    history = CandleStore(backtester.SYMBOL, '1m', '3min')
+    df, from_store = load_resampled()
+    assert not history.exists() and not from_store and len(df) == len(resampled(rows[:500])), "The candle cache was read as the imported history"
+    with contextlib.redirect_stdout(io.StringIO()): imported = history.import_csv(backtester.DATA_FILE)
+    assert imported == 500 and history.base.first_timestamp == rows['timestamp'][0], f"The import after a cache write took {imported} of 500 candles"
+    df, from_store = load_resampled()
+    want = resampled(rows[:498])  # the view keeps closed buckets only
+    assert from_store and (df.index == want.index).all() and np.allclose(df.values, want.values), "The store should be read once it holds all of DATA_FILE"
+    pd.DataFrame(rows).to_csv(backtester.DATA_FILE, index=False)  # the CSV grows past the store
+    df, from_store = load_resampled()
+    assert not from_store and len(df) == len(resampled(rows)), "A store that does not cover DATA_FILE should fall back to the CSV"
+
+def run_test():
+    """Appends across a month boundary and checks reads, de-duplication, resample parity, recovery from a torn column write, and that the candle cache stays out of the imported history."""
+    print("--- Data Store Test ---")
+    workdir, cwd = tempfile.mkdtemp(prefix='data_store_'), os.getcwd()
+    try:
+        start_ms = int(pd.Timestamp('2024-01-31 20:00').value // 1_000_000)
+        rows = synthetic_rows(600, start_ms)  # ten hours, crossing into February
+        store = MarketDataStore('BTC/USDT', '1m', workdir)
+        assert store.append(rows[:100]) == 100 and store.append(rows[100:]) == 500, "Appends lost rows"
+        assert store.partition_keys() == ['2024-01', '2024-02'], f"Expected two month partitions, got {store.partition_keys()}"
+        assert store.append(rows[590:]) == 0 and store.append(rows[:50]) == 0 and len(store) == 600, "Duplicate or older rows were written"
+        assert store.first_timestamp == rows['timestamp'][0] and store.last_timestamp == rows['timestamp'][-1]
+
+        for lo, hi in ((None, None), (10, 200), (200, 300), (239, 241), (300, 600), (599, 600), (5, 5)):
+            start = None if lo is None else int(rows['timestamp'][lo]); end = None if hi is None or hi >= len(rows) else int(rows['timestamp'][hi])
+            assert same(store.read(start, end), rows[lo or 0:hi if end is not None else None]), f"read({lo}, {hi}) differs from the source"
+        assert same(store.read_rows(rows['timestamp'][100], rows['timestamp'][400]), rows[100:400])
+        for n in (1, 100, 300, 600, 1000): assert same(store.tail(n), rows[-n:]), f"tail({n}) differs from the source"
+
+        want = resampled(rows[:-1])  # the last 3m bucket is missing its last minute
+        for include, expected in ((False, want[:-1]), (True, want)):
+            got = aggregate_candles(rows[:-1], MINUTE, 3 * MINUTE, include_partial_last=include)
+            assert (got['timestamp'] == expected.index.values.astype('datetime64[ms]').astype('i8')).all(), "Bucket times differ from pandas"
+            assert np.allclose(pd.DataFrame(got).drop(columns='timestamp').values, expected.values), f"Aggregates differ from pandas (partial last bucket {'kept' if include else 'dropped'})"
+        candles = CandleStore('BTC/USDT', '1m', '3min', root=workdir)
+        assert candles.view.exists() is False and candles.refresh_view() == len(want) and same(candles.view.read_rows(), aggregate_candles(rows, MINUTE, 3 * MINUTE)), "The pre-aggregated view differs"
+
+        # A crash mid-append can leave one column shorter than the others (here by a row and a half).
+        part = store._partition('2024-02'); path = part._file('close'); length = len(part)
+        with open(path, 'r+b') as f: f.truncate((length - 1) * 8 - 4)
+        assert len(store) == 598 and store.last_timestamp == rows['timestamp'][-3] and same(store.tail(5), rows[-7:-2]), "Readers should only trust complete rows"
+        assert store.append(rows[-5:]) == 2 and len(store) == 600 and same(store.read(), rows), "Appending after a torn write should repair the partition"
+        assert all(os.path.getsize(part._file(c)) == 360 * CANDLE_DTYPE[c].itemsize for c in COLUMNS), "Columns should be trimmed back to whole rows"
+        print(f"   600 candles in {len(store.partition_keys())} month partitions; reads, tails and 3m aggregates match the source")
+
+        os.chdir(workdir); os.makedirs(os.path.dirname(backtester.DATA_FILE), exist_ok=True)  # DATA_FILE, STORE_DIR and CANDLE_CACHE_DIR are relative paths
+        check_history_import(rows)
+        print("   A full import after the bots' cache write; the backtester falls back to the CSV until the store covers it")
+        print("\n✅ The data store appends, reads and aggregates exactly, and recovers from a torn append.")
+    finally:
+        os.chdir(cwd); shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    run_test()
@@ -0,0 +1,97 @@
+# src/test_execution.py
+
+import asyncio
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+import strategy
+from execution import ExecutionManager, MockExchange, TICK_SIZE
+
+class AsyncMockExchange:
+    """The mock behind coroutine methods, as multi_bot's ccxt.async_support client is."""
+    precisionMode = TICK_SIZE
+    def __init__(self, mock): self.mock = mock
+    def __getattr__(self, name):
+        method = getattr(self.mock, name)
+        async def call(*args): return method(*args)
+        return call
+
+def soak(manager, mock, symbol, n, seed=3):
+    """Drives n candles of the live decision path (strategy.step with the manager as execute callback). Returns the closed trades and the realized PnL."""
+    rng, params = np.random.default_rng(seed), strategy.StrategyParams()
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    position, sizing_info, trades, pnl = None, None, [], 0.0
+    def execute(side, amount, price):
+        mock.mark(symbol, price); return manager.execute(symbol, side, amount, price)
+    with contextlib.redirect_stdout(io.StringIO()):  # one line per order otherwise
+        for i in range(n):
+            candle = {'timestamp': i, 'close': close[i], 'atr': close[i] * 0.003, 'volatility_10': 1.0, 'volatility_filter': 1.0}
+            result = strategy.step(position, 1000.0, candle, rng.uniform(0, 0.01), rng.uniform(0, 0.01), params, sizing_info, execute)
+            position, sizing_info, pnl = result['position'], result['sizing_info'], pnl + result['pnl']
+            if result['exit']: trades.append(result['exit'])
+        if position:
+            fill = execute(strategy.EXIT_SIDE[position['type']], position['position_size_units'], close[-1])
+            price, units, fee = strategy.fill_terms(fill, close[-1], position['position_size_units']); pnl += strategy.closed_pnl(strategy.exited_part(position, units), price, fee)
+    return trades, pnl
+
+def run_test():
+    """Soak-tests the order path against the mock exchange at full speed, with injected timeouts and lost replies, then checks concurrency and the async-client mode."""
+    print("--- Execution Test ---")
+    workdir = tempfile.mkdtemp(prefix='execution_')
+    try:
+        mock = MockExchange(latency=0, failure_rate=0.05, lost_reply_rate=0.05, seed=7)
+        manager = ExecutionManager(mock, ['BTC/USDT', 'ETH/USDT'], retry_delay=0, fill_log=os.path.join(workdir, 'fills.csv'))
+        assert mock.calls == {'load_markets': 1}, "Market rules should be loaded once, up front"
+        assert manager.round_amount('BTC/USDT', 0.0123456, 30000) == 0.01234 and manager.round_amount('BTC/USDT', 0.0001, 30000) == 0.0, "Amounts not rounded to the lot step and minimum notional"
+        assert manager.execute('BTC/USDT', 'buy', 0.0001, 30000) is None and 'create_order' not in mock.calls, "An order below the minimum notional was sent"
+
+        start = time.perf_counter(); trades, pnl = soak(manager, mock, 'BTC/USDT', 20_000); soak_s = time.perf_counter() - start
+        booked = len(mock.orders)
+        print(f"   Soak: 20,000 candles, {booked:,} orders, {len(trades):,} round trips in {soak_s:.1f}s | {mock.calls['create_order']:,} submits, {mock.calls.get('fetch_order', 0):,} lookups")
+        assert booked == len({o['clientOrderId'] for o in mock.orders.values()}) and len(trades) > 500, "An order was booked twice"
+        assert abs(mock.balances['BTC']) < 1e-9, "Position amounts do not match what was filled"
+        assert abs(mock.balances['USDT'] - 10_000 - pnl) < 1e-6, f"Booked PnL {pnl:.6f} differs from the exchange's {mock.balances['USDT'] - 10_000:.6f}"
+        last = mock.orders[str(booked)]
+        assert trades[-1]['exit_price'] in [o['average'] for o in mock.orders.values()] and last['fee']['cost'] > 0, "Exits should be booked at the fill price"
+        with open(os.path.join(workdir, 'fills.csv')) as f: assert sum(1 for _ in f) == booked + 1, "Not every fill was logged"
+        assert max(f['attempts'] for f in manager.fills) > 1 and all(f['latency_ms'] >= 0 for f in manager.fills), "Retried fills should record their attempts"
+
+        mock.failure_rate = mock.lost_reply_rate = 0; mock.latency = 0.02; mock.mark('ETH/USDT', 2000.0)
+        start = time.perf_counter(); futures = [manager.submit('ETH/USDT', 'buy', 0.5, 2000.0) for _ in range(4)]
+        results = [f.result() for f in futures]; wall_ms = (time.perf_counter() - start) * 1000
+        print(f"   4 concurrent orders filled in {wall_ms:.0f} ms (fill latency up to {max(r['latency_ms'] for r in results):.0f} ms)")
+        assert all(r and r['amount'] == 0.5 and abs(r['price'] - 2000.2) < 1e-9 and abs(r['fee'] - 1000.1 * 0.001) < 1e-9 for r in results), "Fill record incomplete"
+        assert wall_ms < 4 * 20, "Orders were not placed concurrently"
+        mock.failure_rate = 1.0; submits = mock.calls['create_order']
+        assert manager.execute('ETH/USDT', 'sell', 0.5, 2000.0) is None and mock.calls['create_order'] == submits + manager.retries + 1, "Retries should stop after RETRIES"
+        manager.close()
+
+        # A position that is not a whole number of lots (e.g. bought with the fee taken in BTC): the exit sells what the lot step allows.
+        mock = MockExchange(latency=0, balances={'USDT': 10_000.0, 'BTC': 0.0123456}, seed=2); mock.mark('BTC/USDT', 29_000.0)
+        manager = ExecutionManager(mock, ['BTC/USDT'], retry_delay=0, fill_log=None)
+        position = {'type': 'long', 'entry_price': 30_000.0, 'stop_loss': 29_500.0, 'position_size_units': 0.0123456, 'fees_usd': 0.36}
+        candle = {'timestamp': 0, 'close': 29_000.0, 'atr': 100.0, 'volatility_10': 1.0, 'volatility_filter': 1.0}
+        with contextlib.redirect_stdout(io.StringIO()): result = strategy.step(position, 1000.0, candle, 0.0, 0.0, strategy.StrategyParams(), None, lambda *order: manager.execute('BTC/USDT', *order))
+        order = mock.orders['1']; sold = order['filled']
+        assert sold == 0.01234 and result['position'] is None, f"Expected the exit to sell 0.01234 BTC, it sold {sold}"
+        want = (order['average'] - 30_000.0) * sold - 0.36 * sold / 0.0123456 - order['fee']['cost']
+        assert abs(result['pnl'] - want) < 1e-9 and abs(result['exit']['size_usd'] - sold * 30_000.0) < 1e-9, f"Exit booked {result['pnl']:.6f} on the requested units, the fill gives {want:.6f}"
+        manager.close()
+
+        loop = asyncio.new_event_loop(); thread = threading.Thread(target=loop.run_forever, daemon=True); thread.start()
+        async_mock = MockExchange(latency=0, lost_reply_rate=0.5, seed=1)
+        manager = ExecutionManager(AsyncMockExchange(async_mock), ['BTC/USDT'], loop, fill_log=None, retry_delay=0)
+        _, pnl = soak(manager, async_mock, 'BTC/USDT', 2000, seed=4)
+        assert len(async_mock.orders) > 50 and abs(async_mock.balances['USDT'] - 10_000 - pnl) < 1e-6, "Orders through an async client diverged"
+        manager.close(); loop.call_soon_threadsafe(loop.stop); thread.join()
+        print("\n✅ Orders are rounded locally, never doubled by retries, and booked at their fill price net of fees.")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    run_test()
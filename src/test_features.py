@@ -0,0 +1,55 @@
+# src/test_features.py
+
+import time
+import numpy as np
+import pandas as pd
+from ta.volatility import AverageTrueRange
+from sklearn.preprocessing import MinMaxScaler
+from features import FEATURE_COLUMNS, CANDLE_FIELDS, FrozenScaler, IncrementalFeatureEngine, compute_features, wilder_atr
+
+def make_candles(n, seed=7):
+    """Deterministic random-walk 3m candles."""
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.001, n)); low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.001, n))
+    volume = rng.uniform(1, 50, n)
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume, 'number_of_trades': 0,
+                         'taker_buy_base_asset_volume': volume * rng.uniform(0.2, 0.8, n)},
+                        index=pd.date_range('2024-01-01', periods=n, freq='3min'))
+
+def run_test():
+    """
+    Checks that the incremental feature engine reproduces the batch path
+    (compute_features + scaling + ATR) on the same candle history.
+    """
+    print("--- Feature Engine Parity Test ---")
+    df = make_candles(2000)
+    batch = compute_features(df.copy())
+    scaler = FrozenScaler.fit(batch[FEATURE_COLUMNS].values)
+    batch_scaled = scaler.transform(batch[FEATURE_COLUMNS].values)
+
+    reference = MinMaxScaler().fit(batch[FEATURE_COLUMNS].values)
+    assert np.allclose(reference.transform(batch[FEATURE_COLUMNS].values), batch_scaled, rtol=0, atol=1e-12), "FrozenScaler differs from MinMaxScaler"
+    ta_atr = AverageTrueRange(batch['high'], batch['low'], batch['close'], 14).average_true_range().values
+    assert np.allclose(ta_atr, wilder_atr(batch['high'].values, batch['low'].values, batch['close'].values), rtol=1e-12, atol=1e-9), "ATR differs from ta"
+
+    engine = IncrementalFeatureEngine(scaler); rows, timings = [], []
+    for ts, *candle in zip(df.index, *(df[c].values for c in CANDLE_FIELDS)):
+        peeked = engine.peek(ts, *candle)
+        start = time.perf_counter(); row = engine.update(ts, *candle); timings.append(time.perf_counter() - start)
+        assert (peeked is None) == (row is None), "peek() and update() disagree on warm-up"
+        if row is not None:
+            assert np.array_equal(peeked['vector'], row['vector']), "peek() result differs from update()"
+            rows.append(row)
+
+    assert [r['timestamp'] for r in rows] == list(batch.index), "Engine emitted rows for different candles than the batch path"
+    incremental = np.array([r['vector'] for r in rows]); atr = np.array([r['atr'] for r in rows])
+    feature_error = np.abs(incremental - batch_scaled).max(); atr_error = np.abs(atr - batch['atr'].values).max()
+    print(f"Rows compared: {len(rows)} | Max feature error: {feature_error:.3e} | Max ATR error: {atr_error:.3e}")
+    print(f"Median update latency: {np.median(timings) * 1e6:.1f} µs")
+    assert feature_error < 1e-9 and atr_error < 1e-6, "Incremental features diverge from the batch path"
+    print("\n✅ Incremental engine matches the batch path.")
+
+if __name__ == '__main__':
+    run_test()
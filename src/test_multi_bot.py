@@ -0,0 +1,77 @@
+# src/test_multi_bot.py
+
+import asyncio
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import multi_bot
+import strategy
+
+MINUTE, SYMBOLS = 60_000, [f"C{k:02d}/USDT" for k in range(50)]
+
+class StubExchange:
+    """The async ccxt calls the scheduler makes, served from in-memory 1m klines up to `visible_until` (exclusive)."""
+    def __init__(self, data, visible_until): self.data, self.visible_until, self.kline_requests = data, visible_until, 0
+    async def fetch_time(self): return int(time.time() * 1000)
+    async def publicGetKlines(self, params):
+        self.kline_requests += 1
+        rows = self.data[params['symbol']]; since = params.get('startTime', rows[0][0])
+        rows = [r for r in rows if since <= r[0] < self.visible_until][:params['limit']]
+        return [[r[0], *map(str, r[1:6]), r[0] + MINUTE - 1, '0', int(r[6]), str(r[7]), '0', '0'] for r in rows]
+
+class CountingModels:
+    """Stands in for the compiled forest: records every batched predict call."""
+    def __init__(self): self.batches = []
+    def predict(self, matrix):
+        self.batches.append(len(matrix)); return np.tile([0.001, 0.001], (len(matrix), 1))
+
+def synthetic_klines(symbols, n, end_ms):
+    """n 1m candles per symbol ending before end_ms, each symbol at its own price level."""
+    data, ts = {}, end_ms - np.arange(n, 0, -1) * MINUTE
+    for k, symbol in enumerate(symbols):
+        rng = np.random.default_rng(k); close = 10 * (k + 1) ** 2 * np.exp(np.cumsum(rng.normal(0, 0.003, n))); open_ = np.r_[close[0], close[:-1]]
+        data[symbol.replace('/', '')] = list(zip(ts.tolist(), open_, np.maximum(open_, close) * 1.001, np.minimum(open_, close) * 0.999, close, rng.uniform(1, 5, n), rng.integers(10, 100, n).astype(float), rng.uniform(0, 1, n)))
+    return data
+
+async def drive(bot, exchange, cycles):
+    """Reveals one more 3m candle per cycle and processes it, then re-runs the last cycle with nothing new."""
+    with contextlib.redirect_stdout(io.StringIO()): await bot.warm_up(window=1500)
+    timings = []
+    for _ in range(cycles):
+        candle_open = exchange.visible_until; exchange.visible_until += 3 * MINUTE
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()): processed = await bot.run_cycle(candle_open)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert processed == len(bot.traders), f"{processed} of {len(bot.traders)} symbols processed the candle at {candle_open}"
+        assert all(t.last_processed_timestamp == candle_open for t in bot.traders.values()), "A symbol did not step on the closed candle"
+    with contextlib.redirect_stdout(io.StringIO()): repeat = await bot.run_cycle(candle_open)
+    return timings, repeat
+
+def run_test():
+    """Runs 50 symbols through the asyncio scheduler against a stub exchange: one strategy step per symbol per closed candle, one batched predict per cycle."""
+    print("--- Multi-Symbol Bot Test ---")
+    workdir, cwd, step = tempfile.mkdtemp(prefix='multi_bot_'), os.getcwd(), strategy.step
+    steps = []
+    try:
+        os.chdir(workdir)  # state, candle cache and trade logs use relative paths
+        now = int(time.time() * 1000); end = now - now % (3 * MINUTE) - 30 * MINUTE
+        exchange, models, cycles = StubExchange(synthetic_klines(SYMBOLS, 1500 + 30, end + 30 * MINUTE), end), CountingModels(), 5
+        strategy.step = lambda *args, **kwargs: steps.append(args[2]['timestamp']) or step(*args, **kwargs)
+        with contextlib.redirect_stdout(io.StringIO()): bot = multi_bot.MultiSymbolBot(SYMBOLS, exchange, models)
+        timings, repeat = asyncio.run(drive(bot, exchange, cycles))
+        print(f"   {len(SYMBOLS)} symbols x {cycles} candles: cycle p50 {np.median(timings):.0f} ms, max {max(timings):.0f} ms | {exchange.kline_requests} kline requests")
+        assert repeat == 0 and len(models.batches) == cycles, f"Expected one predict per cycle, got {len(models.batches)} for {cycles} cycles"
+        assert models.batches == [len(SYMBOLS)] * cycles, "Each predict call should score every symbol in one batch"
+        assert len(steps) == len(SYMBOLS) * cycles and all(steps.count(ts) == len(SYMBOLS) for ts in set(steps)), "Each symbol should step exactly once per closed candle"
+        scalers = [t.scaler for t in bot.traders.values()]
+        assert len({id(s) for s in scalers}) == len(SYMBOLS) and not np.allclose(scalers[0].data_max, scalers[-1].data_max), "Without a frozen scaler, each symbol should fit its own"
+        print("\n✅ Every symbol steps once per closed candle, scored in a single batched predict per cycle.")
+    finally:
+        strategy.step = step; os.chdir(cwd); shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    run_test()
@@ -0,0 +1,68 @@
+# src/test_notifications.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from notifications import TelegramDispatcher
+
+class TelegramStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for api.telegram.org. Replies follow `server.script` (status codes), then 200; every request is recorded."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server; time.sleep(server.delay)
+        with server.lock:
+            server.requests.append((self.client_address, body['text']))
+            status = server.script.pop(0) if server.script else 200
+        reply = {'ok': status == 200} if status != 429 else {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 0.2}}
+        data = json.dumps(reply).encode()
+        self.send_response(status); self.send_header('Content-Type', 'application/json'); self.send_header('Content-Length', str(len(data))); self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args): pass
+
+def start_stand_in(script=(), delay=0.0):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TelegramStandIn)
+    server.requests, server.script, server.delay, server.lock = [], list(script), delay, threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def run_test():
+    """Exercises the dispatcher against a local HTTP stand-in: non-blocking sends, coalescing, retries, keep-alive and flush on close."""
+    print("--- Telegram Dispatcher Test ---")
+
+    server, url = start_stand_in(delay=1.0)
+    dispatcher = TelegramDispatcher('TOKEN', 'CHAT', url, coalesce_s=0.2).start()
+    start = time.perf_counter()
+    for i in range(5): dispatcher.send(f"Burst message {i}.")
+    enqueue_ms = (time.perf_counter() - start) * 1000
+    dispatcher.close()
+    texts = [t for _, t in server.requests]
+    print(f"   5 messages queued in {enqueue_ms:.2f}ms against a 1s API | requests: {len(texts)}")
+    assert enqueue_ms < 50, "send() blocked on the network"
+    assert len(texts) == 1 and all(f"Burst message {i}\\." in texts[0] for i in range(5)), "Burst was not coalesced into one request"
+    server.shutdown()
+
+    server, url = start_stand_in(script=[429, 500, 200])
+    dispatcher = TelegramDispatcher('TOKEN', 'CHAT', url, coalesce_s=0.0, backoff_s=0.1).start()
+    dispatcher.send("Retried message"); time.sleep(1.0)
+    dispatcher.send("Second message"); dispatcher.close()
+    ports = {address[1] for address, _ in server.requests}
+    print(f"   After 429 + 500: requests {len(server.requests)} | sent {dispatcher.sent} | failed {dispatcher.failed} | connections {len(ports)}")
+    assert dispatcher.sent == 2 and dispatcher.failed == 0 and len(server.requests) == 4, "Retry sequence did not deliver both messages"
+    assert len(ports) == 1, "Requests did not reuse the keep-alive connection"
+    server.shutdown()
+
+    server, url = start_stand_in(script=[400])
+    dispatcher = TelegramDispatcher('TOKEN', 'CHAT', url, max_queue=3, coalesce_s=0.0).start()
+    accepted = sum(dispatcher.send(f"Queued {i}") for i in range(10))
+    dispatcher.close()
+    print(f"   Bounded queue: accepted {accepted}/10 | dropped {dispatcher.dropped} | rejected by API {dispatcher.failed} | delivered on close {dispatcher.sent}")
+    assert dispatcher.dropped == 10 - accepted and dispatcher.sent + dispatcher.failed == len(server.requests), "Queue accounting is off"
+    server.shutdown()
+    print("\n✅ Dispatcher never blocks the caller and delivers everything it accepted.")
+
+if __name__ == '__main__':
+    run_test()
@@ -0,0 +1,48 @@
+# src/test_scheduler.py
+
+import time
+import numpy as np
+from scheduler import ExchangeClock, CandleCloseScheduler
+
+class FakeExchange:
+    """Serves a server time `offset_ms` ahead of the local clock, after a simulated network delay."""
+    def __init__(self, offset_ms, delay_s=0.01): self.offset_ms, self.delay_s = offset_ms, delay_s
+    def fetch_time(self):
+        time.sleep(self.delay_s); server_ms = time.time() * 1000 + self.offset_ms; time.sleep(self.delay_s)
+        return int(server_ms)
+
+class SimulatedClock(ExchangeClock):
+    """An ExchangeClock on simulated local time, advanced only by its sleep()."""
+    def __init__(self, local_ms, offset_ms):
+        super().__init__(); self.local_ms, self.offset_ms = local_ms, offset_ms
+    def now_ms(self): return self.local_ms + self.offset_ms
+    def sleep(self, seconds): self.local_ms += seconds * 1000
+
+def run_test():
+    """Checks the exchange clock offset and that the scheduler wakes just after each candle close (plus the settle delay) on exchange time."""
+    print("--- Scheduler Test ---")
+    clock = ExchangeClock().sync(FakeExchange(offset_ms=-1500))
+    assert abs(clock.offset_ms + 1500) < 5 and clock.round_trip_ms >= 20 and not clock.due, "Offset should be measured against the round-trip midpoint"
+
+    # Simulated time: local clock 1.5s behind the exchange, 3m candles, 250ms settle delay.
+    period, start = 180_000, 1_700_000_000_123
+    sim = SimulatedClock(start, offset_ms=1500); scheduler = CandleCloseScheduler(period, sim, delay_s=0.25)
+    for _ in range(5):
+        candle_open = scheduler.wait_for_close(sleep=sim.sleep)
+        assert candle_open % period == 0 and sim.now_ms() == candle_open + period + 250, f"Woke at {sim.now_ms()}, expected {candle_open + period + 250}"
+        sim.sleep(period * 0.4 / 1000)  # a cycle's work, well inside the next candle
+    assert abs(scheduler.latency_ms(candle_open) - 0.4 * period - 250) < 1e-6
+
+    # Real time: 200ms candles on a clock whose exchange offset is +1234ms, with a 30ms settle delay.
+    clock = ExchangeClock(); clock.offset_ms = 1234.0
+    scheduler, lates = CandleCloseScheduler(200, clock, delay_s=0.03), []
+    for _ in range(10):
+        candle_open = scheduler.wait_for_close()
+        lates.append(clock.now_ms() - (candle_open + 200) - 30)
+        assert candle_open % 200 == 0 and lates[-1] >= 0, f"Woke {-lates[-1]:.1f}ms before the settle point"
+    print(f"   Wake-up after close + settle delay: median {np.median(lates):.2f} ms, max {max(lates):.2f} ms")
+    assert max(lates) < 20, "Wake-ups should land just after the candle close"
+    print("\n✅ The scheduler wakes on exchange-time candle closes, just after the settle delay.")
+
+if __name__ == '__main__':
+    run_test()
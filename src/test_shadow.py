@@ -0,0 +1,78 @@
+# src/test_shadow.py
+
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+import strategy
+from backtester import resample_history
+from benchmark import synthetic_ohlcv
+from champion_models import MODEL_DIR, LONG_MODEL_NAME, SHORT_MODEL_NAME
+from features import FEATURE_COLUMNS, FrozenScaler, IncrementalFeatureEngine, compute_features
+from shadow import ShadowModels
+from tree_inference import CompiledForest
+
+def train_challengers(matrix, closes, workdir):
+    """Three small challenger pairs of different sizes, trained on 5-candle forward returns."""
+    future = np.roll(closes, -5) / closes - 1; future[-5:] = 0
+    frame = pd.DataFrame(matrix, columns=FEATURE_COLUMNS)  # named columns, like the champion models
+    registry = []
+    for name, trees, depth in (('small', 50, 3), ('medium', 150, 4), ('deep', 100, 6)):
+        paths = []
+        for side, target in (('long', np.maximum(future, 0)), ('short', np.maximum(-future, 0))):
+            model = xgb.XGBRegressor(n_estimators=trees, max_depth=depth, learning_rate=0.1, tree_method='hist')
+            model.fit(frame, target); paths.append(os.path.join(workdir, f"{name}_{side}.json")); model.save_model(paths[-1])
+        registry.append((name, *paths))
+    return registry
+
+def run_test():
+    """Scores champion + 3 challengers in one pass and checks parity, the virtual books, the cost of the batch and restart persistence."""
+    print("--- Shadow Models Test ---")
+    workdir = tempfile.mkdtemp(prefix='shadow_')
+    try:
+        df_3m = resample_history(synthetic_ohlcv(60_000, seed=3))
+        scaler = FrozenScaler.fit(compute_features(df_3m.copy())[FEATURE_COLUMNS].values)
+        engine = IncrementalFeatureEngine(scaler)
+        candles = [row for row in (engine.update(ts, *values) for ts, *values in zip(df_3m.index.astype('int64') // 10**6, *(df_3m[c].values for c in ('open', 'high', 'low', 'close', 'volume', 'taker_buy_base_asset_volume')))) if row is not None]
+        matrix = np.vstack([c['vector'] for c in candles])
+        registry = train_challengers(matrix, np.array([c['close'] for c in candles]), workdir)
+        champion = (os.path.join(MODEL_DIR, LONG_MODEL_NAME), os.path.join(MODEL_DIR, SHORT_MODEL_NAME))
+        params, state_db = strategy.StrategyParams(long_threshold=0.002, short_threshold=0.002), os.path.join(workdir, 'state.db')
+        shadow = ShadowModels(champion, registry, params, state_db)
+
+        paths = [*champion, *(p for _, l, s in registry for p in (l, s))]
+        reference = np.column_stack([xgb.Booster(model_file=p).inplace_predict(matrix[:500]) for p in paths])
+        batched = np.vstack([shadow.predict_all(v).ravel() for v in matrix[:500]])
+        print(f"   {len(shadow.names)} pairs, {len(shadow.forest.roots)} trees | max error vs xgboost: {np.abs(batched - reference).max():.2e}")
+        assert np.allclose(batched, reference, atol=1e-5), "Batched predictions differ from xgboost"
+
+        separate = [CompiledForest.load(*paths[i:i + 2]) for i in range(0, len(paths), 2)]
+        timings = {}
+        for label, fn in (('one batched pass', lambda v: shadow.predict_all(v)), ('one pass per pair', lambda v: [f.predict_row(v) for f in separate])):
+            start = time.perf_counter()
+            for v in matrix[:2000]: fn(v)
+            timings[label] = (time.perf_counter() - start) / 2000 * 1e6
+        print("   " + " | ".join(f"{label}: {us:.0f}µs" for label, us in timings.items()))
+        assert timings['one batched pass'] < timings['one pass per pair'], "Batching did not save time over separate passes"
+
+        position, balance, trades = None, 100.0, 0
+        for candle in candles:
+            preds = shadow.predict_all(candle['vector']); shadow.step(candle, preds)
+            result = strategy.step(position, balance, candle, preds[0][0], preds[0][1], params)
+            position, balance, trades = result['position'], balance + result['pnl'], trades + bool(result['exit'])
+        board = {row['model']: row for row in shadow.leaderboard(candles[-1]['close'])}
+        for row in board.values(): print(f"   {row['model']:<9} trades {row['trades']:>4} | win rate {row['win_rate'] or 0:.0%} | return {row['return_pct']:+.2f}% | share of pass {row['latency_us']:.1f}µs")
+        assert board['champion']['trades'] == trades and abs(shadow.books[0].account['balance'] - balance) < 1e-9, "Champion's virtual book differs from a plain strategy run"
+        assert sum(row['trades'] for row in board.values()) > trades, "Challengers did not trade"
+
+        restored = ShadowModels(champion, registry, params, state_db)
+        assert [(b.position, b.account) for b in restored.books] == [(b.position, b.account) for b in shadow.books], "Virtual books were not restored from the state store"
+        print("\n✅ All pairs are scored in one pass and tracked with the live strategy rules.")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    run_test()
@@ -0,0 +1,57 @@
+# src/test_state_store.py
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from state_store import StateStore, UNCHANGED, list_scopes, read_state
+
+def run_test():
+    """Checks change-only commits, the legacy JSON migration, and that readers see whole cycles while a writer holds the lock."""
+    print("--- State Store Test ---")
+    workdir = tempfile.mkdtemp(prefix='state_store_')
+    try:
+        db = os.path.join(workdir, 'state.db')
+        position, account = {'type': 'long', 'entry_price': 30000.0, 'stop_loss': 29500.0, 'position_size_units': 0.01}, {'balance': 100.0}
+        dashboard = {'bot_status': 'Analyzing', 'last_update': '2024-01-01 00:00:00 UTC', 'signal_analysis': {'Latest Price': 30000.0}}
+
+        # Migration from the old bot_state.json / paper_account.json / dashboard_state.json files.
+        paths = [os.path.join(workdir, name) for name in ('bot_state.json', 'paper_account.json', 'dashboard_state.json')]
+        for path, data in zip(paths, ({'current_position': position, 'last_processed_timestamp': None}, account, dashboard)):
+            with open(path, 'w') as f: json.dump(data, f)
+        store = StateStore(db)
+        assert store.import_json(*paths) and not store.import_json(*paths), "Legacy files should be imported exactly once"
+        assert store.read() == {'current_position': position, 'paper_account': account, 'dashboard': dashboard, 'last_processed_timestamp': None}, "Imported state differs from the JSON files"
+        assert not StateStore(db, scope='ETH/USDT').import_json(*(p + '.missing' for p in paths)) and list_scopes(db) == [''], "Missing legacy files should import nothing"
+
+        # Change-only commits.
+        writes, stamp = store.writes, sqlite3.connect(db).execute("SELECT max(updated_at) FROM state").fetchone()[0]
+        assert store.commit(position, account, dashboard) == 0 and store.writes == writes, "An unchanged cycle should write nothing"
+        assert sqlite3.connect(db).execute("SELECT max(updated_at) FROM state").fetchone()[0] == stamp, "Unchanged rows were rewritten"
+        assert store.commit(dashboard={**dashboard, 'last_update': '2024-01-01 00:03:00 UTC'}) == 1, "Only the changed dashboard field should be written"
+        assert store.commit(dashboard={'bot_status': 'Waiting'}) == 3 and read_state(db)['dashboard'] == {'bot_status': 'Waiting'}, "Dropped dashboard fields should be removed"
+        assert store.commit(UNCHANGED, {'balance': 101.5}) == 1 and read_state(db)['current_position'] == position, "Arguments not passed should be left as they are"
+
+        # A second process holds the write lock mid-cycle: readers still get the last committed cycle, without waiting.
+        writer = sqlite3.connect(db, isolation_level=None, timeout=0)
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("UPDATE state SET value = ? WHERE scope = '' AND key = 'current_position'", (json.dumps(None),))
+        writer.execute("UPDATE state SET value = ? WHERE scope = '' AND key = 'paper_account'", (json.dumps({'balance': 250.0}),))
+        start = time.perf_counter(); snapshot = read_state(db); read_ms = (time.perf_counter() - start) * 1000
+        assert snapshot['current_position'] == position and snapshot['paper_account'] == {'balance': 101.5}, "A reader saw part of an uncommitted cycle"
+        assert store.read()['paper_account'] == {'balance': 101.5}, "The bot's own connection saw an uncommitted cycle"
+        other = StateStore(db); other.conn.execute("PRAGMA busy_timeout = 0")
+        try: other.conn.execute("BEGIN IMMEDIATE"); raise AssertionError("Two writers held the lock at once")
+        except sqlite3.OperationalError: pass
+        writer.execute("COMMIT")
+        snapshot = read_state(db)
+        assert snapshot['current_position'] is None and snapshot['paper_account'] == {'balance': 250.0}, "The committed cycle should be visible as a whole"
+        print(f"   Snapshot read while a writer held the lock: {read_ms:.2f} ms")
+        print("\n✅ The state store writes only what changed, migrates legacy JSON once, and never shows a half-written cycle.")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    run_test()
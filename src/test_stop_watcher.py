@@ -0,0 +1,62 @@
+# src/test_stop_watcher.py
+
+import time
+import numpy as np
+import strategy
+from stop_watcher import StopWatcher, TickReplayServer
+
+def run_test():
+    """Replays a tick feed with a wick through the stop and checks the watcher exits on that print, within milliseconds."""
+    print("--- Stop Watcher Test ---")
+
+    fired = []
+    watcher = StopWatcher('BTC/USDT', None, lambda position, price, event_ms: fired.append((position, price)))
+    long_position, short_position = {'type': 'long', 'stop_loss': 100.0}, {'type': 'short', 'stop_loss': 100.0}
+    watcher.arm(long_position)
+    assert not watcher.on_price(100.5) and watcher.on_price(99.9) and not watcher.on_price(99.0), "Long stop should fire once, on the first print at or below it"
+    watcher.arm(short_position)
+    assert not watcher.on_price(99.5) and watcher.on_price(100.0), "Short stop should fire on the first print at or above it"
+    watcher.disarm()
+    assert not watcher.on_price(50.0) and fired == [(long_position, 99.9), (short_position, 100.0)], "Disarmed watcher must not fire"
+
+    # The exit order fails on the first crossing print: the watcher re-arms and exits on the next one.
+    attempts = []
+    def flaky_exit(position, price, event_ms):
+        attempts.append(price); return len(attempts) > 1
+    watcher = StopWatcher('BTC/USDT', None, flaky_exit)
+    watcher.arm(long_position)
+    assert watcher.on_price(99.9) and watcher.position is long_position, "A failed exit should leave the position armed"
+    assert not watcher.on_price(100.2) and watcher.on_price(99.8) and not watcher.on_price(99.0), "The next crossing print should retry the exit, and only until it succeeds"
+    assert attempts == [99.9, 99.8], f"Expected a failed then a successful exit, got {attempts}"
+    watcher = StopWatcher('BTC/USDT', None, lambda position, price, event_ms: watcher.arm(short_position) or False)
+    watcher.arm(long_position)
+    assert watcher.on_price(99.9) and watcher.position is short_position, "A failed exit must not undo an arm() made meanwhile"
+
+    # One 3m candle of ticks: price drifts around 30,000, wicks down through the stop and closes back above it.
+    rng = np.random.default_rng(7); start = int(time.time() * 1000)
+    prices = 30000 + np.cumsum(rng.normal(0, 2, 300)); prices[200:210] = np.linspace(prices[199], 29850, 10); prices[210:] = np.maximum(prices[210:], 29990)
+    ticks = list(zip(range(start, start + 300 * 600, 600), prices.round(2).tolist()))
+    position = {'type': 'long', 'entry_price': 30000.0, 'stop_loss': 29900.0, 'position_size_units': 0.01}
+    crossing = next(i for i, (_, p) in enumerate(ticks) if p <= position['stop_loss'])
+
+    server = TickReplayServer(ticks, interval_s=0.002)
+    exits = []
+    watcher = StopWatcher('BTC/USDT', server.url, lambda position, price, event_ms: exits.append((time.perf_counter(), price, event_ms)))
+    watcher.arm(position); server.start(); watcher.start()
+    deadline = time.time() + 10
+    while len(server.sent_at) < len(ticks) and time.time() < deadline: time.sleep(0.05)
+    time.sleep(0.1); watcher.stop(); server.stop()
+
+    assert len(exits) == 1, f"Expected exactly one exit, got {len(exits)}"
+    fired_at, price, event_ms = exits[0]
+    reaction_ms = (fired_at - server.sent_at[crossing]) * 1000
+    close_crossed = strategy.stop_crossed(position['type'], position['stop_loss'], ticks[-1][1])
+    print(f"   Stop {position['stop_loss']:.2f} crossed by tick {crossing} @ {ticks[crossing][1]:.2f} | exit booked @ {price:.2f} | reaction {reaction_ms:.2f}ms")
+    print(f"   Candle low {min(p for _, p in ticks):.2f}, close {ticks[-1][1]:.2f}: the close-only check {'fires' if close_crossed else 'misses the wick'}")
+    assert price == ticks[crossing][1] and event_ms == ticks[crossing][0], "Exit should be booked at the first print through the stop"
+    assert reaction_ms < 50, "Stop reaction took longer than 50ms"
+    assert not close_crossed, "Replay should wick through the stop and close above it"
+    print("\n✅ Stop watcher fires on the crossing print within milliseconds.")
+
+if __name__ == '__main__':
+    run_test()
@@ -1,6 +1,6 @@
 # src/test_telegram.py
 
-from notifications import send_telegram_message, TOKEN, CHAT_ID
+from notifications import send_telegram_message, flush_notifications, TOKEN, CHAT_ID
 
 def run_test():
     """
@@ -29,6 +29,7 @@ def run_test():
     )
     
     send_telegram_message(test_message)
+    flush_notifications()
     
     print("\n--- Test Complete ---")
     print("Please check your Telegram app for the message.")
@@ -0,0 +1,78 @@
+# src/test_trade_store.py
+
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from trade_store import TradeStore, DAY_MS
+
+def synthetic_trades(n, seed=5, start_ms=1_600_000_000_000):
+    """n closed trades a few minutes apart, with a mix of exit reasons, as a backtest-style DataFrame."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'timestamp': pd.to_datetime(start_ms + np.cumsum(rng.integers(60_000, 900_000, n)), unit='ms'), 'type': rng.choice(['long', 'short'], n),
+                         'entry_price': 30000.0, 'exit_price': 30000.0, 'size_usd': 50.0, 'pnl_usd': rng.normal(0.01, 0.5, n).round(4),
+                         'exit_reason': rng.choice(['stop_loss', 'stop_loss_tick', 'take_profit'], n, p=[0.6, 0.3, 0.1])})
+
+def reference(df, initial_balance, start_ms, end_ms):
+    """Brute-force window stats from the full trade list."""
+    ts = df['timestamp'].values.astype('datetime64[ms]').astype('i8')
+    before, window = df[ts < start_ms], df[(ts >= start_ms) & (ts <= end_ms)]
+    pnl, start_equity = window['pnl_usd'].values, initial_balance + before['pnl_usd'].sum()
+    equity = start_equity + np.cumsum(pnl); peak = np.maximum.accumulate(np.concatenate(([start_equity], equity)))[1:]
+    return {'trades': len(pnl), 'pnl_usd': pnl.sum(), 'win_rate_pct': (pnl > 0).mean() * 100, 'profit_factor': pnl[pnl > 0].sum() / -pnl[pnl < 0].sum(),
+            'max_drawdown_pct': ((equity - peak) / peak).min() * 100, 'by_exit_reason': window.groupby('exit_reason')['pnl_usd'].agg(['size', 'sum'])}
+
+def run_test():
+    """Appends 300k trades (bulk and one by one), then checks window analytics against a brute-force recomputation and that they do not slow down with the store's size."""
+    print("--- Trade Store Test ---")
+    workdir = tempfile.mkdtemp(prefix='trade_store_')
+    try:
+        df, initial_balance = synthetic_trades(300_000), 1000.0
+        store = TradeStore(os.path.join(workdir, 'trades.db'))
+        start = time.perf_counter()
+        store.append_many(df.iloc[:-200], 'backtest', 'BTC/USDT', initial_balance)
+        bulk_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for trade in df.iloc[-200:].to_dict('records'): store.append(trade, 'backtest', 'BTC/USDT', initial_balance)
+        single_us = (time.perf_counter() - start) / 200 * 1e6
+        store.append_many(df.iloc[:1000], 'paper', 'ETH/USDT')
+        print(f"   Appended {len(df):,} trades: bulk {bulk_s:.1f}s ({bulk_s / len(df) * 1e6:.1f}µs/trade) | one at a time {single_us:.0f}µs/trade")
+        try: store.append(df.iloc[0].to_dict(), 'backtest', 'BTC/USDT'); raise AssertionError("An out-of-order trade was accepted")
+        except ValueError: pass
+
+        reader = TradeStore(os.path.join(workdir, 'trades.db'), readonly=True)
+        ts = df['timestamp'].values.astype('datetime64[ms]').astype('i8')
+        rng = np.random.default_rng(1)
+        windows = [(None, None), (int(ts[0]), int(ts[5000])), (int(ts[150_000]), int(ts[150_000]) + DAY_MS)] + [tuple(sorted(rng.integers(ts[0], ts[-1], 2).tolist())) for _ in range(5)]
+        for start_ms, end_ms in windows:
+            got, want = reader.summary('backtest', 'BTC/USDT', start_ms, end_ms), reference(df, initial_balance, start_ms or -2**62, end_ms or 2**62)
+            for key in ('trades', 'pnl_usd', 'win_rate_pct', 'profit_factor', 'max_drawdown_pct'):
+                assert abs(got[key] - want[key]) < 1e-6, f"{key} over window {start_ms}-{end_ms}: {got[key]} != {want[key]}"
+            assert {r: (v['trades'], round(v['pnl_usd'], 6)) for r, v in got['by_exit_reason'].items()} == {r: (row['size'], round(row['sum'], 6)) for r, row in want['by_exit_reason'].iterrows()}, "PnL by exit reason differs"
+        total = reader.summary('backtest', 'BTC/USDT')
+        print(f"   All trades: {total['trades']:,} | PnL ${total['pnl_usd']:,.2f} | win rate {total['win_rate_pct']:.1f}% | profit factor {total['profit_factor']:.3f} | max DD {total['max_drawdown_pct']:.2f}%")
+        assert reader.list_streams() == [('backtest', 'BTC/USDT', 300_000), ('paper', 'ETH/USDT', 1000)], "Streams not kept apart"
+        curve = reader.equity_curve('backtest', 'BTC/USDT', points=500)
+        assert len(curve) == 500 and curve[-1][0] == int(ts[-1]) and abs(curve[-1][1] - initial_balance - total['pnl_usd']) < 1e-6, "Equity curve does not end at the final equity"
+
+        timings = {}
+        for label, store_, source, symbol in (('1k trades', reader, 'paper', 'ETH/USDT'), ('300k trades', reader, 'backtest', 'BTC/USDT')):
+            last = store_.summary(source, symbol)['last_timestamp']
+            start = time.perf_counter()
+            for _ in range(200): store_.summary(source, symbol); store_.summary(source, symbol, last - DAY_MS)
+            timings[label] = (time.perf_counter() - start) / 400 * 1000
+        csv_path = os.path.join(workdir, 'trade_log.csv'); df.to_csv(csv_path, index=False)
+        start = time.perf_counter(); pd.read_csv(csv_path); reparse_ms = (time.perf_counter() - start) * 1000
+        print("   Summary query (all trades / last 24h): " + " | ".join(f"{label}: {ms:.2f}ms" for label, ms in timings.items()) + f" | reparsing the CSV alone: {reparse_ms:.0f}ms")
+        assert timings['300k trades'] < 5 * timings['1k trades'] + 1, "Window queries grow with the number of trades"
+
+        store.clear('backtest')
+        assert reader.summary('backtest', 'BTC/USDT') is None and reader.list_streams() == [('paper', 'ETH/USDT', 1000)], "clear() left the backtest stream behind"
+        print("\n✅ Window analytics match a full recomputation and stay constant-time as trades pile up.")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    run_test()
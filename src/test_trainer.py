@@ -0,0 +1,54 @@
+# src/test_trainer.py
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import xgboost as xgb
+from backtester import resample_history
+from benchmark import synthetic_ohlcv
+from champion_models import LONG_MODEL_NAME, SHORT_MODEL_NAME, SCALER_NAME, load_compiled_models, load_scaler
+from features import FEATURE_COLUMNS, FrozenScaler
+from trainer import build_cache, load_cache, max_move_targets, train, walk_forward_folds
+
+def run_test():
+    """Trains on synthetic history end to end: targets, fold layout, the feature cache, versioned artifacts and their use by the live model loaders."""
+    print("--- Trainer Test ---")
+    workdir = tempfile.mkdtemp(prefix='trainer_')
+    try:
+        high, low, close = np.array([10., 12, 11, 15, 9, 10, 13]), np.array([9., 8, 10, 14, 7, 9, 12]), np.array([9.5, 11, 10.5, 14.5, 8, 9.5, 12.5])
+        up, down = max_move_targets(high, low, close, horizon=2)
+        assert np.allclose(up[:5], [12 / 9.5 - 1, 15 / 11 - 1, 15 / 10.5 - 1, 10 / 14.5 - 1, 13 / 8 - 1]) and np.isnan(up[5:]).all(), "Max upside target is wrong"
+        assert np.allclose(down[:5], [1 - 8 / 9.5, 1 - 10 / 11, 1 - 7 / 10.5, 1 - 7 / 14.5, 1 - 9 / 8]), "Max downside target is wrong"
+        folds = walk_forward_folds(600, folds=5, gap=5)
+        assert folds[0] == (95, 100, 200) and folds[-1] == (495, 500, 600), "Walk-forward folds should expand and purge the gap"
+
+        df_3m = resample_history(synthetic_ohlcv(150_000, seed=11))
+        cache_dir, version_dir, model_dir = (os.path.join(workdir, d) for d in ('cache', 'versions', 'models'))
+        start = time.perf_counter(); path = build_cache(df_3m=df_3m, cache_dir=cache_dir); built_s = time.perf_counter() - start
+        start = time.perf_counter(); assert build_cache(df_3m=df_3m, cache_dir=cache_dir) == path; cached_s = time.perf_counter() - start
+        print(f"   Feature cache: built in {built_s * 1000:.0f} ms, reused in {cached_s * 1000:.0f} ms")
+        data = load_cache(path); i = len(data['close']) // 2
+        assert data['features'].shape == (len(data['close']), len(FEATURE_COLUMNS)) and not np.isnan(data['target_long']).any(), "Cache should hold only rows with targets"
+
+        manifest = train(df_3m=df_3m, folds=3, workers=2, xgb_params={'n_estimators': 60, 'max_depth': 4}, cache_dir=cache_dir, version_dir=version_dir, model_dir=model_dir)
+        out_dir = os.path.join(version_dir, manifest['version'])
+        assert sorted(os.listdir(out_dir)) == sorted([LONG_MODEL_NAME, SHORT_MODEL_NAME, SCALER_NAME, 'manifest.json']), "Versioned artifacts missing"
+        with open(os.path.join(out_dir, 'manifest.json')) as f: saved = json.load(f)
+        assert [f['name'] for f in saved['folds']] == ['fold_1', 'fold_2', 'fold_3'] and saved['rows'] == len(data['close']) and saved['xgb_params']['tree_method'] == 'hist', "Manifest incomplete"
+        assert all(f['test_rows'] > 0 and np.isfinite([f['rmse_long'], f['rmse_short'], f['corr_long'], f['corr_short']]).all() for f in saved['folds']), "Folds should score their test blocks"
+
+        scaler = load_scaler(model_dir, SCALER_NAME)
+        assert np.allclose(scaler.data_min, FrozenScaler.fit(data['features']).data_min) and np.allclose(scaler.data_max, FrozenScaler.fit(data['features']).data_max), "Scaler should be fitted on all training rows"
+        compiled = load_compiled_models(model_dir, LONG_MODEL_NAME, SHORT_MODEL_NAME)
+        rows = scaler.transform(np.asarray(data['features'][i:i + 200]))
+        reference = np.column_stack([xgb.Booster(model_file=os.path.join(model_dir, name)).inplace_predict(rows) for name in (LONG_MODEL_NAME, SHORT_MODEL_NAME)])
+        assert np.allclose(compiled.predict(rows), reference, atol=1e-5), "Promoted models do not load into the live inference path"
+        print("\n✅ Trainer writes versioned, validated models that the bots load as is.")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    run_test()
@@ -0,0 +1,42 @@
+# src/test_tree_inference.py
+
+import time
+import numpy as np
+import champion_models
+from test_features import make_candles
+from features import FEATURE_COLUMNS, FrozenScaler, compute_features
+
+TOLERANCE = 1e-6
+
+def make_matrix(n, seed=5):
+    """Scaled feature rows from synthetic candles, plus uniform noise rows with some missing values."""
+    df = compute_features(make_candles(n, seed))
+    real = FrozenScaler.fit(df[FEATURE_COLUMNS].values).transform(df[FEATURE_COLUMNS].values)
+    noise = np.random.default_rng(seed).uniform(-0.2, 1.2, (n, len(FEATURE_COLUMNS))); noise[::5, np.arange(n // 5) % len(FEATURE_COLUMNS)] = np.nan
+    return np.vstack([real, noise])
+
+def run_test():
+    """Checks the compiled forest against xgboost for batches and single rows, and compares per-candle latency."""
+    print("--- Compiled Tree Inference Parity Test ---")
+    long_model, short_model = champion_models.load_models()
+    models = champion_models.load_compiled_models()
+    X = make_matrix(5000)
+
+    expected = np.column_stack([long_model.predict(X), short_model.predict(X)])
+    batch_error = np.abs(models.predict(X) - expected).max()
+    row_error = max(np.abs(np.asarray(models.predict_row(X[i])) - expected[i]).max() for i in range(0, len(X), 50))
+    print(f"   Max abs error: batch {batch_error:.2e} | single row {row_error:.2e} (tolerance {TOLERANCE:.0e})")
+    assert batch_error < TOLERANCE and row_error < TOLERANCE, "Compiled predictions differ from xgboost"
+
+    rows = X[:500]
+    start = time.perf_counter()
+    for x in rows: long_model.predict(x.reshape(1, -1)), short_model.predict(x.reshape(1, -1))
+    xgb_us = (time.perf_counter() - start) / len(rows) * 1e6
+    start = time.perf_counter()
+    for x in rows: models.predict_row(x)
+    compiled_us = (time.perf_counter() - start) / len(rows) * 1e6
+    print(f"   Per-candle latency (both models): xgboost {xgb_us:.0f}µs | compiled {compiled_us:.0f}µs")
+    print("\n✅ Compiled inference matches xgboost.")
+
+if __name__ == '__main__':
+    run_test()
@@ -0,0 +1,250 @@
+# src/trade_store.py
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import config
+
+TRADE_DB = config.get('PATHS', 'TRADE_DB', fallback='reports/trades.db')
+TRADE_FIELDS = ['type', 'entry_price', 'exit_price', 'size_usd', 'pnl_usd', 'exit_reason']
+DAY_MS = 86_400_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    entry_price REAL NOT NULL,
+    exit_price REAL NOT NULL,
+    size_usd REAL NOT NULL,
+    pnl_usd REAL NOT NULL,
+    exit_reason TEXT NOT NULL,
+    cum_pnl REAL NOT NULL,
+    cum_wins INTEGER NOT NULL,
+    cum_profit REAL NOT NULL,
+    cum_loss REAL NOT NULL,
+    reason_seq INTEGER NOT NULL,
+    reason_pnl REAL NOT NULL,
+    peak REAL NOT NULL,
+    max_drawdown_pct REAL NOT NULL,
+    PRIMARY KEY (source, symbol, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trades_time ON trades (source, symbol, timestamp, seq);
+CREATE INDEX IF NOT EXISTS trades_reason ON trades (source, symbol, exit_reason, timestamp, seq);
+CREATE TABLE IF NOT EXISTS streams (
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    initial_balance REAL NOT NULL,
+    trades INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    pnl REAL NOT NULL,
+    profit REAL NOT NULL,
+    loss REAL NOT NULL,
+    peak REAL NOT NULL,
+    max_drawdown_pct REAL NOT NULL,
+    last_timestamp INTEGER NOT NULL,
+    reasons TEXT NOT NULL,
+    PRIMARY KEY (source, symbol)
+);
+"""
+STREAM_COLUMNS = ['source', 'symbol', 'initial_balance', 'trades', 'wins', 'pnl', 'profit', 'loss', 'peak', 'max_drawdown_pct', 'last_timestamp', 'reasons']
+ROW_COLUMNS = ['seq', 'timestamp', 'pnl_usd', 'cum_pnl', 'cum_wins', 'cum_profit', 'cum_loss', 'reason_seq', 'reason_pnl']
+
+
+def to_ms(value):
+    """Trade timestamp (ms int, datetime, numpy datetime64 or ISO string; naive means UTC) -> epoch ms."""
+    if isinstance(value, (int, np.integer)): return int(value)
+    if isinstance(value, str): value = datetime.fromisoformat(value)
+    if isinstance(value, datetime): return int((value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp() * 1000)
+    return int(np.datetime64(value, 'ms').astype('i8'))
+
+
+def timestamps_ms(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64): return values.astype('datetime64[ms]').astype('i8')
+    if np.issubdtype(values.dtype, np.number): return values.astype('i8')
+    return np.array([to_ms(v) for v in values], dtype='i8')
+
+
+class TradeStore:
+    """
+    Closed trades in SQLite (WAL mode), one append-only stream per (source, symbol), e.g. ('paper',
+    'BTC/USDT') or ('backtest', 'BTC/USDT'). Every row carries the running totals of its stream
+    (cumulative PnL, wins, gross profit and loss, the per-exit-reason count and PnL, the equity
+    peak and the max drawdown so far), computed once on append. Any time window's trade count,
+    PnL, win rate, profit factor and PnL by exit reason are then differences of two rows found
+    through the (source, symbol, timestamp) index, whatever the number of trades. The drawdown
+    of a window that does not start at the first trade is the one figure that reads the window's
+    rows (a single indexed column scan).
+    """
+
+    def __init__(self, path=TRADE_DB, readonly=False):
+        self.path, self.readonly, self.lock = path, readonly, threading.Lock()
+        if readonly: self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.conn.execute("PRAGMA journal_mode=WAL"); self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _stream(self, source, symbol):
+        row = self.conn.execute(f"SELECT {', '.join(STREAM_COLUMNS)} FROM streams WHERE source = ? AND symbol = ?", (source, symbol)).fetchone()
+        if row is None: return None
+        stream = dict(zip(STREAM_COLUMNS, row)); stream['reasons'] = json.loads(stream['reasons'])
+        return stream
+
+    def append(self, trade, source, symbol, initial_balance=100.0):
+        """Appends one closed trade (a strategy.trade_record dict). `initial_balance` is the equity base of a new stream."""
+        return self.append_many([trade], source, symbol, initial_balance)
+
+    def append_many(self, trades, source, symbol, initial_balance=100.0):
+        """
+        Appends closed trades, oldest first: a list of trade dicts or columns (e.g. a backtest
+        DataFrame), with the running aggregates computed in one vectorized pass and written in
+        one transaction. Returns the number of trades added.
+        """
+        if isinstance(trades, list): trades = {k: [t[k] for t in trades] for k in ['timestamp', *TRADE_FIELDS]}
+        if not len(trades['pnl_usd']): return 0
+        ts, pnl, reasons = timestamps_ms(trades['timestamp']), np.asarray(trades['pnl_usd'], dtype=float), np.asarray(trades['exit_reason'], dtype=object)
+        with self.lock:
+            stream = self._stream(source, symbol) or {
+                'source': source, 'symbol': symbol, 'initial_balance': initial_balance, 'trades': 0, 'wins': 0, 'pnl': 0.0, 'profit': 0.0, 'loss': 0.0,
+                'peak': initial_balance, 'max_drawdown_pct': 0.0, 'last_timestamp': int(ts[0]), 'reasons': {}}
+            if ts[0] < stream['last_timestamp'] or np.any(np.diff(ts) < 0): raise ValueError(f"Trades for {source} {symbol} must be appended in time order.")
+            seq = stream['trades'] + np.arange(1, len(pnl) + 1)
+            cum_pnl, cum_wins = stream['pnl'] + np.cumsum(pnl), stream['wins'] + np.cumsum(pnl > 0)
+            cum_profit, cum_loss = stream['profit'] + np.cumsum(np.maximum(pnl, 0)), stream['loss'] + np.cumsum(np.maximum(-pnl, 0))
+            equity = stream['initial_balance'] + cum_pnl
+            peak = np.maximum.accumulate(np.concatenate(([stream['peak']], equity)))[1:]
+            max_dd = np.minimum.accumulate(np.concatenate(([stream['max_drawdown_pct']], (equity - peak) / peak * 100)))[1:]
+            reason_seq, reason_pnl = np.zeros(len(pnl), dtype='i8'), np.zeros(len(pnl))
+            for reason in set(reasons.tolist()):
+                mask = reasons == reason; count, total = stream['reasons'].get(reason, (0, 0.0))
+                reason_seq[mask] = count + np.arange(1, mask.sum() + 1); reason_pnl[mask] = total + np.cumsum(pnl[mask])
+                stream['reasons'][reason] = (int(reason_seq[mask][-1]), float(reason_pnl[mask][-1]))
+            rows = zip([source] * len(pnl), [symbol] * len(pnl), seq.tolist(), ts.tolist(), *([str(v) if k in ('type', 'exit_reason') else float(v) for v in trades[k]] for k in TRADE_FIELDS),
+                       cum_pnl.tolist(), cum_wins.tolist(), cum_profit.tolist(), cum_loss.tolist(), reason_seq.tolist(), reason_pnl.tolist(), peak.tolist(), max_dd.tolist())
+            stream.update(trades=int(seq[-1]), wins=int(cum_wins[-1]), pnl=float(cum_pnl[-1]), profit=float(cum_profit[-1]), loss=float(cum_loss[-1]),
+                          peak=float(peak[-1]), max_drawdown_pct=float(max_dd[-1]), last_timestamp=int(ts[-1]))
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany(f"INSERT INTO trades VALUES ({', '.join('?' * 18)})", rows)
+                self.conn.execute(f"INSERT OR REPLACE INTO streams VALUES ({', '.join('?' * len(STREAM_COLUMNS))})", [json.dumps(v) if k == 'reasons' else v for k, v in stream.items()])
+        return len(pnl)
+
+    def clear(self, source, symbol=None):
+        """Drops a stream (or every stream of a source), e.g. before storing a new backtest run."""
+        where, args = ("source = ? AND symbol = ?", (source, symbol)) if symbol else ("source = ?", (source,))
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            for table in ('trades', 'streams'): self.conn.execute(f"DELETE FROM {table} WHERE {where}", args)
+
+    def list_streams(self):
+        """[(source, symbol, trades)] for every stream in the store."""
+        with self.lock: return self.conn.execute("SELECT source, symbol, trades FROM streams ORDER BY source, symbol").fetchall()
+
+    def _bounds(self, source, symbol, start_ms, end_ms, reason=None):
+        """(first, last) row of the stream (or of one exit reason) inside [start_ms, end_ms], as dicts; None if the window is empty."""
+        where = "source = ? AND symbol = ?" + (" AND exit_reason = ?" if reason is not None else "") + " AND timestamp BETWEEN ? AND ?"
+        args = (source, symbol, *((reason,) if reason is not None else ()), start_ms, end_ms)
+        first = self.conn.execute(f"SELECT {', '.join(ROW_COLUMNS)} FROM trades WHERE {where} ORDER BY timestamp, seq LIMIT 1", args).fetchone()
+        last = self.conn.execute(f"SELECT {', '.join(ROW_COLUMNS)} FROM trades WHERE {where} ORDER BY timestamp DESC, seq DESC LIMIT 1", args).fetchone()
+        return (dict(zip(ROW_COLUMNS, first)), dict(zip(ROW_COLUMNS, last))) if first and last else None
+
+    def summary(self, source, symbol, start_ms=None, end_ms=None):
+        """
+        Performance of one stream over [start_ms, end_ms] (default: all trades): trades, win rate,
+        PnL, gross profit and loss, profit factor, return and max drawdown relative to the equity at
+        the start of the window, and PnL by exit reason. None if the stream does not exist.
+        """
+        with self.lock:
+            stream = self._stream(source, symbol)
+            if stream is None: return None
+            start_ms, end_ms = -2**62 if start_ms is None else int(start_ms), 2**62 if end_ms is None else int(end_ms)
+            bounds = self._bounds(source, symbol, start_ms, end_ms)
+            result = {'source': source, 'symbol': symbol, 'trades': 0, 'wins': 0, 'win_rate_pct': None, 'pnl_usd': 0.0, 'gross_profit': 0.0, 'gross_loss': 0.0,
+                      'profit_factor': None, 'return_pct': 0.0, 'max_drawdown_pct': 0.0, 'first_timestamp': None, 'last_timestamp': None, 'by_exit_reason': {}}
+            if bounds is None: return result
+            first, last = bounds; first_pnl = first['pnl_usd']
+            trades, wins = last['seq'] - first['seq'] + 1, last['cum_wins'] - first['cum_wins'] + (first_pnl > 0)
+            pnl, profit, loss = last['cum_pnl'] - first['cum_pnl'] + first_pnl, last['cum_profit'] - first['cum_profit'] + max(first_pnl, 0), last['cum_loss'] - first['cum_loss'] + max(-first_pnl, 0)
+            start_equity = stream['initial_balance'] + first['cum_pnl'] - first_pnl
+            if first['seq'] == 1:  # the window starts at the first trade: the running drawdown is exact
+                max_dd = self.conn.execute("SELECT max_drawdown_pct FROM trades WHERE source = ? AND symbol = ? AND seq = ?", (source, symbol, last['seq'])).fetchone()[0]
+            else:
+                cum = np.array(self.conn.execute("SELECT cum_pnl FROM trades WHERE source = ? AND symbol = ? AND seq BETWEEN ? AND ? ORDER BY seq", (source, symbol, first['seq'], last['seq'])).fetchall()).ravel()
+                equity = stream['initial_balance'] + cum; peak = np.maximum.accumulate(np.concatenate(([start_equity], equity)))[1:]
+                max_dd = float(((equity - peak) / peak).min() * 100)
+            by_reason = {}
+            for reason in stream['reasons']:
+                rb = self._bounds(source, symbol, start_ms, end_ms, reason)
+                if rb: by_reason[reason] = {'trades': rb[1]['reason_seq'] - rb[0]['reason_seq'] + 1, 'pnl_usd': rb[1]['reason_pnl'] - rb[0]['reason_pnl'] + rb[0]['pnl_usd']}
+        result.update(trades=trades, wins=wins, win_rate_pct=wins / trades * 100, pnl_usd=pnl, gross_profit=profit, gross_loss=loss, profit_factor=profit / loss if loss else None,
+                      return_pct=pnl / start_equity * 100, max_drawdown_pct=max_dd, first_timestamp=first['timestamp'], last_timestamp=last['timestamp'], by_exit_reason=by_reason)
+        return result
+
+    def equity_curve(self, source, symbol, start_ms=None, end_ms=None, points=500):
+        """[(timestamp ms, equity)] after each trade in the window, thinned to at most `points` evenly spaced trades (the last one always included)."""
+        with self.lock:
+            stream = self._stream(source, symbol)
+            bounds = stream and self._bounds(source, symbol, -2**62 if start_ms is None else int(start_ms), 2**62 if end_ms is None else int(end_ms))
+            if not bounds: return []
+            seqs = np.unique(np.linspace(bounds[0]['seq'], bounds[1]['seq'], min(points, bounds[1]['seq'] - bounds[0]['seq'] + 1)).round().astype(int)).tolist()
+            rows = self.conn.execute(f"SELECT timestamp, cum_pnl FROM trades WHERE source = ? AND symbol = ? AND seq IN ({', '.join('?' * len(seqs))}) ORDER BY seq", (source, symbol, *seqs)).fetchall()
+        return [(ts, stream['initial_balance'] + cum) for ts, cum in rows]
+
+
+def append_csv_log(trade, file_path):
+    """Appends a trade dict to a trade log CSV, writing the header for a new file."""
+    import csv
+    if os.path.dirname(file_path): os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    new_file = not os.path.isfile(file_path)
+    with open(file_path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(trade))
+        if new_file: writer.writeheader()
+        writer.writerow(trade)
+    print(f"✅ Trade logged to {file_path}")
+
+
+def read_csv_log(file_path):
+    """Trade dicts from a trade log CSV (reports/trade_log.csv or a backtest log)."""
+    import csv
+    with open(file_path, newline='') as f: return list(csv.DictReader(f))
+
+
+def print_summary(s, label):
+    if not s or not s['trades']: print(f"   {label:<8} no trades"); return
+    pf = f"{s['profit_factor']:.2f}" if s['profit_factor'] is not None else "n/a"
+    print(f"   {label:<8} {s['trades']:>7} trades | PnL ${s['pnl_usd']:,.2f} ({s['return_pct']:+.2f}%) | win rate {s['win_rate_pct']:.1f}% | profit factor {pf} | max DD {s['max_drawdown_pct']:.2f}%")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Query or fill the indexed trade store.")
+    parser.add_argument('command', choices=['report', 'import'])
+    parser.add_argument('--source', default='paper', help="paper, live or backtest")
+    parser.add_argument('--symbol', default=config['TRADING']['SYMBOL'])
+    parser.add_argument('--csv', default=config['PATHS']['TRADE_LOG'], help="trade log to import")
+    args = parser.parse_args()
+    if args.command == 'import':
+        store = TradeStore(); rows = read_csv_log(args.csv)
+        store.clear(args.source, args.symbol); added = store.append_many(rows, args.source, args.symbol)
+        print(f"✅ Imported {added} trades from {args.csv} into {TRADE_DB} ({args.source} {args.symbol}).")
+    else:
+        store = TradeStore(readonly=True); now = int(time.time() * 1000)
+        print(f"📒 {args.source} {args.symbol} ({TRADE_DB})")
+        for label, days in (('24h', 1), ('7d', 7), ('30d', 30), ('all', None)):
+            print_summary(store.summary(args.source, args.symbol, now - days * DAY_MS if days else None), label)
+        for reason, r in sorted((store.summary(args.source, args.symbol) or {}).get('by_exit_reason', {}).items()):
+            print(f"   {reason:<16} {r['trades']:>7} trades | PnL ${r['pnl_usd']:,.2f}")
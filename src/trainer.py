@@ -0,0 +1,170 @@
+# src/trainer.py
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import backtester
+import champion_models
+from config import config
+from data_store import CandleStore
+from features import FEATURE_COLUMNS, FrozenScaler, compute_features
+from strategy import StrategyParams
+
+CACHE_DIR = config.get('PATHS', 'CACHE_DIR', fallback='data/cache')
+VERSION_DIR = config.get('TRAINING', 'VERSION_DIR', fallback=os.path.join(champion_models.MODEL_DIR, 'versions'))
+TARGET_HORIZON = config.getint('TRAINING', 'TARGET_HORIZON', fallback=5)
+FOLDS = config.getint('TRAINING', 'FOLDS', fallback=5)
+XGB_PARAMS = {'n_estimators': config.getint('TRAINING', 'N_ESTIMATORS', fallback=200), 'max_depth': config.getint('TRAINING', 'MAX_DEPTH', fallback=5),
+              'learning_rate': config.getfloat('TRAINING', 'LEARNING_RATE', fallback=0.05), 'max_bin': config.getint('TRAINING', 'MAX_BIN', fallback=256),
+              'tree_method': 'hist', 'random_state': 42}
+CACHE_COLUMNS = ['timestamp', 'features', 'target_long', 'target_short', 'close', 'atr']
+SIDES = {'long': 'target_long', 'short': 'target_short'}
+
+
+def max_move_targets(high, low, close, horizon=TARGET_HORIZON):
+    """
+    Per candle, the largest move available over the next `horizon` candles: max upside (highest
+    high / close - 1) for the long model and max downside (1 - lowest low / close) for the short
+    model. The last `horizon` candles have no target (NaN).
+    """
+    n = len(close); up, down = np.full(n, np.nan), np.full(n, np.nan)
+    if n > horizon:
+        highs, lows = np.lib.stride_tricks.sliding_window_view(high[1:], horizon), np.lib.stride_tricks.sliding_window_view(low[1:], horizon)
+        up[:n - horizon] = highs.max(axis=1) / close[:n - horizon] - 1; down[:n - horizon] = 1 - lows.min(axis=1) / close[:n - horizon]
+    return up, down
+
+
+def walk_forward_folds(n, folds=FOLDS, gap=TARGET_HORIZON):
+    """
+    Expanding-window folds over n time-ordered rows: the history is cut into folds + 1 blocks and
+    fold k trains on blocks 0..k-1 and tests on block k. The last `gap` training rows are purged,
+    since their targets look into the test block. Returns [(train_end, test_start, test_end)].
+    """
+    bounds = np.linspace(0, n, folds + 2).astype(int)
+    return [(int(bounds[k] - gap), int(bounds[k]), int(bounds[k + 1])) for k in range(1, folds + 1)]
+
+
+def cache_key(data_file, df_3m=None, horizon=TARGET_HORIZON):
+    """Identifies a feature cache by the history it was built from (file stat and store view, or the frame's contents) and the target horizon."""
+    digest = hashlib.sha1(f"{horizon}:{','.join(FEATURE_COLUMNS)}".encode())
+    if df_3m is not None: digest.update(pd.util.hash_pandas_object(df_3m).values.tobytes())
+    else:
+        stat = os.stat(data_file) if os.path.exists(data_file) else None
+        digest.update(f"{os.path.abspath(data_file)}:{stat.st_size if stat else '-'}:{stat.st_mtime_ns if stat else '-'}".encode())
+        digest.update(str(CandleStore(backtester.SYMBOL).view.last_timestamp).encode())
+    return digest.hexdigest()[:16]
+
+
+def build_cache(data_file=backtester.DATA_FILE, cache_dir=CACHE_DIR, df_3m=None, horizon=TARGET_HORIZON):
+    """
+    Computes the unscaled feature matrix, both targets, close and ATR once and stores them as .npy
+    columns, which every fold worker memory-maps instead of recomputing. Returns the cache directory.
+    """
+    path = os.path.join(cache_dir, f"training_{cache_key(data_file, df_3m, horizon)}")
+    if os.path.exists(os.path.join(path, 'atr.npy')):
+        print(f"✅ Using cached feature matrices from {path}"); return path
+    df = compute_features((backtester.load_resampled(data_file) if df_3m is None else df_3m).copy())
+    up, down = max_move_targets(df['high'].values, df['low'].values, df['close'].values, horizon)
+    keep = ~np.isnan(up)
+    print(f"   {keep.sum():,} training rows with {len(FEATURE_COLUMNS)} features and {horizon}-candle targets.")
+    data = {'timestamp': df.index.values[keep], 'features': df[FEATURE_COLUMNS].values[keep], 'target_long': up[keep], 'target_short': down[keep],
+            'close': df['close'].values[keep], 'atr': df['atr'].values[keep]}
+    os.makedirs(path, exist_ok=True)
+    for name in CACHE_COLUMNS: np.save(os.path.join(path, f"{name}.npy"), np.asarray(data[name]))  # atr last: its presence marks a complete cache
+    print(f"✅ Feature matrices cached to {path}"); return path
+
+
+def load_cache(path):
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in CACHE_COLUMNS}
+
+
+_worker_data = None
+
+def _init_worker(path, xgb_params, nthread, params, initial_balance):
+    """Each worker memory-maps the cache once; xgboost gets an equal share of the cores."""
+    global _worker_data
+    _worker_data = {'data': load_cache(path), 'xgb_params': {**xgb_params, 'n_jobs': nthread}, 'params': params, 'initial_balance': initial_balance}
+
+
+def _train_job(job):
+    """
+    Fits a scaler and both models on rows [0, train_end). A fold then scores rows [test_start,
+    test_end) and replays them through the backtest simulator; the final job instead writes its
+    models and scaler to `out_dir`.
+    """
+    import xgboost as xgb
+    w, (name, train_end, test_start, test_end, out_dir) = _worker_data, job
+    data, start = w['data'], time.perf_counter()
+    features = np.asarray(data['features'][:train_end]); scaler = FrozenScaler.fit(features)
+    frame = pd.DataFrame(scaler.transform(features), columns=FEATURE_COLUMNS)  # named columns, as the live models are loaded with
+    models = {side: xgb.XGBRegressor(**w['xgb_params']).fit(frame, np.asarray(data[target][:train_end])) for side, target in SIDES.items()}
+    result = {'name': name, 'train_rows': train_end, 'train_seconds': round(time.perf_counter() - start, 2)}
+    if out_dir:
+        models['long'].save_model(os.path.join(out_dir, champion_models.LONG_MODEL_NAME)); models['short'].save_model(os.path.join(out_dir, champion_models.SHORT_MODEL_NAME))
+        scaler.save(os.path.join(out_dir, champion_models.SCALER_NAME)); return result
+    test = pd.DataFrame(scaler.transform(np.asarray(data['features'][test_start:test_end])), columns=FEATURE_COLUMNS)
+    preds = {side: model.predict(test) for side, model in models.items()}
+    for side, target in SIDES.items():
+        actual = np.asarray(data[target][test_start:test_end])
+        result[f"rmse_{side}"] = float(np.sqrt(np.mean((preds[side] - actual) ** 2))); result[f"corr_{side}"] = float(np.corrcoef(preds[side], actual)[0, 1])
+    trades, final_balance, _ = backtester.simulate(data['close'][test_start:test_end], data['atr'][test_start:test_end], test['volatility_10'].values, test['volatility_filter'].values,
+                                                   preds['long'], preds['short'], w['params'], w['initial_balance'])
+    summary = backtester.summarize([t[5] for t in trades], w['initial_balance'], final_balance)
+    result.update(test_rows=test_end - test_start, test_start=str(data['timestamp'][test_start]), test_end=str(data['timestamp'][test_end - 1]),
+                  **{k: summary[k] for k in ('trades', 'return_pct', 'max_drawdown_pct', 'win_rate_pct')})
+    return result
+
+
+def train(data_file=backtester.DATA_FILE, df_3m=None, folds=FOLDS, workers=None, xgb_params=None, cache_dir=CACHE_DIR, version_dir=VERSION_DIR,
+          model_dir=champion_models.MODEL_DIR, promote=True, params=None, initial_balance=backtester.INITIAL_BALANCE):
+    """
+    Walk-forward validation plus the final fit on all rows, every job on its own worker process.
+    Writes <version_dir>/<version>/ with both models, the frozen scaler and a manifest, and copies
+    the three artifacts into `model_dir` when `promote` is set. Returns the manifest.
+    """
+    import xgboost as xgb
+    start, xgb_params, params = time.perf_counter(), {**XGB_PARAMS, **(xgb_params or {})}, params or StrategyParams.from_config(config)
+    cache_path = build_cache(data_file, cache_dir, df_3m)
+    data = load_cache(cache_path); n = len(data['close'])
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ'); out_dir = os.path.join(version_dir, version)
+    os.makedirs(out_dir, exist_ok=True)
+    # Largest job first, so the final fit does not start last on a busy pool.
+    jobs = [('final', n, n, n, out_dir)] + [(f"fold_{k}", *bounds, None) for k, bounds in reversed(list(enumerate(walk_forward_folds(n, folds), 1)))]
+    workers = workers or min(len(jobs), os.cpu_count() or 1); nthread = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🏋️ Training {folds} walk-forward folds and the final models on {workers} workers x {nthread} threads ({n:,} rows, {xgb_params['tree_method']} trees)...")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_path, xgb_params, nthread, params, initial_balance)) as pool:
+        results = {result['name']: result for result in pool.map(_train_job, jobs)}
+    for k in range(1, folds + 1):
+        r = results[f"fold_{k}"]
+        print(f"   fold {k}: train {r['train_rows']:,} / test {r['test_rows']:,} rows | corr long {r['corr_long']:.3f}, short {r['corr_short']:.3f} | {r['trades']} trades, return {r['return_pct']:+.2f}% | {r['train_seconds']:.1f}s")
+    manifest = {'version': version, 'created': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'data_file': data_file if df_3m is None else None,
+                'rows': n, 'first_timestamp': str(data['timestamp'][0]), 'last_timestamp': str(data['timestamp'][-1]), 'features': FEATURE_COLUMNS,
+                'targets': {side: f"{'max upside' if side == 'long' else 'max downside'} over the next {TARGET_HORIZON} candles" for side in SIDES},
+                'xgboost': xgb.__version__, 'xgb_params': xgb_params, 'strategy_params': params.__dict__,
+                'folds': [results[f"fold_{k}"] for k in range(1, folds + 1)], 'final_train_seconds': results['final']['train_seconds'],
+                'files': [champion_models.LONG_MODEL_NAME, champion_models.SHORT_MODEL_NAME, champion_models.SCALER_NAME], 'seconds': round(time.perf_counter() - start, 1)}
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f: json.dump(manifest, f, indent=4)
+    if promote:
+        os.makedirs(model_dir, exist_ok=True)
+        for name in manifest['files']: shutil.copy2(os.path.join(out_dir, name), os.path.join(model_dir, name))
+    print(f"✅ Models {version} trained in {manifest['seconds']:.1f}s: {out_dir}" + (f" (promoted to {model_dir})" if promote else ""))
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the champion long/short models with walk-forward validation.")
+    parser.add_argument('--data', default=backtester.DATA_FILE)
+    parser.add_argument('--folds', type=int, default=FOLDS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-promote', action='store_true', help="Only write the versioned artifacts; leave the models the bots load untouched.")
+    args = parser.parse_args()
+    train(args.data, folds=args.folds, workers=args.workers, promote=not args.no_promote)
@@ -0,0 +1,92 @@
+# src/tree_inference.py
+
+import json
+
+import numpy as np
+
+IDENTITY_OBJECTIVES = {'reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror'}
+CHUNK_ROWS = 4096
+
+
+def load_xgboost_json(path):
+    """
+    Reads a gbtree regressor saved with `save_model(...json)` into flat node arrays.
+    Leaves point to themselves so a fixed number of traversal steps always lands on them.
+    """
+    with open(path, 'r') as f: learner = json.load(f)['learner']
+    booster = learner['gradient_booster']
+    if booster['name'] != 'gbtree': raise ValueError(f"Unsupported booster '{booster['name']}' in {path}.")
+    if learner['objective']['name'] not in IDENTITY_OBJECTIVES: raise ValueError(f"Unsupported objective '{learner['objective']['name']}' in {path}.")
+    feature, threshold, left, right, default_left, value, roots, depth = [], [], [], [], [], [], [], 0
+    offset = 0
+    for tree in booster['model']['trees']:
+        if any(tree['split_type']): raise ValueError(f"Categorical splits are not supported ({path}).")
+        lc, rc = np.asarray(tree['left_children'], dtype=np.int64), np.asarray(tree['right_children'], dtype=np.int64)
+        nodes = np.arange(len(lc)); leaf = lc == -1
+        feature.append(np.where(leaf, 0, tree['split_indices'])); threshold.append(tree['split_conditions'])
+        left.append(np.where(leaf, nodes, lc) + offset); right.append(np.where(leaf, nodes, rc) + offset)
+        default_left.append(np.asarray(tree['default_left'], dtype=bool)); value.append(np.where(leaf, tree['split_conditions'], 0.0))
+        roots.append(offset); offset += len(lc)
+        depth = max(depth, tree_depth(lc, rc))
+    return {'feature': np.concatenate(feature).astype(np.int64), 'threshold': np.concatenate(threshold).astype(np.float32),
+            'left': np.concatenate(left), 'right': np.concatenate(right), 'default_left': np.concatenate(default_left),
+            'value': np.concatenate(value).astype(np.float32), 'roots': np.asarray(roots, dtype=np.int64), 'depth': depth,
+            'base_score': float(str(learner['learner_model_param']['base_score']).strip('[]')), 'feature_names': learner.get('feature_names', [])}
+
+
+def tree_depth(left_children, right_children):
+    depth, level = 0, [0]
+    while level:
+        level = [c for n in level for c in (left_children[n], right_children[n]) if c != -1]
+        depth += bool(level)
+    return depth
+
+
+class CompiledForest:
+    """
+    Several tree ensembles compiled into one node table. All trees of all models are walked
+    together, level by level, with NumPy gathers, so one call scores every model for a single
+    row or a batch. Matches xgboost's float32 split comparisons and missing-value routing.
+    """
+
+    def __init__(self, models):
+        names = {tuple(m['feature_names']) for m in models}
+        if len(names) > 1: raise ValueError("All models must use the same features.")
+        self.feature_names = list(names.pop()) if names else []
+        offsets = np.cumsum([0] + [len(m['feature']) for m in models[:-1]])
+        for key in ('feature', 'threshold', 'default_left', 'value'): setattr(self, key, np.concatenate([m[key] for m in models]))
+        for key in ('left', 'right', 'roots'): setattr(self, key, np.concatenate([m[key] + o for m, o in zip(models, offsets)]))
+        self.depth = max(m['depth'] for m in models)
+        self.model_starts = np.cumsum([0] + [len(m['roots']) for m in models[:-1]])
+        self.base_score = np.asarray([m['base_score'] for m in models])
+
+    @classmethod
+    def load(cls, *paths):
+        return cls([load_xgboost_json(p) for p in paths])
+
+    @property
+    def n_models(self): return len(self.base_score)
+
+    def predict(self, X):
+        """Scores a (rows, features) matrix, or one feature vector. Returns (rows, models) float64 predictions."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        if len(X) <= CHUNK_ROWS: return self._predict(X)
+        return np.concatenate([self._predict(X[i:i + CHUNK_ROWS]) for i in range(0, len(X), CHUNK_ROWS)])
+
+    def predict_row(self, vector):
+        """Every model's prediction for a single feature vector, as a tuple of floats (the per-candle live path)."""
+        x_row, node = np.asarray(vector, dtype=np.float32).ravel(), self.roots
+        missing = np.isnan(x_row).any()
+        for _ in range(self.depth):
+            x = x_row[self.feature[node]]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node]) if missing else x < self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return tuple((np.add.reduceat(self.value[node], self.model_starts, dtype=np.float64) + self.base_score).tolist())
+
+    def _predict(self, X):
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            x = np.take_along_axis(X, self.feature[node], axis=1)
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return np.add.reduceat(self.value[node], self.model_starts, axis=1, dtype=np.float64) + self.base_score